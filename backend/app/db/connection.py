@@ -1,3 +1,6 @@
+import atexit
+
+from django.conf import settings
 from engine.engine import Engine
 
 _engine = None
@@ -6,5 +9,11 @@ def get_engine():
     global _engine
     if _engine is None:
         # Engine uses absolute path by default when db_path is None
-        _engine = Engine()
+        _engine = Engine(
+            parallel_workers=getattr(settings, "ENGINE_PARALLEL_WORKERS", 1),
+            parallel_min_pages=getattr(settings, "ENGINE_PARALLEL_MIN_PAGES", 64),
+        )
+        # A clean shutdown saves the catalog, so the next start can skip
+        # recounting rows
+        atexit.register(_engine.close)
     return _engine
@@ -1,5 +1,8 @@
 from typing import List
-from engine.sql.ast import Select, Insert, CreateTable, Update, Delete, DropTable, Join
+from engine.sql.ast import (
+    Select, Insert, CreateTable, Update, Delete, DropTable, Join, Vacuum, Truncate,
+    CreateIndex, DropIndex, conjuncts,
+)
 from engine.planner.logical import (
     LogicalScan,
     LogicalFilter,
@@ -18,8 +21,10 @@ from engine.executor.delete import DeleteExecutor
 from engine.executor.drop import DropTableExecutor
 from engine.executor.join import JoinExecutor
 from engine.executor.order_by import OrderBy
+from engine.executor.index_scan import IndexOnlyScan, IndexScan
 from engine.executor.limit import Limit
 from engine.executor.group_by import GroupBy
+from engine.executor.count import CountRows
 from engine.exceptions import QueryError
 
 # Moving query.py to backend/app/db/ is fine because its internal imports like from engine.* 
@@ -52,11 +57,14 @@ def build_plan(ast):
         return projection
 
     if isinstance(ast, Insert):
-        return LogicalInsert(ast.table, ast.values)
+        return LogicalInsert(ast.table, ast.values, ast.rows)
 
     if isinstance(ast, CreateTable):
         return ast  # executed directly
 
+    if isinstance(ast, (Vacuum, Truncate, CreateIndex, DropIndex)):
+        return ast  # executed directly
+
     if isinstance(ast, DropTable):
         return LogicalDrop(ast.name)
 
@@ -86,9 +94,29 @@ def execute_plan(plan, engine) -> List[dict]:
         engine.create_table(plan.name, plan.columns)
         return []
 
+    # VACUUM
+    if isinstance(plan, Vacuum):
+        return engine.vacuum(plan.name)
+
+    # CREATE INDEX / DROP INDEX
+    if isinstance(plan, CreateIndex):
+        engine.create_index(
+            plan.name, plan.table, plan.columns, unique=plan.unique, using=plan.using,
+            include=plan.include or (),
+        )
+        return []
+
+    if isinstance(plan, DropIndex):
+        engine.drop_index(plan.name)
+        return []
+
+    # TRUNCATE TABLE
+    if isinstance(plan, Truncate):
+        return engine.truncate_table(plan.name)
+
     # INSERT
     if isinstance(plan, LogicalInsert):
-        executor = InsertExecutor(engine, plan.table, plan.values)
+        executor = InsertExecutor(engine, plan.table, plan.values, plan.rows)
         return executor.execute()
 
     # DROP TABLE
@@ -108,9 +136,10 @@ def execute_plan(plan, engine) -> List[dict]:
         executor = DeleteExecutor(engine, plan.table, plan.predicate)
         return executor.execute()
 
-    # SELECT pipeline
-    executor = _build_executor(plan, engine)
-    return executor.execute()
+    # SELECT pipeline: every scan of the query reads one MVCC snapshot
+    with engine.snapshot():
+        executor = _build_executor(plan, engine)
+        return executor.execute()
 
 
 # --------------------------
@@ -124,18 +153,52 @@ def _build_executor(plan, engine):
         return TableScan(engine, plan.table)
 
     if isinstance(plan, LogicalFilter):
+        # Filters directly over a table are pushed into the scan, where they
+        # run inside the (possibly parallel) page decode loop
+        if isinstance(plan.source, LogicalScan):
+            return TableScan(engine, plan.source.table, predicate=plan.predicate)
         source = _build_executor(plan.source, engine)
         return Filter(source, plan.predicate)
 
     if isinstance(plan, LogicalProjection):
-        source = _build_executor(plan.source, engine)
-        executor = Projection(source, plan.columns)
-        
-        # Apply query shaping on top of projection
         select_ast = plan.select_ast if hasattr(plan, 'select_ast') else None
-        if select_ast and hasattr(select_ast, 'group_by') and select_ast.group_by:
-            executor = GroupBy(executor, select_ast.group_by, select_ast.having)
-        if select_ast and hasattr(select_ast, 'order_by') and select_ast.order_by:
+
+        # Plain COUNT(*): unfiltered counts come from catalog metadata
+        if (
+            CountRows.is_count_star(plan.columns)
+            and not (select_ast and select_ast.group_by)
+            and not isinstance(plan.source, Join)
+        ):
+            if isinstance(plan.source, LogicalScan):
+                return CountRows(engine, plan.source.table, plan.columns[0])
+            source = _build_executor(plan.source, engine)
+            return CountRows(engine, None, plan.columns[0], source)
+
+        # GROUP BY straight over a table: push the grouping into the scan so
+        # workers return partial counts rather than every row
+        scan = _scan_table_and_predicate(plan.source)
+        index_order, presorted = _index_only_scan(engine, select_ast, scan, plan.columns)
+        if index_order is None:
+            index_order = _index_order_scan(engine, select_ast, scan)
+            presorted = index_order is not None
+        if index_order is not None:
+            # A covering index answers the query without the heap, or ORDER
+            # BY an indexed column: rows come out of the index sorted
+            executor = Projection(index_order, plan.columns)
+        elif select_ast and select_ast.group_by and not select_ast.having and scan:
+            table, predicate = scan
+            executor = GroupBy(
+                TableScan(engine, table, predicate=predicate, group_by=select_ast.group_by),
+                select_ast.group_by,
+            )
+        else:
+            source = _build_executor(plan.source, engine)
+            executor = Projection(source, plan.columns)
+
+            # Apply query shaping on top of projection
+            if select_ast and hasattr(select_ast, 'group_by') and select_ast.group_by:
+                executor = GroupBy(executor, select_ast.group_by, select_ast.having)
+        if select_ast and hasattr(select_ast, 'order_by') and select_ast.order_by and not presorted:
             executor = OrderBy(executor, select_ast.order_by)
         if select_ast and (hasattr(select_ast, 'limit') and select_ast.limit or hasattr(select_ast, 'offset') and select_ast.offset):
             executor = Limit(executor, select_ast.limit, select_ast.offset)
@@ -152,3 +215,70 @@ def _build_executor(plan, engine):
         )
 
     raise QueryError(f"Unsupported logical plan: {type(plan)}")
+
+
+def _index_only_scan(engine, select_ast, scan, columns):
+    """
+    (IndexOnlyScan, presorted) when a covering index holds every column the
+    query touches, else (None, False). `presorted` is True when the rows
+    already come out in ORDER BY order.
+    """
+    if not select_ast or not scan or select_ast.group_by:
+        return None, False
+    table_name, predicate = scan
+    table = engine.catalog.get_table(table_name.upper())
+
+    needed = set()
+    for column in columns:
+        name = column.name.split(" AS ")[0].strip()
+        if name == "*":
+            needed.update(c.name.lower() for c in table.columns)
+        elif "(" in name:
+            return None, False  # aggregates
+        else:
+            needed.add(name.split(".")[-1].lower())
+    needed.update(cond.left.name.split(".")[-1].lower() for cond in conjuncts(predicate))
+    order_by = select_ast.order_by or []
+    needed.update(column.split(".")[-1].lower() for column, _ in order_by)
+
+    order_column = order_by[0][0].split(".")[-1].lower() if len(order_by) == 1 else None
+    index = IndexOnlyScan.choose(engine, table.name, needed, predicate, order_column)
+    if index is None:
+        return None, False
+    presorted = not order_by or order_column == index[0]
+    limit = None
+    if presorted and select_ast.limit:
+        limit = select_ast.limit + (select_ast.offset or 0)
+    reverse = bool(order_by) and presorted and order_by[0][1] == "DESC"
+    scan = IndexOnlyScan(engine, table.name, index, predicate, reverse=reverse, limit=limit)
+    return scan, presorted and bool(order_by)
+
+
+def _index_order_scan(engine, select_ast, scan):
+    """
+    IndexScan for `SELECT ... FROM t [WHERE ...] ORDER BY col` when `col`
+    has a single-column index over a NOT NULL column, else None.
+    """
+    if not select_ast or not scan or select_ast.group_by:
+        return None
+    if not select_ast.order_by or len(select_ast.order_by) != 1:
+        return None
+    table, predicate = scan
+    column, direction = select_ast.order_by[0]
+    if not IndexScan.usable(engine, table, column):
+        return None
+    limit = None
+    if select_ast.limit:
+        limit = select_ast.limit + (select_ast.offset or 0)
+    return IndexScan(
+        engine, table, column, predicate=predicate, reverse=direction == "DESC", limit=limit
+    )
+
+
+def _scan_table_and_predicate(plan):
+    """(table, predicate) when `plan` is a bare scan, optionally filtered."""
+    if isinstance(plan, LogicalScan):
+        return plan.table, None
+    if isinstance(plan, LogicalFilter) and isinstance(plan.source, LogicalScan):
+        return plan.source.table, plan.predicate
+    return None
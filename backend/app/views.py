@@ -130,13 +130,11 @@ def list_tables(request):
         session = get_session()
         engine = session.engine
         
-        tables = []
-        for table_name in engine.catalog.tables:
-            rows = engine.get_rows(table_name)
-            tables.append({
-                "name": table_name,
-                "row_count": len(rows)
-            })
+        # Counts are maintained in the catalog; no table is scanned here
+        tables = [
+            engine.table_stats(table_name)
+            for table_name in engine.catalog.tables
+        ]
         
         return JsonResponse({"status": "OK", "data": {"tables": tables}})
     except Exception as e:
@@ -242,14 +240,18 @@ def delete_row(request, table_name, row_id):
         engine = session.engine
         table = engine.catalog.get_table(table_name.upper())
         
-        # Build WHERE predicate for the primary key
-        # Assuming first column is the primary key
-        pk_col = table.columns[0]
+        # Build WHERE predicate for the primary key (first column if the
+        # table declares none); the engine resolves it through the PK index
+        pk_col = next((c for c in table.columns if c.primary_key), table.columns[0])
         
         def where_fn(row):
             return row.get(pk_col.name.lower()) == int(row_id)
         
-        result = engine.delete_rows(table_name.upper(), where_fn=where_fn)
+        result = engine.delete_rows(
+            table_name.upper(),
+            where_fn=where_fn,
+            conditions=[(pk_col.name, "=", int(row_id))],
+        )
         deleted = result[0].get("deleted", 0)
         
         if deleted == 0:
@@ -305,10 +307,8 @@ def reset_database(request):
         session = get_session()
         engine = session.engine
         
-        # Drop all tables
-        table_names = list(engine.catalog.tables.keys())
-        for table_name in table_names:
-            engine.drop_table(table_name)
+        # Drop all tables, referencing tables before the ones they reference
+        table_names = engine.drop_all_tables()
         
         return JsonResponse({
             "status": "OK",
@@ -109,6 +109,14 @@ DATABASES = {
 }
 
 
+# Custom database engine
+# Worker processes used by table scans (1 = serial); tables smaller than
+# ENGINE_PARALLEL_MIN_PAGES pages are always scanned serially.
+
+ENGINE_PARALLEL_WORKERS = 1
+ENGINE_PARALLEL_MIN_PAGES = 64
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -0,0 +1,173 @@
+"""
+Concurrent B+ tree stress benchmark.
+
+One writer thread inserts and deletes keys while reader threads run point
+lookups and short range scans over keys that never change, on the same
+tree. The optimistic lock coupling tree (latch-free readers beside one
+writer) is compared with the same tree behind a single global lock.
+
+After every run the invariants are checked: each reader result was exact
+(lookups found their one entry, scans returned every stable key in order),
+no writer delete missed, and BPlusTree.verify() accepts the structure and
+finds exactly the stable keys once the writer removed its own.
+
+CPython runs one thread at a time, so the point is not parallel speedup
+but that readers are not serialized behind each other and the writer:
+with the global lock a long scan stalls every other thread.
+
+Usage:
+    python benchmarks/btree_concurrency_benchmark.py [keys] [seconds] [readers,...]
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from engine.index.btree import BPlusTree
+
+SCAN_WIDTH = 200
+
+
+class GlobalLockTree(BPlusTree):
+    """Every operation, scans included, under one tree-wide lock."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._global = threading.RLock()
+
+    def search(self, key):
+        with self._global:
+            return iter(list(super().search(key)))
+
+    def range(self, *args, **kwargs):
+        with self._global:
+            return iter(list(super().range(*args, **kwargs)))
+
+    def insert(self, key, value):
+        with self._global:
+            super().insert(key, value)
+
+    def delete(self, key, value):
+        with self._global:
+            return super().delete(key, value)
+
+
+class CountingTree(BPlusTree):
+    """The optimistic tree, counting reads a writer invalidated (each one a restart)."""
+
+    restarts = 0
+
+    def _unchanged(self, ref, version):
+        unchanged = super()._unchanged(ref, version)
+        if not unchanged:
+            self.restarts += 1
+        return unchanged
+
+
+def run(make_tree, count, seconds, readers):
+    stable = list(range(0, count * 2, 2))
+    tree = make_tree()
+    for key in stable:
+        tree.insert((key,), (key, 0))
+    probes = stable[: -SCAN_WIDTH // 2]
+
+    stop = threading.Event()
+    errors = []
+    lookups = [0] * readers
+    scans = [0] * readers
+    writes = [0]
+
+    def writer():
+        rng = random.Random(1)
+        live = []
+        while not stop.is_set():
+            if live and rng.random() < 0.45:
+                key = live.pop(rng.randrange(len(live)))
+                if not tree.delete((key,), (key, 0)):
+                    errors.append(f"delete missed {key}")
+            else:
+                key = rng.randrange(count * 2) | 1
+                tree.insert((key,), (key, 0))
+                live.append(key)
+            writes[0] += 1
+        for key in live:
+            tree.delete((key,), (key, 0))
+
+    def reader(n):
+        rng = random.Random(100 + n)
+        while not stop.is_set():
+            for _ in range(20):
+                key = rng.choice(probes)
+                if list(tree.search((key,))) != [(key, 0)]:
+                    errors.append(f"lookup {key}")
+                lookups[n] += 1
+            lo = rng.choice(probes)
+            keys = [k[0] for k, _ in tree.range(lo=(lo,), hi=(lo + SCAN_WIDTH,))]
+            if [k for k in keys if k % 2 == 0] != list(range(lo, lo + SCAN_WIDTH + 1, 2)):
+                errors.append(f"scan from {lo}")
+            scans[n] += 1
+
+    threads = [threading.Thread(target=writer)] + [
+        threading.Thread(target=reader, args=(n,)) for n in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    try:
+        if tree.verify() != len(stable):
+            errors.append("entry count")
+    except ValueError as exc:
+        errors.append(str(exc))
+    if [k[0] for k, _ in tree.range()] != stable:
+        errors.append("final contents")
+    return {
+        "lookups": sum(lookups) / seconds,
+        "scans": sum(scans) / seconds,
+        "writes": writes[0] / seconds,
+        "restarts": getattr(tree, "restarts", 0),
+        "errors": errors,
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    reader_counts = [int(n) for n in sys.argv[3].split(",")] if len(sys.argv) > 3 else [1, 2, 4, 8]
+
+    # Switch threads often so readers really meet the writer mid-change
+    sys.setswitchinterval(1e-4)
+    trees = [
+        ("optimistic", lambda: CountingTree(order=64, int_keys=True)),
+        ("global lock", lambda: GlobalLockTree(order=64, int_keys=True)),
+    ]
+    print(f"{count} stable keys, 1 writer, {seconds:.1f}s per run\n")
+    print(
+        f"{'tree':>12} {'readers':>8} {'lookups/s':>10} {'scans/s':>9} "
+        f"{'writes/s':>9} {'restarts':>9} {'invariants':>11}"
+    )
+    failed = False
+    for readers in reader_counts:
+        for name, make_tree in trees:
+            result = run(make_tree, count, seconds, readers)
+            failed |= bool(result["errors"])
+            status = "ok" if not result["errors"] else f"{len(result['errors'])} FAILED"
+            print(
+                f"{name:>12} {readers:>8} {result['lookups']:>10.0f} {result['scans']:>9.0f} "
+                f"{result['writes']:>9.0f} {result['restarts']:>9} {status:>11}"
+            )
+            for error in result["errors"][:3]:
+                print(f"{'':>14}{error}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
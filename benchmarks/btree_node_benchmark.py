@@ -0,0 +1,98 @@
+"""
+B+ tree node layout benchmark.
+
+Builds in-memory B+ trees over the same random integer keys with the old
+layout (order 4, plain Node objects, tuple keys) and the compact ones
+(__slots__ nodes with a fanout in the hundreds, optionally unboxed int
+keys), then reports memory per key, tree height and point lookup latency.
+
+Usage:
+    python benchmarks/btree_node_benchmark.py [keys] [lookups]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from engine.index.btree import BPlusTree
+
+
+class LegacyNode:
+    """Node as it was before __slots__ (one __dict__ per instance)."""
+
+    def __init__(self, is_leaf=False):
+        self.is_leaf = is_leaf
+        self.keys = []
+        self.children = []
+        self.next = None
+        self.page_num = None
+        self.version = 0
+
+    def is_full(self, order):
+        return len(self.keys) >= order
+
+
+class LegacyTree(BPlusTree):
+    def _new_node(self, is_leaf):
+        return LegacyNode(is_leaf=is_leaf)
+
+
+def height(tree):
+    node, levels = tree.root, 1
+    while not node.is_leaf:
+        node, levels = tree._child(node, 0), levels + 1
+    return levels
+
+
+def build(make_tree, keys):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tree = make_tree()
+    for i, key in enumerate(keys):
+        tree.insert(key, i)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return tree, used
+
+
+def lookup_latency(tree, probes):
+    start = time.perf_counter()
+    for key in probes:
+        next(tree.search(key), None)
+    return (time.perf_counter() - start) / len(probes)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+
+    rng = random.Random(7)
+    keys = rng.sample(range(count * 10), count)
+    probes = [rng.choice(keys) for _ in range(lookups)]
+
+    layouts = [
+        ("order 4, dict nodes", lambda: LegacyTree(order=4)),
+        ("order 256, tuple keys", lambda: BPlusTree(order=256)),
+        ("order 256, int keys", lambda: BPlusTree(order=256, int_keys=True)),
+    ]
+    print(f"{count} keys, {lookups} lookups\n")
+    print(f"{'layout':>22} {'bytes/key':>10} {'height':>7} {'lookup us':>10} {'speedup':>8}")
+    baseline = None
+    for name, make_tree in layouts:
+        tree, used = build(make_tree, keys)
+        latency = lookup_latency(tree, probes)
+        if baseline is None:
+            baseline = latency
+        print(
+            f"{name:>22} {used / count:>10.1f} {height(tree):>7} "
+            f"{latency * 1e6:>10.2f} {baseline / latency:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
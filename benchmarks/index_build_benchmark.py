@@ -0,0 +1,87 @@
+"""
+Index build benchmark.
+
+Loads a table with keys in random order, then builds an index on it three
+ways: one insert per row (the old CREATE INDEX path), a bulk load from an
+in-memory sort, and a bulk load whose sort spills runs to disk. Reports
+build time, entries/sec and the pages the finished tree occupies.
+
+Usage:
+    python benchmarks/index_build_benchmark.py [rows] [fill_factor]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from engine.engine import Engine
+
+
+def load(engine, rows):
+    engine.create_table("events", [("id", "INT"), ("score", "INT"), ("tag", "TEXT")])
+    scores = list(range(rows))
+    random.Random(42).shuffle(scores)
+    for i, score in enumerate(scores):
+        engine.insert_row("events", [i, score, f"tag-{score % 997}"])
+
+
+def incremental(engine, columns):
+    names = [c.lower() for c in engine.catalog.get_table("EVENTS").schema.column_names()]
+    tree = engine._new_index_tree()
+    for page_num, _, _, offset, values in engine._locate_rows("EVENTS"):
+        key = engine.indexes.index_key(columns, dict(zip(names, values)))
+        tree.insert(key, (page_num, offset))
+    return tree
+
+
+def bulk(engine, columns, sort_buffer_rows):
+    engine.sort_buffer_rows = sort_buffer_rows
+    return engine._build_index("EVENTS", columns)
+
+
+def pages(tree):
+    return sum(length for _, length in tree.extents)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    fill_factor = float(sys.argv[2]) if len(sys.argv) > 2 else 0.9
+
+    tmpdir = tempfile.mkdtemp()
+    engine = Engine(db_path=os.path.join(tmpdir, "dbfile"), index_fill_factor=fill_factor)
+
+    print(f"Loading {rows} rows...")
+    start = time.perf_counter()
+    load(engine, rows)
+    print(f"Loaded in {time.perf_counter() - start:.2f}s\n")
+
+    methods = [
+        ("incremental", lambda cols: incremental(engine, cols)),
+        ("bulk (memory)", lambda cols: bulk(engine, cols, rows + 1)),
+        ("bulk (external)", lambda cols: bulk(engine, cols, max(1, rows // 8))),
+    ]
+    print(f"{'index':>8} {'method':>16} {'seconds':>9} {'entries/s':>12} {'pages':>7} {'speedup':>8}")
+    for columns in [("score",), ("tag", "score")]:
+        baseline = None
+        for name, build in methods:
+            start = time.perf_counter()
+            tree = build(columns)
+            elapsed = time.perf_counter() - start
+            if baseline is None:
+                baseline = elapsed
+            print(
+                f"{'+'.join(columns):>8} {name:>16} {elapsed:>9.2f} "
+                f"{rows / elapsed:>12,.0f} {pages(tree):>7} {baseline / elapsed:>7.2f}x"
+            )
+            tree.destroy()
+
+    engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Parallel table scan benchmark.
+
+Loads a table once, then runs the same filtered scan and GROUP BY query with
+1..N scan workers and reports rows/sec and speedup over the serial scan.
+
+Usage:
+    python benchmarks/parallel_scan_benchmark.py [rows] [max_workers]
+"""
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from engine.engine import Engine
+from engine.executor.scan import TableScan
+from engine.sql.ast import BinaryExpression, Column, Literal
+
+KINDS = ["click", "view", "buy", "share", "like"]
+
+
+def load(engine, rows):
+    engine.create_table("events", [("id", "INT"), ("kind", "TEXT"), ("amount", "FLOAT")])
+    for i in range(rows):
+        engine.insert_row("events", [i, KINDS[i % len(KINDS)], i * 0.5])
+
+
+def run(engine, workers, repeat=3):
+    engine.parallel_workers = workers
+    predicate = BinaryExpression(Column("amount"), ">", Literal("100.0"))
+    group_by = [Column("kind")]
+
+    best = {}
+    for name, scan in [
+        ("filter", lambda: TableScan(engine, "EVENTS", predicate=predicate)),
+        ("group_by", lambda: TableScan(engine, "EVENTS", group_by=group_by)),
+    ]:
+        scan().execute()  # warm the pool and page cache
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            scan().execute()
+            timings.append(time.perf_counter() - start)
+        best[name] = min(timings)
+    return best
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+
+    tmpdir = tempfile.mkdtemp()
+    engine = Engine(db_path=os.path.join(tmpdir, "dbfile"), parallel_min_pages=1)
+
+    print(f"Loading {rows} rows...")
+    start = time.perf_counter()
+    load(engine, rows)
+    print(f"Loaded in {time.perf_counter() - start:.2f}s "
+          f"({engine.table_stats('events')['page_count']} pages)\n")
+
+    print(f"{'workers':>8} {'filter rows/s':>15} {'speedup':>8} {'group rows/s':>15} {'speedup':>8}")
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        if engine._pool is not None:
+            engine._pool.shutdown()
+            engine._pool = None
+        best = run(engine, workers)
+        if baseline is None:
+            baseline = best
+        print(
+            f"{workers:>8} "
+            f"{rows / best['filter']:>15,.0f} {baseline['filter'] / best['filter']:>7.2f}x "
+            f"{rows / best['group_by']:>15,.0f} {baseline['group_by'] / best['group_by']:>7.2f}x"
+        )
+
+    engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -21,5 +21,10 @@ class Catalog:
             raise EngineError(f"Table {name} does not exist")
         return self.tables[name]
 
+    def drop_table(self, name: str) -> None:
+        if name not in self.tables:
+            raise EngineError(f"Table {name} does not exist")
+        del self.tables[name]
+
     def list_tables(self) -> list[str]:
         return list(self.tables.keys())
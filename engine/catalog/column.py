@@ -1,6 +1,10 @@
 from dataclasses import dataclass, field
 from typing import Type, List, Optional
 
+# Storage type <-> persisted type name
+DTYPE_NAMES = {int: "INTEGER", str: "TEXT", float: "FLOAT"}
+DTYPES_BY_NAME = {name: dtype for dtype, name in DTYPE_NAMES.items()}
+
 
 @dataclass
 class Column:
@@ -15,3 +19,32 @@ class Column:
     primary_key: bool = False
     auto_increment: bool = False
     constraints: List[str] = field(default_factory=list)  # e.g., ['PRIMARY_KEY', 'NOT_NULL', 'AUTO_INCREMENT']
+    # FOREIGN_KEY: [table, column] of the referenced key, and what deleting
+    # a referenced row does to this one (RESTRICT or CASCADE)
+    references: Optional[List[str]] = None
+    on_delete: str = "RESTRICT"
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "type": DTYPE_NAMES[self.dtype],
+            "nullable": self.nullable,
+            "primary_key": self.primary_key,
+            "auto_increment": self.auto_increment,
+            "constraints": list(self.constraints),
+            "references": None if self.references is None else list(self.references),
+            "on_delete": self.on_delete,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Column":
+        return cls(
+            name=data["name"],
+            dtype=DTYPES_BY_NAME[data["type"]],
+            nullable=data["nullable"],
+            primary_key=data["primary_key"],
+            auto_increment=data["auto_increment"],
+            constraints=list(data["constraints"]),
+            references=data.get("references"),
+            on_delete=data.get("on_delete", "RESTRICT"),
+        )
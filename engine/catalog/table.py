@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List
 from engine.catalog.column import Column
 from engine.record.schema import TableSchema, ColumnSchema
@@ -13,6 +13,12 @@ class Table:
     name: str
     columns: List[Column]
     file_id: int = -1  # optional storage identifier
+    row_count: int = 0  # live rows, maintained by the engine on every write
+    page_count: int = 0  # pages allocated to the table
+    # Storage extents as [first_page, page_count] runs, in scan order
+    extents: List[List[int]] = field(default_factory=list)
+    sequence: int = 0  # last AUTO_INCREMENT value handed out
+    sequence_reserved: int = 0  # end of the persisted block of sequence values
 
     @property
     def schema(self) -> TableSchema:
@@ -23,3 +29,44 @@ class Table:
             ColumnSchema(c.name, c.dtype, c.nullable) for c in self.columns
         ]
         return TableSchema(col_schemas)
+
+    def pages(self) -> List[int]:
+        """Page ids of every extent, in scan order."""
+        return [
+            page_num
+            for start, length in self.extents
+            for page_num in range(start, start + length)
+        ]
+
+    def add_page(self, page_num: int) -> None:
+        """Append a page, growing the last extent when it is contiguous."""
+        if self.extents and sum(self.extents[-1]) == page_num:
+            self.extents[-1][1] += 1
+        else:
+            self.extents.append([page_num, 1])
+        self.page_count += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "columns": [c.to_dict() for c in self.columns],
+            "file_id": self.file_id,
+            "row_count": self.row_count,
+            "page_count": self.page_count,
+            "extents": [list(e) for e in self.extents],
+            "sequence": self.sequence,
+            "sequence_reserved": self.sequence_reserved,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Table":
+        return cls(
+            name=data["name"],
+            columns=[Column.from_dict(c) for c in data["columns"]],
+            file_id=data["file_id"],
+            row_count=data["row_count"],
+            page_count=data["page_count"],
+            extents=[list(e) for e in data["extents"]],
+            sequence=data["sequence"],
+            sequence_reserved=data["sequence_reserved"],
+        )
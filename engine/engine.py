@@ -1,13 +1,29 @@
+import functools
+import heapq
+import struct
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Generator, Any
-from engine.exceptions import EngineError
+from typing import List, Dict, Generator, Any, Optional, Set, Tuple
+from engine.exceptions import ConstraintViolationError, EngineError
 from engine.catalog.catalog import Catalog
 from engine.catalog.column import Column
 from engine.catalog.table import Table
 from engine.record.record import Record
 from engine.storage.file_manager import FileManager
 from engine.storage.pager import Pager
-from engine.storage.page import RowPage
+from engine.storage.page import Page, RowPage
+from engine.storage.metadata import MetadataStore
+from engine.storage.free_list import FreePageList
+from engine.storage.zone_map import ZoneMap
+from engine.index.paged_btree import PagedBPlusTree
+from engine.index.hash_index import HashIndex
+from engine.index.bloom import BloomFilterIndex
+from engine.index.index_manager import IndexManager
+from engine.index.external_sort import external_sort
+from engine.transaction.log import WALog
+from engine.transaction.snapshot import Snapshot
 
 
 SQL_TYPE_MAP = {
@@ -20,11 +36,25 @@ SQL_TYPE_MAP = {
 }
 
 
+def logged(method):
+    """Run an Engine method as one write-ahead log transaction (see Engine._statement)."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._statement():
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
 class Engine:
     """
     Top-level database engine façade.
     """
 
+    # Page-backed structure behind each index method (CREATE INDEX ... USING)
+    INDEX_TYPES = {"btree": PagedBPlusTree, "hash": HashIndex, "bloom": BloomFilterIndex}
+
 # That line in Engine.__init__(self, db_path: str = "data/dbfile", page_size: int = 4096) defines defaults,
 # not the entry point itself. The actual entry point is connection.py, which decides when and how the engine
 # is created. The db_path="data/dbfile" default exists so the engine can be instantiated without arguments
@@ -34,7 +64,17 @@ class Engine:
 # anchors the permanent storage, and page_size governs the in-memory paging mechanics, but the default values 
 # are just fallbacks, not ownership.
 
-    def __init__(self, db_path=None, page_size: int = 4096):
+    def __init__(
+        self,
+        db_path=None,
+        page_size: int = 4096,
+        parallel_workers: int = 1,
+        parallel_min_pages: int = 64,
+        index_fill_factor: float = 0.9,
+        sort_buffer_rows: int = 100_000,
+        checkpoint_interval: int = 4 * 1024 * 1024,
+        wal_segment_size: int = WALog.SEGMENT_SIZE,
+    ):
         if db_path is None:
             # Use absolute path to project root data directory
             # __file__ is in engine/, so go up 1 level to project root
@@ -42,46 +82,706 @@ class Engine:
             db_path = str(project_root / "data" / "dbfile")
         
         self.catalog = Catalog()
+        self.indexes = IndexManager(
+            loader=self._load_index, new_tree=self._new_index_tree, live=self._row_live
+        )
         self.file_manager = FileManager(Path(db_path))
         self.pager = Pager(self.file_manager, page_size)
 
         # Map table name → starting page id
         self.table_files: Dict[str, int] = {}
 
-        # Next available page id (global)
-        self.next_file_id = 0
+        # Next available page id (global); page 0 is the superblock
+        self.next_file_id = 1
+        # Pages released by DROP / TRUNCATE, reused before the file grows
+        self.free_pages = FreePageList()
+        # Table name -> per-page min / max / NULL counts (None = rebuild on
+        # first use)
+        self.zone_maps: Dict[str, Optional[ZoneMap]] = {}
+
+        # Degree of parallelism for table scans (1 = always serial) and the
+        # smallest table, in pages, worth shipping to worker processes
+        self.parallel_workers = max(1, parallel_workers)
+        self.parallel_min_pages = parallel_min_pages
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        # Index builds: how full bulk-loaded nodes are packed (the rest is
+        # room for later inserts) and how many entries are sorted in memory
+        # before runs spill to temporary files
+        self.index_fill_factor = index_fill_factor
+        self.sort_buffer_rows = sort_buffer_rows
+
+        # Write-ahead log of heap page changes, in segment files next to the
+        # data file. A fuzzy checkpoint every `checkpoint_interval` bytes of
+        # log, with a background writer flushing the oldest dirty heap
+        # pages, bounds both the log kept on disk and what recovery replays
+        self.wal = WALog(str(db_path) + "-wal", segment_size=wal_segment_size)
+        self.pager.before_write = self._write_ahead
+        self.checkpoint_interval = checkpoint_interval
+        self._checkpoint_lsn = self.wal.end
+        self._txn: Optional[str] = None  # running operation's WAL transaction
+        self._journaled: Dict[int, Page] = {}  # heap pages it is changing
+        self._imaged: Set[int] = set()  # pages with a full image since last written
+        self._page_lsns: Dict[int, int] = {}  # dirty heap page -> its page LSN
+        self._rec_lsns: Dict[int, int] = {}  # dirty heap page -> LSN that dirtied it
+        # Heap pages added to tables since the last catalog save, as
+        # (table file ID, page): logged, and listed in checkpoints
+        self._extended: List[Tuple[int, int]] = []
+        # Held by data-changing operations, catalog saves, checkpoints, page
+        # flushes (which log journaled changes first) and the background
+        # page writer, which runs between them
+        self._latch = threading.RLock()
+        self._page_writer: Optional[threading.Thread] = None
+        self._page_writer_stop = threading.Event()
+
+        # MVCC readers: the snapshot of this thread's snapshot() block, how
+        # many blocks are open, and whether VACUUM or TRUNCATE (which move or
+        # free rows) holds new ones off. Table name -> the last transaction
+        # that wrote it
+        self._local = threading.local()
+        self._readers = threading.Condition()
+        self._reading = 0
+        self._vacuuming = False
+        self._last_writer: Dict[str, int] = {}
+        # Visibility map, so covering index scans can skip the heap: per
+        # table, the pages holding deleted versions (persisted with the
+        # catalog, cleared by VACUUM), and per page the newest transaction
+        # that added a version to it (since opening)
+        self.dead_pages: Dict[str, Set[int]] = {}
+        self._page_xmin: Dict[int, int] = {}
+
+        # System catalog in reserved metadata pages
+        self.metadata = MetadataStore(self.pager, self._allocate_page)
+        document = self.metadata.load()
+        if document is None:
+            self.save_catalog()
+        else:
+            self._load_catalog(document)
 
     # ------------------------------------------------------------------
-    # INTERNAL: PAGE RANGE RESOLUTION
+    # SYSTEM CATALOG PERSISTENCE
     # ------------------------------------------------------------------
 
-    def _table_page_range(self, table_name: str) -> tuple[int, int]:
+    def _catalog_document(self) -> Dict[str, Any]:
+        return {
+            "next_page": self.next_file_id,
+            "free_pages": self.free_pages.to_list(),
+            "tables": [table.to_dict() for table in self.catalog.tables.values()],
+            "indexes": list(self.indexes.definitions()),
+            "zone_maps": {
+                name: zone_map.descriptor()
+                for name, zone_map in self.zone_maps.items()
+                if zone_map is not None
+            },
+            "dead_pages": {name: sorted(pages) for name, pages in self.dead_pages.items()},
+            # Heap extent growth logged from here on is not in this document
+            "wal_lsn": self.wal.end,
+        }
+
+    def save_catalog(self) -> None:
         """
-        Return (start_page, end_page) for a table.
-        end_page is exclusive.
+        Atomically persist tables, extents, counts, sequences and indexes.
+
+        All dirty pages are written first (each heap page after the log up
+        to its page LSN), so the next checkpoint no longer redoes them.
         """
-        table_name = table_name.upper()
+        with self._latch:
+            # Index pages are only marked dirty; they must reach the file
+            # before a catalog that points at them is committed as clean
+            self.pager.flush_all()
+            self.metadata.save(self._catalog_document)
+            self._extended.clear()
+
+    def flush(self) -> None:
+        """
+        Write every dirty cached page to the file, between data-changing
+        operations: a heap page's journaled writes are logged on the way.
+        """
+        with self._latch:
+            self.pager.flush_all()
+
+    def _load_catalog(self, document: Dict[str, Any]) -> None:
+        """
+        Rebuild in-memory metadata from the persisted catalog. No data page
+        is read (unless the last shutdown was unclean, see below) and index
+        trees are only built when first used.
+        """
+        self.next_file_id = document["next_page"]
+        self.free_pages = FreePageList(document["free_pages"])
+        for data in document["tables"]:
+            table = Table.from_dict(data)
+            self.catalog.register_table(table)
+            self.table_files[table.name] = table.file_id
+            self.dead_pages[table.name] = set(document.get("dead_pages", {}).get(table.name, ()))
+            zone_map = document.get("zone_maps", {}).get(table.name)
+            if self.metadata.clean and zone_map is not None:
+                self.zone_maps[table.name] = self._new_zone_map(
+                    table, root_page=zone_map["root"], extents=zone_map["extents"]
+                )
+            else:
+                # Like index pages, a zone map may lag the heap after a crash
+                self.zone_maps[table.name] = None
+                self._release_extents(zone_map["extents"] if zone_map else [])
+        for index in document["indexes"]:
+            self.indexes.register(
+                index["table"],
+                tuple(index["columns"]),
+                unique=index["unique"],
+                lazy=True,
+                name=index["name"],
+                primary=index["primary"],
+                method=index.get("using", "btree"),
+                include=index.get("include", ()),
+            )
+            if self.metadata.clean and "root" in index:
+                # Opening reads at most a hash directory; nodes load on demand
+                table_name, columns = self.indexes.names[index["name"]]
+                self.indexes.indexes[table_name][columns] = self._new_index_tree(
+                    table_name, columns, root_page=index["root"], extents=index["extents"]
+                )
+            else:
+                # Index pages may not match the heap after a crash: release
+                # them and rebuild the index from the heap on first use
+                self._release_extents(index.get("extents", []))
+
+        if not self.metadata.clean:
+            self._recover(document.get("wal_lsn", 0))
+            # Rows were written after the last catalog save, so the saved
+            # counts, sequences and dead pages may lag (extents were brought
+            # up to date from the log by recovery); recount the live row
+            # versions and resume sequences after their reserved blocks
+            for table in self.catalog.tables.values():
+                table.sequence = table.sequence_reserved
+                table.row_count = 0
+                self.dead_pages[table.name] = set()
+                for page_num in table.pages():
+                    for _, _, xmax, _ in RowPage(self.pager.get_page(page_num)).versions():
+                        if xmax:
+                            self.dead_pages[table.name].add(page_num)
+                        else:
+                            table.row_count += 1
+            self.save_catalog()
+            self.checkpoint()
+
+    # ------------------------------------------------------------------
+    # WRITE-AHEAD LOGGING AND RECOVERY
+    # ------------------------------------------------------------------
+
+    # Records that change a heap page: a full image of the page as it was
+    # before its first change since it was last written, a byte range
+    # change (with the bytes it replaced), and a compensation record
+    # written when recovery undoes a change
+    PAGE_RECORDS = ("IMAGE", "WRITE", "UNDO")
+
+    @contextmanager
+    def _statement(self):
+        """
+        Run a data-changing operation as one write-ahead log transaction.
+
+        Writes to heap pages handed out by _journal() are logged, and the
+        operation returns once its COMMIT is on disk (group-committed with
+        any concurrent ones); the pages themselves are written later.
+        An operation that fails part-way keeps its changes, as before; only
+        one cut short by a crash is rolled back, by recovery.
+        """
+        if self._txn is not None:
+            yield
+            return
+        with self._latch:
+            self._txn = str(self.wal.end)
+            try:
+                yield
+            finally:
+                for page_num, page in self._journaled.items():
+                    if page.journal:
+                        self._log_page(page_num, page)
+                    page.journal = None
+                self._journaled.clear()
+                # Readers see the statement as running until its COMMIT is durable
+                if self.wal.end > int(self._txn):
+                    self.wal.commit(self._txn)
+                self._txn = None
+                if self.wal.end - self._checkpoint_lsn > self.checkpoint_interval:
+                    self.checkpoint()
+
+    def _journal(self, page_num: int) -> Page:
+        """Heap page `page_num`, about to change: its writes are logged."""
+        page = self.pager.get_page(page_num)
+        if page.journal is None:
+            page.journal = []
+            self._journaled[page_num] = page
+        self.pager.mark_dirty(page_num)
+        return page
+
+    def _log_page(self, page_num: int, page: Page) -> None:
+        """
+        Log the journaled writes of a heap page and stamp its page LSN.
+        Overlapping and adjacent writes are merged, so rewriting a header
+        field many times, or a length prefix and the row after it, costs
+        one record.
+        """
+        journal, page.journal = page.journal, []
+        if not journal:
+            return
+        # The page as it was before the journaled writes
+        image = bytearray(page.data)
+        for offset, before, _ in reversed(journal):
+            image[offset : offset + len(before)] = before
+        spans = []
+        for offset, before, _ in sorted(journal):
+            end = offset + len(before)
+            if spans and offset <= spans[-1][1]:
+                spans[-1][1] = max(spans[-1][1], end)
+            else:
+                spans.append([offset, end])
+        changes = [
+            (start, bytes(image[start:end]), bytes(page.data[start:end]))
+            for start, end in spans
+            if image[start:end] != page.data[start:end]
+        ]
+        if not changes:
+            return
+        if page_num not in self._imaged:
+            lsn = self.wal.log(self._txn, "IMAGE", None, {"page": page_num, "image": bytes(image)})
+            self._imaged.add(page_num)
+            self._rec_lsns.setdefault(page_num, lsn)
+        for offset, before, after in changes:
+            lsn = self.wal.log(
+                self._txn, "WRITE", None,
+                {"page": page_num, "offset": offset, "before": before, "after": after},
+            )
+            self._rec_lsns.setdefault(page_num, lsn)
+        RowPage.set_page_lsn(page, lsn)
+        self._page_lsns[page_num] = lsn
+
+    def _write_ahead(self, page_num: int, page: Page) -> None:
+        """Pager hook: force the log up to a heap page's LSN before the page is written."""
+        if page.journal:
+            self._log_page(page_num, page)
+        lsn = self._page_lsns.pop(page_num, None)
+        if lsn is not None:
+            self.wal.flush(lsn)
+        # Its next change starts a new full image: the write may tear
+        self._imaged.discard(page_num)
+        self._rec_lsns.pop(page_num, None)
+
+    # Dirty page table entries in a CHECKPOINT record: (page, recLSN), and
+    # heap pages added since the last catalog save: (table file ID, page)
+    DIRTY_PAGE = struct.Struct(">IQ")
+    EXTENDED_PAGE = struct.Struct(">II")
+    # The background page writer writes this many of the pages dirty the
+    # longest, then sleeps this long (seconds)
+    PAGE_WRITER_BATCH = 32
+    PAGE_WRITER_INTERVAL = 0.05
+
+    def checkpoint(self) -> int:
+        """
+        Take a fuzzy checkpoint; returns the LSN of its record.
+
+        No page is written: the CHECKPOINT record lists the dirty heap
+        pages, each with the LSN of the change that dirtied it (its
+        recLSN), the operation running, if any, and the heap pages added to
+        tables since the catalog was last saved. Recovery redoes from the
+        oldest recLSN and undoes back to where that operation began, so
+        the log segments before both are recycled. The background page
+        writer keeps moving the pages dirty the longest to disk, which keeps
+        that point, and with it the log on disk and the time recovery
+        takes, bounded under a steady write load.
+        """
+        with self._latch:
+            # Pages written since the last checkpoint must be durable before
+            # it stops listing them
+            self.file_manager.sync()
+            redo = min(self._rec_lsns.values(), default=self.wal.end)
+            undo = redo if self._txn is None else min(redo, int(self._txn))
+            lsn = self.wal.checkpoint({
+                "redo": redo,
+                "undo": undo,
+                "dirty": b"".join(
+                    self.DIRTY_PAGE.pack(page_num, rec_lsn)
+                    for page_num, rec_lsn in self._rec_lsns.items()
+                ),
+                "active": self._txn,
+                "extended": b"".join(
+                    self.EXTENDED_PAGE.pack(file_id, page_num)
+                    for file_id, page_num in self._extended
+                ),
+            })
+            self._checkpoint_lsn = lsn
+            self.wal.truncate(undo)
+            if self._rec_lsns and self._page_writer is None:
+                self._page_writer = threading.Thread(
+                    target=self._write_dirty_pages, name="page-writer", daemon=True
+                )
+                self._page_writer.start()
+        return lsn
+
+    def _write_dirty_pages(self) -> None:
+        """Background page writer: between operations, write the oldest dirty heap pages."""
+        while not self._page_writer_stop.wait(self.PAGE_WRITER_INTERVAL):
+            with self._latch:
+                oldest = heapq.nsmallest(
+                    self.PAGE_WRITER_BATCH, self._rec_lsns, key=self._rec_lsns.get
+                )
+                try:
+                    for page_num in oldest:
+                        self.pager.flush_page(page_num)
+                except EngineError:
+                    return
+
+    def _recover(self, catalog_lsn: int) -> None:
+        """
+        ARIES-style restart after an unclean shutdown, before anything
+        reads the heap.
+
+        Analysis rebuilds the dirty page table: the one in the last
+        checkpoint record, plus every page changed after it. Redo repeats
+        history from the oldest recLSN in it: a page change is applied
+        again unless the page was clean at that point or its page LSN shows
+        it already has the change. Full page images are always restored,
+        which also repairs a page torn by a crash in the middle of writing
+        it (a page's first change after it was written is logged as one).
+        A page freed by DROP TABLE or TRUNCATE (a FREE record) may have
+        been reused since, so no change logged before its last FREE is
+        redone. A page added to a table is logged (an EXTEND record, and
+        listed by the next checkpoint) instead of saving the catalog, so
+        analysis also adds the pages added since the catalog at
+        `catalog_lsn` to its extents and takes them off the free list.
+
+        Undo then rolls back the operations that never logged COMMIT,
+        newest change first. Each undone change is logged as an UNDO record
+        naming the next change still to undo, so a crash during recovery
+        neither repeats nor loses undo work; a fully undone operation gets
+        an END record.
+        """
+        checkpoint = self.wal.last_checkpoint()
+        # Heap pages added since the catalog save, and where EXTEND records
+        # not covered by the catalog or the checkpoint start
+        extended, extended_after = [], catalog_lsn
+        if checkpoint is None:
+            redo = undo = after = self.wal.start
+            dirty = {}
+        else:
+            redo, undo = checkpoint["data"]["redo"], checkpoint["data"]["undo"]
+            after = checkpoint["lsn"]
+            dirty = dict(self.DIRTY_PAGE.iter_unpack(checkpoint["data"]["dirty"]))
+            if after >= catalog_lsn:
+                extended = list(self.EXTENDED_PAGE.iter_unpack(checkpoint["data"]["extended"]))
+                extended_after = after + 1
+        records = list(self.wal.records(min(redo, undo)))
+        finished = {r["txn_id"] for r in records if r["action"] in ("COMMIT", "END")}
+        freed = {}  # page -> LSN of the last FREE record covering it
+        for record in records:
+            if record["lsn"] > after and record["action"] in self.PAGE_RECORDS:
+                dirty.setdefault(record["data"]["page"], record["lsn"])
+            elif record["action"] == "FREE":
+                start, length = record["data"]["page"], record["data"]["length"]
+                for page_num in range(start, start + length):
+                    freed[page_num] = record["lsn"]
+            elif record["action"] == "EXTEND" and record["lsn"] >= extended_after:
+                extended.append((record["data"]["table"], record["data"]["page"]))
+
+        tables = {table.file_id: table for table in self.catalog.tables.values()}
+        for file_id, page_num in extended:
+            tables[file_id].add_page(page_num)
+            if page_num >= self.next_file_id:
+                self.free_pages.release(self.next_file_id, page_num - self.next_file_id)
+                self.next_file_id = page_num + 1
+            else:
+                self.free_pages.take(page_num)
+
+        for record in records:
+            if record["action"] not in self.PAGE_RECORDS:
+                continue
+            data = record["data"]
+            if record["lsn"] < dirty.get(data["page"], record["lsn"] + 1):
+                continue
+            if record["lsn"] < freed.get(data["page"], 0):
+                continue  # an earlier life of a freed page
+            page = self.pager.get_page(data["page"])
+            if record["action"] == "IMAGE":
+                page.write(0, data["image"])
+            elif RowPage.page_lsn(page) >= record["lsn"]:
+                continue
+            else:
+                page.write(data["offset"], data["after"])
+            RowPage.set_page_lsn(page, record["lsn"])
+            self.pager.mark_dirty(data["page"])
+
+        # (change, LSN of the same operation's change before it, 0 if none)
+        pending = []
+        losers = {}
+        for record in records:
+            if record["txn_id"] not in finished and record["action"] in ("WRITE", "UNDO"):
+                losers.setdefault(record["txn_id"], []).append(record)
+        for changes in losers.values():
+            writes = [r for r in changes if r["action"] == "WRITE"]
+            if changes[-1]["action"] == "UNDO":
+                writes = [r for r in writes if r["lsn"] <= changes[-1]["data"]["next"]]
+            previous = 0
+            for write in writes:
+                pending.append((write, previous))
+                previous = write["lsn"]
+
+        for write, previous in sorted(pending, key=lambda p: p[0]["lsn"], reverse=True):
+            txn, data = write["txn_id"], write["data"]
+            page_num = data["page"]
+            page = self.pager.get_page(page_num)
+            if page_num not in self._imaged:
+                lsn = self.wal.log(txn, "IMAGE", None, {"page": page_num, "image": bytes(page.data)})
+                self._imaged.add(page_num)
+                self._rec_lsns.setdefault(page_num, lsn)
+            lsn = self.wal.log(
+                txn, "UNDO", None,
+                {"page": page_num, "offset": data["offset"], "after": data["before"], "next": previous},
+            )
+            page.write(data["offset"], data["before"])
+            RowPage.set_page_lsn(page, lsn)
+            self._page_lsns[page_num] = lsn
+            self._rec_lsns.setdefault(page_num, lsn)
+            self.pager.mark_dirty(page_num)
+        for txn in losers:
+            self.wal.log(txn, "END", None, None)
+        self.wal.flush()
+
+    # AUTO_INCREMENT values are reserved in blocks: the catalog records the
+    # end of the block, so a crash can skip values but never reuse one
+    SEQUENCE_CACHE = 32
+
+    def _next_sequence_value(self, table: Table) -> int:
+        self._advance_sequence(table, table.sequence + 1)
+        return table.sequence
+
+    def _advance_sequence(self, table: Table, value: int) -> None:
+        if value <= table.sequence:
+            return
+        table.sequence = value
+        if value > table.sequence_reserved:
+            table.sequence_reserved = value + self.SEQUENCE_CACHE
+            self.save_catalog()
+
+    def _mark_modified(self) -> None:
+        """Flag the catalog as stale before the first data write after a save."""
+        self.metadata.mark_unclean()
+
+    # ------------------------------------------------------------------
+    # MULTI-VERSION CONCURRENCY CONTROL
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def snapshot(self):
+        """
+        Read against one MVCC snapshot: every scan and row fetch made on
+        this thread inside the block sees the statements committed when it
+        began, and nothing of one running then or started since. Readers
+        take no lock a writer waits for; only VACUUM, which moves rows,
+        waits for open blocks to end and holds new ones off. Nested blocks
+        share the outer snapshot.
+        """
+        current = getattr(self._local, "snapshot", None)
+        if current is not None:
+            yield current
+            return
+        with self._readers:
+            while self._vacuuming:
+                self._readers.wait()
+            self._reading += 1
+        try:
+            # The log end first: a statement starting after it gets a
+            # transaction ID at or past the horizon
+            horizon = self.wal.end
+            txn = self._txn
+            self._local.snapshot = Snapshot(horizon, None if txn is None else int(txn))
+            yield self._local.snapshot
+        finally:
+            self._local.snapshot = None
+            with self._readers:
+                self._reading -= 1
+                self._readers.notify_all()
+
+    @contextmanager
+    def _without_readers(self, operation: str):
+        """
+        Run an operation that moves or frees rows (VACUUM, TRUNCATE, DROP
+        TABLE): wait for open snapshot() blocks to end and hold new ones
+        off meanwhile.
+        Entered before the operation's _statement(): readers may need the
+        statement latch (to flush pages) before their blocks end.
+        """
+        if getattr(self._local, "snapshot", None) is not None:
+            raise EngineError(f"{operation} cannot run inside a snapshot")
+        with self._readers:
+            self._vacuuming = True
+            while self._reading:
+                self._readers.wait()
+        try:
+            yield
+        finally:
+            with self._readers:
+                self._vacuuming = False
+                self._readers.notify_all()
+
+    @staticmethod
+    def _live(xmin: int, xmax: int) -> bool:
+        """Version filter of constraint checks: every row not deleted, committed or not."""
+        return not xmax
+
+    @staticmethod
+    def _any_version(xmin: int, xmax: int) -> bool:
+        """Version filter of index and zone map builds: every version a snapshot may read."""
+        return True
+
+    def _row_live(self, table_name: str, rid) -> bool:
+        """True when the row version at row ID `rid` has not been deleted."""
+        version = RowPage.read_version(self.pager.get_page(rid[0]), rid[1])
+        return version is not None and not version[1]
+
+    def _read_page(self, page_num: int) -> RowPage:
+        """
+        A private copy of a heap page for readers: writers change cached
+        pages in place, and parsing one into a RowPage writes its header.
+        """
+        page = Page(self.pager.page_size)
+        page.data[:] = self.pager.get_page(page_num).data
+        return RowPage(page)
+
+    # ------------------------------------------------------------------
+    # INTERNAL: PAGE RESOLUTION AND ALLOCATION
+    # ------------------------------------------------------------------
 
+    def _table_pages(self, table_name: str) -> List[int]:
+        """Page ids belonging to a table, in scan order."""
+        table_name = table_name.upper()
         if table_name not in self.table_files:
             raise EngineError(f"Table {table_name} does not exist")
+        return self.catalog.get_table(table_name).pages()
 
-        start = self.table_files[table_name]
+    def _allocate_page(self) -> int:
+        """
+        Hand out a zeroed page id: a free page if there is one, otherwise a
+        new page at the end of the file.
+        """
+        page_num = self.free_pages.allocate()
+        if page_num is None:
+            page_num = self.next_file_id
+            self.next_file_id += 1
+        self.pager.get_page(page_num).clear()
+        return page_num
+
+    def _allocate_heap_page(self) -> int:
+        """
+        Allocate a page for a table's rows. Its zeroed contents are logged
+        as a full page image, so recovery rebuilds it empty whatever the
+        page held before.
+        """
+        page_num = self._allocate_page()
+        page = self.pager.get_page(page_num)
+        lsn = self.wal.log(self._txn, "IMAGE", None, {"page": page_num, "image": bytes(page.data)})
+        self._imaged.add(page_num)
+        self._rec_lsns.setdefault(page_num, lsn)
+        RowPage.set_page_lsn(page, lsn)
+        self._page_lsns[page_num] = lsn
+        self.pager.mark_dirty(page_num)
+        return page_num
+
+    def _free_page(self, page_num: int) -> None:
+        self.free_pages.release(page_num)
+
+    def _new_index_tree(self, table_name=None, columns=(), root_page=None, extents=None):
+        """
+        Page-backed B+ tree (or hash index) for a row-ID index on `columns`,
+        empty unless `root_page` / `extents` locate an existing one. A B+
+        tree over a single INT column keeps its keys unboxed.
+        """
+        method = IndexManager.method(columns)
+        options = {}
+        if (table_name, columns) in self.indexes.include:
+            options["covering"] = True
+        if method == "btree" and len(columns) == 1:
+            column = next(
+                c for c in self.catalog.get_table(table_name).columns
+                if c.name.lower() == columns[0]
+            )
+            options["int_keys"] = column.dtype is int
+        return self.INDEX_TYPES[method](
+            self.pager, self._allocate_page, self._free_page,
+            root_page=root_page, extents=extents, **options,
+        )
+
+    def _new_zone_map(self, table: Table, root_page=None, extents=None) -> ZoneMap:
+        return ZoneMap(
+            self.pager, self._allocate_page, self._free_page, table.columns,
+            root_page=root_page, extents=extents,
+        )
+
+    def _zone_map(self, table_name: str) -> ZoneMap:
+        """
+        The table's zone map, rebuilt from the heap if it has none. A
+        rebuild allocates pages, so it holds the statement latch even when
+        a reader triggers it.
+        """
+        zone_map = self.zone_maps.get(table_name)
+        if zone_map is not None:
+            return zone_map
+        with self._latch:
+            # Another thread may have rebuilt it while this one waited
+            zone_map = self.zone_maps.get(table_name)
+            if zone_map is None:
+                zone_map = self._new_zone_map(self.catalog.get_table(table_name))
+                zone_map.bulk_load(
+                    (page_num, values)
+                    for page_num, _, _, _, values in self._locate_rows(
+                        table_name, visible=self._any_version
+                    )
+                )
+                self.zone_maps[table_name] = zone_map
+            return zone_map
 
-        # Find the next table start, if any
-        starts = sorted(self.table_files.values())
-        idx = starts.index(start)
+    def _release_extents(self, extents) -> None:
+        """Return page extents to the free list (not persisted here)."""
+        for start, length in extents:
+            self.free_pages.release(start, length)
 
-        if idx + 1 < len(starts):
-            end = starts[idx + 1]
-        else:
-            end = self.next_file_id
+    def _release_heap_extents(self, extents) -> None:
+        """
+        Return a table's page extents to the free list, logging a FREE
+        record for each: recovery must not redo the changes logged for the
+        pages so far onto whatever reuses them.
+        """
+        for start, length in extents:
+            if length:
+                self.wal.log(self._txn, "FREE", None, {"page": start, "length": length})
+        self._release_extents(extents)
 
-        return start, end
+    # ------------------------------------------------------------------
+    # PARALLEL SCAN WORKERS
+    # ------------------------------------------------------------------
+
+    def worker_pool(self) -> ProcessPoolExecutor:
+        """Process pool used by parallel scans, created on first use."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.parallel_workers)
+        return self._pool
+
+    def close(self) -> None:
+        """Flush cached pages, persist the catalog and stop any scan workers."""
+        if self._page_writer is not None:
+            self._page_writer_stop.set()
+            self._page_writer.join()
+            self._page_writer = None
+            self._page_writer_stop.clear()
+        self.flush()
+        self.save_catalog()
+        self.checkpoint()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
 
     # ------------------------------------------------------------------
     # TABLE OPERATIONS
     # ------------------------------------------------------------------
 
+    @logged
     def create_table(self, table_name: str, columns):
         table_name = table_name.upper()
         if table_name in self.catalog.tables:
@@ -89,10 +789,15 @@ class Engine:
 
         table_columns = []
         for col in columns:
+            references, on_delete = None, "RESTRICT"
             if hasattr(col, "dtype"):  # ColumnDef
                 name = col.name
                 sql_type = col.dtype.name.upper()
                 constraints = [c.kind for c in col.constraints] if hasattr(col, 'constraints') else []
+                for constraint in getattr(col, "constraints", []):
+                    if constraint.kind == "FOREIGN_KEY":
+                        references = [constraint.ref_table.upper(), constraint.ref_column.lower()]
+                        on_delete = constraint.on_delete or "RESTRICT"
             else:
                 name, sql_type = col
                 sql_type = sql_type.upper()
@@ -104,7 +809,8 @@ class Engine:
             # Parse constraint flags
             primary_key = "PRIMARY_KEY" in constraints
             auto_increment = "AUTO_INCREMENT" in constraints
-            nullable = "NOT_NULL" not in constraints  # Default is nullable unless NOT_NULL specified
+            # Default is nullable unless NOT_NULL specified; a PRIMARY KEY is never NULL
+            nullable = "NOT_NULL" not in constraints and not primary_key
 
             table_columns.append(
                 Column(
@@ -113,28 +819,364 @@ class Engine:
                     nullable=nullable,
                     primary_key=primary_key,
                     auto_increment=auto_increment,
-                    constraints=constraints
+                    constraints=constraints,
+                    references=references,
+                    on_delete=on_delete,
                 )
             )
 
-        file_id = self.next_file_id
-        self.next_file_id += 1
-        self.table_files[table_name] = file_id
+        for column in table_columns:
+            if column.references is not None:
+                self._check_reference_target(table_name, table_columns, column)
 
         table = Table(name=table_name, columns=table_columns)
+        file_id = self._allocate_heap_page()
         table.file_id = file_id
+        table.add_page(file_id)
         self.catalog.register_table(table)
+        self.table_files[table_name] = file_id
+        self.zone_maps[table_name] = self._new_zone_map(table)
+        self.dead_pages[table_name] = set()
+
+        # PRIMARY KEY columns get a unique row-ID index, used both for the
+        # uniqueness check and for point UPDATE / DELETE
+        key_columns = tuple(c.name.lower() for c in table_columns if c.primary_key)
+        if key_columns:
+            self.indexes.register(table_name, key_columns, primary=True)
+        for column in table_columns:
+            if "UNIQUE" in column.constraints and (column.name.lower(),) != key_columns:
+                self.indexes.register(table_name, (column.name.lower(),), unique=True)
+        # FOREIGN KEY columns get a row-ID index too, so deleting a referenced
+        # row finds the rows pointing at it by probing instead of scanning
+        for column in table_columns:
+            name = column.name.lower()
+            if column.references is not None and (name,) not in self.indexes.indexes.get(table_name, {}):
+                self.indexes.register(table_name, (name,))
+
+        self.pager.flush_page(file_id)
+        self.save_catalog()
+
+    def drop_table(self, table_name: str) -> None:
+        """
+        Remove a table and return all of its pages to the free list. The
+        pages may be reused at once, so like VACUUM it waits for open
+        snapshots.
+        """
+        table_name = table_name.upper()
+        with self._without_readers("DROP TABLE"), self._statement():
+            table = self.catalog.get_table(table_name)
+            for child_name, child_column, _, _ in self._referencing(table_name):
+                if child_name != table_name:
+                    raise EngineError(
+                        f"Table {table_name} is referenced by a FOREIGN KEY of "
+                        f"{child_name}({child_column.upper()}) and cannot be dropped"
+                    )
+            self.catalog.drop_table(table_name)
+            self.table_files.pop(table_name, None)
+            self.indexes.drop_table(table_name)
+            self.dead_pages.pop(table_name, None)
+            zone_map = self.zone_maps.pop(table_name, None)
+            if zone_map is not None:
+                zone_map.destroy()
+            self._release_heap_extents(table.extents)
+            self.save_catalog()
+
+    def drop_all_tables(self) -> List[str]:
+        """
+        Drop every table, each after the tables whose FOREIGN KEYs point at
+        it. Returns the table names in the order they were dropped.
+        """
+        dropped = []
+        remaining = list(self.catalog.tables)
+        while remaining:
+            # References only point at tables that existed first, so some
+            # remaining table is always referenced by dropped ones alone
+            table_name = next(
+                (
+                    name for name in remaining
+                    if all(
+                        child in (name, *dropped)
+                        for child, _, _, _ in self._referencing(name)
+                    )
+                ),
+                remaining[0],
+            )
+            self.drop_table(table_name)
+            dropped.append(table_name)
+            remaining.remove(table_name)
+        return dropped
+
+    def truncate_table(self, table_name: str) -> List[Dict]:
+        """
+        Remove every row without visiting them: the table keeps its first
+        page (emptied) and every other extent goes to the free list. Not
+        versioned: it waits for open snapshots like VACUUM.
+        """
+        table_name = table_name.upper()
+        with self._without_readers("TRUNCATE"), self._statement():
+            table = self.catalog.get_table(table_name)
+            for child_name, child_column, _, _ in self._referencing(table_name):
+                if child_name != table_name and self.catalog.get_table(child_name).row_count:
+                    raise ConstraintViolationError(
+                        f"Cannot truncate {table_name}: rows of {child_name} reference it "
+                        f"through {child_name}({child_column.upper()})"
+                    )
+            (first_page, first_length), *rest = table.extents
+            removed = table.row_count
+
+            self._release_heap_extents([[first_page + 1, first_length - 1], *rest])
+            table.extents = []
+            table.page_count = 0
+            table.add_page(first_page)
+            self._last_writer[table_name] = int(self._txn)
+            table.row_count = 0
+            table.sequence = table.sequence_reserved = 0
+
+            self._journal(first_page).clear()
+            self.indexes.clear_table(table_name)
+            zone_map = self.zone_maps.get(table_name)
+            if zone_map is not None:
+                zone_map.destroy()
+            self.zone_maps[table_name] = self._new_zone_map(table)
+            self.dead_pages[table_name] = set()
+            self.save_catalog()
+            return [{"truncated": table_name, "rows": removed}]
+
+    # ------------------------------------------------------------------
+    # INDEX DDL
+    # ------------------------------------------------------------------
+
+    def create_index(
+        self,
+        index_name: str,
+        table_name: str,
+        columns: List[str],
+        unique: bool = False,
+        using: str = "btree",
+        include: List[str] = (),
+    ) -> None:
+        """
+        Build a row-ID index over the table's heap and register it in the
+        catalog. From then on insert/update/delete keep it in sync.
+        `using` is "btree", "hash" (equality lookups only) or "bloom"
+        (per-page filters that let equality scans skip pages); `include`
+        names extra columns stored in the leaves (a covering index).
+        """
+        table_name = table_name.upper()
+        table = self.catalog.get_table(table_name)
+        known = {c.name.lower() for c in table.columns}
+        columns = tuple(c.split(".")[-1].lower() for c in columns)
+        include = tuple(c.split(".")[-1].lower() for c in include)
+        for column in columns + include:
+            if column not in known:
+                raise EngineError(f"Column {column} does not exist in table {table_name}")
+
+        # Register first so name / column clashes fail before any work
+        self.indexes.register(
+            table_name, columns, unique=unique, name=index_name.lower(), lazy=True,
+            method=using.lower(), include=include,
+        )
+        _, columns = self.indexes.names[index_name.lower()]
+        try:
+            tree = self._build_index(table_name, columns, unique=unique)
+        except Exception:
+            self.indexes.unregister(index_name.lower())
+            raise
+        self.indexes.indexes[table_name][columns] = tree
+        self.save_catalog()
+
+    def drop_index(self, index_name: str) -> None:
+        index_name = index_name.lower()
+        owner = self.indexes.names.get(index_name)
+        if owner is None:
+            raise EngineError(f"Index {index_name} does not exist")
+        if owner in self.indexes.primary:
+            raise EngineError(
+                f"Index {index_name} enforces the PRIMARY KEY of {owner[0]} and cannot be dropped"
+            )
+        table_name, columns = owner
+        for child_name, child_column, parent_name, parent_column, _ in self._foreign_keys():
+            if IndexManager.method(columns) != "bloom" and (table_name, tuple(columns)) in (
+                (child_name, (child_column,)), (parent_name, (parent_column,))
+            ):
+                raise EngineError(
+                    f"Index {index_name} is used by the FOREIGN KEY on "
+                    f"{child_name}({child_column.upper()}) and cannot be dropped"
+                )
+        self.indexes.unregister(index_name)
+        self.save_catalog()
+
+    # ------------------------------------------------------------------
+    # FOREIGN KEYS
+    # ------------------------------------------------------------------
+
+    def _check_reference_target(self, table_name: str, columns: List[Column], column: Column) -> None:
+        """
+        Raise unless `column` (of the table being created, `columns`)
+        REFERENCES an existing PRIMARY KEY or UNIQUE column of the same type.
+        """
+        parent_name, parent_column = column.references
+        if parent_name == table_name:
+            parent_columns = columns
+            key_columns = tuple(c.name.lower() for c in columns if c.primary_key)
+            unique = {key_columns} | {
+                (c.name.lower(),) for c in columns if "UNIQUE" in c.constraints
+            }
+        else:
+            parent_columns = self.catalog.get_table(parent_name).columns
+            unique = {
+                tuple(owner[1]) for owner in self.indexes.unique if owner[0] == parent_name
+            }
+        target = next((c for c in parent_columns if c.name.lower() == parent_column), None)
+        if target is None:
+            raise EngineError(f"Column {parent_column} does not exist in table {parent_name}")
+        if (parent_column,) not in unique:
+            raise EngineError(
+                f"FOREIGN KEY {column.name} must reference a PRIMARY KEY or UNIQUE "
+                f"column, not {parent_name}({parent_column.upper()})"
+            )
+        if target.dtype is not column.dtype:
+            raise EngineError(
+                f"FOREIGN KEY {column.name} and {parent_name}({parent_column.upper()}) "
+                f"have different types"
+            )
 
-        page = self.pager.get_page(file_id)
-        page.clear()
+    def _foreign_keys(self):
+        """(child table, child column, parent table, parent column, on_delete) of every FOREIGN KEY."""
+        for table in self.catalog.tables.values():
+            for column in table.columns:
+                if column.references is not None:
+                    parent_name, parent_column = column.references
+                    yield table.name, column.name.lower(), parent_name, parent_column, column.on_delete
+
+    def _referencing(self, table_name: str) -> List[tuple]:
+        """FOREIGN KEYs pointing at a table, as (child table, child column, parent column, on_delete)."""
+        return [
+            (child_name, child_column, parent_column, on_delete)
+            for child_name, child_column, parent_name, parent_column, on_delete in self._foreign_keys()
+            if parent_name == table_name
+        ]
+
+    def _key_index(self, table_name: str, column: str):
+        """The unique index on `column` that a FOREIGN KEY probes."""
+        for owner in self.indexes.unique:
+            if owner[0] == table_name and tuple(owner[1]) == (column,):
+                return self.indexes.get(*owner)
+        raise EngineError(f"No PRIMARY KEY or UNIQUE index on {table_name}({column.upper()})")
+
+    def _check_references(self, table: Table, rows: List[Dict[str, Any]]) -> None:
+        """
+        Raise unless every non-NULL FOREIGN KEY value of `rows` (about to be
+        stored in `table`) exists in the referenced table. Each distinct
+        value is looked up once, in key order, in the referenced column's
+        unique index; rows may reference other rows of the same batch.
+        """
+        for column in table.columns:
+            if column.references is None:
+                continue
+            parent_name, parent_column = column.references
+            name = column.name.lower()
+            keys = {row[name] for row in rows if row[name] is not None}
+            if parent_name == table.name:
+                keys -= {row[parent_column] for row in rows}
+            if not keys:
+                continue
+            tree = self._key_index(parent_name, parent_column)
+            for key in sorted(keys):
+                if not any(self._row_live(parent_name, entry[:2]) for entry in tree.search((key,))):
+                    raise ConstraintViolationError(
+                        f"FOREIGN KEY violation: value '{key}' in column '{column.name.upper()}' "
+                        f"has no match in {parent_name}({parent_column.upper()})"
+                    )
+
+    def _referencing_rows(self, child_name: str, child_column: str, key):
+        """(row ID, values) of the live rows of `child_name` whose `child_column` is `key`."""
+        rids = self.indexes.lookup(child_name, child_column, key)
+        if rids is None:  # no index on the column: scan
+            position = [
+                c.name.lower() for c in self.catalog.get_table(child_name).columns
+            ].index(child_column)
+            return [
+                ((page_num, offset), values)
+                for page_num, _, _, offset, values in self._locate_rows(
+                    child_name, visible=self._live
+                )
+                if values[position] == key
+            ]
+        return [
+            ((page_num, offset), values)
+            for page_num, _, _, offset, values in self._locate_rows(
+                child_name, rids, visible=self._live
+            )
+        ]
+
+    def _collect_cascade(self, victims: Dict[str, Dict[tuple, list]]) -> None:
+        """
+        Extend `victims` ({table: {row ID: values}} of rows about to be
+        deleted) with every row that ON DELETE CASCADE removes with them,
+        raising if a RESTRICT foreign key still references one. Nothing is
+        deleted here, so a violation leaves every table untouched.
+        """
+        pending = [(name, list(rows.values())) for name, rows in victims.items()]
+        while pending:
+            parent_name, rows = pending.pop()
+            names = [c.name.lower() for c in self.catalog.get_table(parent_name).columns]
+            for child_name, child_column, parent_column, on_delete in self._referencing(parent_name):
+                position = names.index(parent_column)
+                doomed = victims.setdefault(child_name, {})
+                added = []
+                for key in sorted({values[position] for values in rows} - {None}):
+                    for rid, values in self._referencing_rows(child_name, child_column, key):
+                        if rid in doomed:
+                            continue
+                        if on_delete != "CASCADE":
+                            raise ConstraintViolationError(
+                                f"FOREIGN KEY violation: {parent_name} row with "
+                                f"{parent_column.upper()} = '{key}' is still referenced "
+                                f"from {child_name}({child_column.upper()})"
+                            )
+                        doomed[rid] = values
+                        added.append(values)
+                if added:
+                    pending.append((child_name, added))
 
     # ------------------------------------------------------------------
     # INSERT
     # ------------------------------------------------------------------
 
+    @logged
     def insert_row(self, table_name: str, values: List[Any]):
         table_name = table_name.upper()
         table = self.catalog.get_table(table_name)
+        coerced, row_dict = self._prepare_row(table, values)
+
+        # Enforce PRIMARY KEY uniqueness and FOREIGN KEYs (index probes, no scan)
+        self.indexes.check_unique(table_name, row_dict)
+        self._check_references(table, [row_dict])
+        self._store_row(table, coerced, row_dict)
+        table.row_count += 1
+
+    @logged
+    def insert_rows(self, table_name: str, rows: List[List[Any]]) -> int:
+        """
+        Insert several rows as one batch (a multi-row VALUES list). Every
+        row is validated before the first is stored, and each distinct
+        FOREIGN KEY value is probed once, in key order, however many rows
+        carry it.
+        """
+        table_name = table_name.upper()
+        table = self.catalog.get_table(table_name)
+        prepared = [self._prepare_row(table, values) for values in rows]
+        row_dicts = [row_dict for _, row_dict in prepared]
+        self.indexes.check_unique_batch(table_name, row_dicts)
+        self._check_references(table, row_dicts)
+        for coerced, row_dict in prepared:
+            self._store_row(table, coerced, row_dict)
+            table.row_count += 1
+        return len(prepared)
+
+    def _prepare_row(self, table: Table, values: List[Any]):
+        """Coerced values and lowercase-named row dict of a row to insert."""
         schema = table.schema
 
         if len(values) != len(schema.columns):
@@ -143,9 +1185,9 @@ class Engine:
             )
 
         coerced = []
-        for value, column in zip(values, schema.columns):
+        for value, column in zip(values, table.columns):
             if value is None:
-                if not column.nullable:
+                if not column.nullable and not column.auto_increment:
                     raise EngineError(f"Column '{column.name}' cannot be null (NOT NULL constraint)")
                 coerced.append(None)
             else:
@@ -156,171 +1198,565 @@ class Engine:
                         f"Invalid value '{value}' for column '{column.name}'"
                     )
 
-        if all(v is None for v in coerced):
-            raise EngineError("Cannot insert a row with all NULL values")
-
-        # Enforce PRIMARY KEY uniqueness
+        # AUTO_INCREMENT: NULL takes the next sequence value; explicit
+        # values move the sequence past them
         for idx, column in enumerate(table.columns):
-            if column.primary_key and coerced[idx] is not None:
-                # Check if this value already exists
-                for existing_row in self.scan_table(table_name):
-                    if existing_row.get(column.name.lower()) == coerced[idx]:
-                        raise EngineError(f"PRIMARY KEY violation: duplicate value '{coerced[idx]}' in column '{column.name}'")
+            if not column.auto_increment:
+                continue
+            if coerced[idx] is None:
+                coerced[idx] = self._next_sequence_value(table)
+            elif isinstance(coerced[idx], int):
+                self._advance_sequence(table, coerced[idx])
 
-        record_bytes = Record.from_values(schema, coerced)
+        if all(v is None for v in coerced):
+            raise EngineError("Cannot insert a row with all NULL values")
 
-        start, end = self._table_page_range(table_name)
+        row_dict = {
+            name.lower(): value
+            for name, value in zip(schema.column_names(), coerced)
+        }
+        return coerced, row_dict
 
-        # Try existing pages first
-        for page_num in range(start, end):
-            page = self.pager.get_page(page_num)
-            row_page = RowPage(page)
-            if row_page.add_row(record_bytes):
-                self.pager.flush_page(page_num)
+    def _store_row(self, table: Table, coerced: List[Any], row_dict: Dict[str, Any]) -> None:
+        """
+        Place a new version of a validated row in the heap, created by the
+        running statement, and add it to indexes and zone map. The caller
+        counts the row (an UPDATE's new version replaces one).
+        """
+        table_name = table.name
+        xid = int(self._txn)
+        record_bytes = RowPage.VERSION.pack(xid, 0) + Record.from_values(table.schema, coerced)
+        self._mark_modified()
+        self._last_writer[table_name] = xid
+
+        # Try existing pages first, newest first: that is where free space
+        # usually is, so appends don't re-read every full page
+        for page_num in reversed(table.pages()):
+            row_page = RowPage(self.pager.get_page(page_num))
+            if row_page.can_fit(record_bytes):
+                self._journal(page_num)
+                self._page_xmin[page_num] = xid
+                row_page.add_row(record_bytes)
+                self.indexes.insert_entry(
+                    table_name, row_dict, (page_num, row_page.offsets[-1])
+                )
+                self._zone_map(table_name).add(page_num, coerced)
                 return
 
         # Need a new page
-        page_num = self.next_file_id
-        self.next_file_id += 1
+        row_page = RowPage(Page(self.pager.page_size))
+        if not row_page.can_fit(record_bytes):
+            raise EngineError("Row too large to fit in page")
 
-        page = self.pager.get_page(page_num)
-        page.clear()
-        row_page = RowPage(page)
+        # The extent change is logged before any row is placed on the page,
+        # so recovery adds the page back to a catalog saved before it
+        page_num = self._allocate_heap_page()
+        table.add_page(page_num)
+        self.wal.log(self._txn, "EXTEND", table_name, {"table": table.file_id, "page": page_num})
+        self._extended.append((table.file_id, page_num))
 
-        if not row_page.add_row(record_bytes):
-            raise EngineError("Row too large to fit in page")
+        row_page = RowPage(self._journal(page_num))
+        self._page_xmin[page_num] = xid
+        row_page.add_row(record_bytes)
 
-        self.pager.flush_page(page_num)
+        self.indexes.insert_entry(table_name, row_dict, (page_num, row_page.offsets[-1]))
+        self._zone_map(table_name).add(page_num, coerced)
 
     # ------------------------------------------------------------------
     # SCAN
     # ------------------------------------------------------------------
 
-    def scan_table(self, table_name: str) -> Generator[Dict, Any, None]:
+    def scan_table(self, table_name: str, page_nums=None) -> Generator[Dict, Any, None]:
+        """
+        Rows of every page of the table, or of `page_nums` only, as this
+        thread's snapshot sees them (a snapshot of its own otherwise).
+        """
         table_name = table_name.upper()
         table = self.catalog.get_table(table_name)
         schema = table.schema
         record = Record(schema)
 
-        start, end = self._table_page_range(table_name)
-
-        for page_num in range(start, end):
-            page = self.pager.get_page(page_num)
-            row_page = RowPage(page)
-
-            for raw in row_page.get_rows():
-                values = record.decode(raw)
-                yield {
-                    name.lower(): value
-                    for name, value in zip(schema.column_names(), values)
-                }
+        with self.snapshot() as snapshot:
+            for page_num in table.pages() if page_nums is None else page_nums:
+                for _, xmin, xmax, raw in self._read_page(page_num).versions():
+                    if not snapshot.visible(xmin, xmax):
+                        continue
+                    values = record.decode(raw)
+                    yield {
+                        name.lower(): value
+                        for name, value in zip(schema.column_names(), values)
+                    }
 
     def get_rows(self, table_name: str) -> List[Dict]:
         return list(self.scan_table(table_name))
 
+    # ------------------------------------------------------------------
+    # ROW LOCATION (SCAN OR INDEX)
+    # ------------------------------------------------------------------
+
+    def _index_candidates(self, table_name: str, conditions) -> Optional[List[tuple]]:
+        """
+        Turn WHERE conditions into candidate row IDs using an index.
+
+        `conditions` is a list of (column, op, value) tuples that are ANDed.
+        A composite B+ tree index is used for equalities on any leading
+        prefix of its columns plus a range on the next one, as a single
+        bounded range walk (see IndexManager.match). Returns None when no
+        index applies, in which case the caller falls back to a full scan.
+        """
+        if not conditions:
+            return None
+        table = self.catalog.get_table(table_name)
+        match = self.indexes.match(table_name, self._resolve_conditions(table, conditions))
+        if match is None:
+            return None
+        columns, bounds = match
+        tree = self.indexes.get(table_name, columns)
+        if "key" in bounds:
+            return [entry[:2] for entry in tree.search(bounds["key"])]
+
+        exact = (
+            bounds.get("lo") == bounds.get("hi")
+            and len(bounds["lo"]) == len(columns)
+        )
+        # A range matching most of the table is cheaper to scan
+        limit = None if exact else max(table.row_count // 2, 1)
+        rids = []
+        for _, entry in tree.range(**bounds):
+            rids.append(entry[:2])
+            if limit is not None and len(rids) > limit:
+                return None
+        return rids
+
+    def _candidate_pages(self, table_name: str, conditions) -> List[int]:
+        """
+        Pages of a table that can hold rows matching the ANDed WHERE
+        `conditions`, in scan order: every page, minus those the zone map
+        rules out for a comparison and those a Bloom filter index rules out
+        for an equality.
+        """
+        table = self.catalog.get_table(table_name)
+        page_nums = table.pages()
+        resolved = self._resolve_conditions(table, conditions)
+        if not resolved:
+            return page_nums
+        zone_map = self._zone_map(table.name)
+        page_nums = [p for p in page_nums if zone_map.might_match(p, resolved)]
+        for bloom, key in self.indexes.pruning_filters(table.name, resolved):
+            page_nums = [p for p in page_nums if bloom.might_contain(p, key)]
+        return page_nums
+
+    @staticmethod
+    def _resolve_conditions(table: Table, conditions) -> List[tuple]:
+        """
+        (column, op, value) conditions an index could answer, with column
+        names lowercased and values coerced to the column type.
+        """
+        resolved = []
+        for column_name, op, value in conditions or []:
+            if op not in IndexManager.RANGE_OPS:
+                continue
+            column_name = column_name.split(".")[-1].lower()
+            column = next(
+                (c for c in table.columns if c.name.lower() == column_name), None
+            )
+            if column is None or value is None:
+                continue
+            try:
+                resolved.append((column_name, op, column.dtype(value)))
+            except (TypeError, ValueError):
+                continue
+        return resolved
+
+    def fetch_row(self, table_name: str, rid) -> Optional[Dict]:
+        """The row at row ID (page_num, offset) if this thread's snapshot sees it, or None."""
+        table = self.catalog.get_table(table_name)
+        page_num, offset = rid
+        with self.snapshot() as snapshot:
+            version = RowPage.read_version(self.pager.get_page(page_num), offset)
+        if version is None or not snapshot.visible(version[0], version[1]):
+            return None
+        values = Record(table.schema).decode(version[2])
+        return {
+            name.lower(): value
+            for name, value in zip(table.schema.column_names(), values)
+        }
+
+    def row_visible(self, table_name: str, rid) -> bool:
+        """
+        True when this thread's snapshot sees the row version at `rid`. The
+        heap is only read when the visibility map cannot tell: the page
+        holds deleted versions, or versions added by a statement the
+        snapshot does not see.
+        """
+        page_num, offset = rid
+        with self.snapshot() as snapshot:
+            if page_num not in self.dead_pages.get(table_name, ()) and snapshot.committed(
+                self._page_xmin.get(page_num, 0)
+            ):
+                return True
+            version = RowPage.read_version(self.pager.get_page(page_num), offset)
+        return version is not None and snapshot.visible(version[0], version[1])
+
+    def _locate_rows(self, table_name: str, rids=None, page_nums=None, visible=None):
+        """
+        Yield (page_num, row_page, slot, offset, values) for row versions.
+
+        Without `rids` every page of the table (or of `page_nums`) is
+        visited. With `rids`, a collection of (page_num, offset) row IDs,
+        only their pages are read.
+
+        By default these are the rows a data-changing statement acts on:
+        live versions, minus those the statement itself created, so an
+        UPDATE never revisits the rows it writes. Given `visible(xmin,
+        xmax)`, the versions it accepts are read from private copies of
+        the pages instead, for callers that only look.
+        """
+        record = Record(self.catalog.get_table(table_name).schema)
+        xid = None if visible is not None or self._txn is None else int(self._txn)
+
+        if rids is None:
+            wanted = None
+            if page_nums is None:
+                page_nums = self._table_pages(table_name)
+        else:
+            wanted = {}
+            for page_num, offset in rids:
+                wanted.setdefault(page_num, set()).add(offset)
+            page_nums = sorted(wanted)
+
+        for page_num in page_nums:
+            if visible is None:
+                row_page = RowPage(self.pager.get_page(page_num))
+            else:
+                row_page = self._read_page(page_num)
+            for slot, offset in enumerate(row_page.offsets):
+                if wanted is not None and offset not in wanted[page_num]:
+                    continue
+                raw = row_page.row_at(offset)
+                if raw is None:  # tombstone
+                    continue
+                xmin, xmax = RowPage.VERSION.unpack_from(raw)
+                if visible is None:
+                    if xmax or xmin == xid:
+                        continue
+                elif not visible(xmin, xmax):
+                    continue
+                yield page_num, row_page, slot, offset, record.decode(raw[RowPage.VERSION.size :])
+
     # ------------------------------------------------------------------
     # UPDATE
     # ------------------------------------------------------------------
 
+    @logged
     def update_rows(
         self,
         table_name: str,
         set_values: Dict[str, Any],
         where_fn=None,
+        conditions=None,
     ) -> List[Dict]:
+        """
+        Update matching rows. Each gets a new version, appended like an
+        insert; the old one is marked deleted by this statement and stays
+        for snapshots that still see it until VACUUM.
+
+        `where_fn` decides which rows match. `conditions`, the same predicate
+        as (column, op, value) tuples, lets an index narrow the rows that
+        where_fn is evaluated on.
+        """
         table_name = table_name.upper()
         table = self.catalog.get_table(table_name)
         schema = table.schema
-        record = Record(schema)
         schema_names = schema.column_names()
+        xid = int(self._txn)
 
-        start, end = self._table_page_range(table_name)
+        rids = self._index_candidates(table_name, conditions)
+        pages = self._candidate_pages(table_name, conditions) if rids is None else None
 
         updated = 0
+        foreign_keys = self._referencing(table_name) or any(
+            c.references is not None for c in table.columns
+        )
+
+        for page_num, row_page, idx, offset, row_values in self._locate_rows(
+            table_name, rids, pages
+        ):
+            row_dict = {
+                name.lower(): value
+                for name, value in zip(schema_names, row_values)
+            }
+
+            if where_fn and not where_fn(row_dict):
+                continue
+
+            new_values = list(row_values)
+            for col, val in set_values.items():
+                col_u = col.upper()
+                if col_u not in schema_names:
+                    raise EngineError(f"Column {col} does not exist")
+                idx_col = schema_names.index(col_u)
+                new_values[idx_col] = schema.columns[idx_col].dtype(val)
+
+            new_dict = {
+                name.lower(): value
+                for name, value in zip(schema_names, new_values)
+            }
+            rid = (page_num, offset)
+            self.indexes.check_unique(table_name, new_dict, rid)
+            if foreign_keys:
+                self._check_update_references(table, row_dict, new_dict)
+
+            # The new version first: if it cannot be stored, the old one
+            # stays live
+            self._store_row(table, new_values, new_dict)
+            self._journal(page_num)
+            self.dead_pages[table_name].add(page_num)
+            row_page.set_xmax(offset, xid)
+            updated += 1
 
-        for page_num in range(start, end):
-            page = self.pager.get_page(page_num)
-            row_page = RowPage(page)
-
-            for idx, offset in enumerate(row_page.offsets):
-                length = int.from_bytes(page.read(offset, 2), "big")
-                if length == 0:
-                    continue
+        return [{"updated": updated}]
 
-                row_bytes = page.read(offset + 2, length)
-                row_values = record.decode(row_bytes)
+    def _check_update_references(self, table: Table, old_row: Dict[str, Any], new_row: Dict[str, Any]) -> None:
+        """
+        Raise if an update of `old_row` to `new_row` breaks a FOREIGN KEY: a
+        changed foreign key value must exist in the referenced table, and a
+        referenced key cannot change while rows still point at it.
+        """
+        changed = [
+            c for c in table.columns
+            if c.references is not None and old_row[c.name.lower()] != new_row[c.name.lower()]
+        ]
+        if changed:
+            self._check_references(table, [new_row])
+        for child_name, child_column, parent_column, _ in self._referencing(table.name):
+            key = old_row[parent_column]
+            if key is None or key == new_row[parent_column]:
+                continue
+            if self._referencing_rows(child_name, child_column, key):
+                raise ConstraintViolationError(
+                    f"FOREIGN KEY violation: {table.name} row with {parent_column.upper()} "
+                    f"= '{key}' is still referenced from {child_name}({child_column.upper()})"
+                )
 
-                row_dict = {
-                    name.lower(): value
-                    for name, value in zip(schema_names, row_values)
-                }
+    # ------------------------------------------------------------------
+    # DELETE
+    # ------------------------------------------------------------------
 
-                if where_fn and not where_fn(row_dict):
-                    continue
+    @logged
+    def delete_rows(self, table_name: str, where_fn=None, conditions=None) -> List[Dict]:
+        """
+        Delete matching rows. `where_fn` / `conditions` as for update_rows.
 
-                new_values = list(row_values)
-                for col, val in set_values.items():
-                    col_u = col.upper()
-                    if col_u not in schema_names:
-                        raise EngineError(f"Column {col} does not exist")
-                    idx_col = schema_names.index(col_u)
-                    new_values[idx_col] = schema.columns[idx_col].dtype(val)
+        When FOREIGN KEYs reference the table, the matching rows are
+        collected first: rows referencing them are found through the index
+        on each foreign key column, a RESTRICT reference aborts the delete
+        before anything changes, and ON DELETE CASCADE rows are deleted too.
+        """
+        table_name = table_name.upper()
+        table = self.catalog.get_table(table_name)
+        schema_names = [name.lower() for name in table.schema.column_names()]
+
+        rids = self._index_candidates(table_name, conditions)
+        pages = self._candidate_pages(table_name, conditions) if rids is None else None
+
+        matching = (
+            located
+            for located in self._locate_rows(table_name, rids, pages)
+            if where_fn is None or where_fn(dict(zip(schema_names, located[4])))
+        )
+        if not self._referencing(table_name):
+            return [{"deleted": self._delete_located(table_name, matching)}]
+
+        victims = {table_name: {(page_num, offset): values for page_num, _, _, offset, values in matching}}
+        deleted = len(victims[table_name])
+        self._collect_cascade(victims)
+        for name, rows in victims.items():
+            if rows:
+                self._delete_located(name, self._locate_rows(name, list(rows)))
+        # Rows removed by ON DELETE CASCADE are not counted
+        return [{"deleted": deleted}]
 
-                new_bytes = record.encode(new_values)
-                if len(new_bytes) != length:
-                    raise EngineError(
-                        "In-place update failed: row size change not supported"
-                    )
+    def _delete_located(self, table_name: str, located) -> int:
+        """
+        Delete the rows yielded by `located` (as from _locate_rows): mark
+        their versions deleted by the running statement. Index entries and
+        zone map ranges stay until VACUUM removes the versions.
+        """
+        table = self.catalog.get_table(table_name)
+        xid = int(self._txn)
 
-                row_page.update_row(idx, new_bytes)
-                updated += 1
+        deleted = 0
 
-            self.pager.flush_page(page_num)
+        for page_num, row_page, idx, offset, row_values in located:
+            self._mark_modified()
+            self._last_writer[table_name] = xid
+            self._journal(page_num)
+            self.dead_pages[table_name].add(page_num)
+            row_page.set_xmax(offset, xid)
+            deleted += 1
 
-        return [{"updated": updated}]
+        table.row_count -= deleted
+        return deleted
 
     # ------------------------------------------------------------------
-    # DELETE
+    # VACUUM
     # ------------------------------------------------------------------
 
-    def delete_rows(self, table_name: str, where_fn=None) -> List[Dict]:
+    def vacuum(self, table_name: str) -> List[Dict]:
+        """
+        Garbage-collect old row versions: compact the pages the visibility
+        map lists as holding deleted versions, dropping those versions and
+        tombstones, and recompute the table's row count from what is on
+        disk. Index entries of the dropped versions are deleted (trees
+        rebalance as they shrink) and those of rows the compaction moved
+        are moved with them; only Bloom filters, which cannot forget a key,
+        and the zone map are rebuilt.
+
+        Compaction moves rows, so VACUUM waits for open snapshot() blocks
+        to end (no snapshot can then still see a dead version) and holds
+        new ones off until it is done.
+        """
         table_name = table_name.upper()
         table = self.catalog.get_table(table_name)
-        schema = table.schema
-        record = Record(schema)
-        schema_names = schema.column_names()
-
-        start, end = self._table_page_range(table_name)
 
-        deleted = 0
-
-        for page_num in range(start, end):
-            page = self.pager.get_page(page_num)
-            row_page = RowPage(page)
-
-            for idx, offset in enumerate(row_page.offsets):
-                # Read length (negative = already deleted)
-                raw_len = page.read(offset, 2)
-                length = int.from_bytes(raw_len, "big", signed=False)
-                signed_length = int.from_bytes(raw_len, "big", signed=True)
-                
-                if signed_length < 0:  # Already deleted
+        def keep(raw):
+            return not RowPage.VERSION.unpack_from(raw)[1]
+
+        with self._without_readers("VACUUM"), self._statement():
+            self._mark_modified()
+            self._last_writer[table_name] = int(self._txn)
+            record = Record(table.schema)
+            schema_names = [name.lower() for name in table.schema.column_names()]
+            live = 0
+            for page_num in table.pages():
+                versions = list(RowPage(self.pager.get_page(page_num)).versions())
+                live += sum(1 for _, _, xmax, _ in versions if not xmax)
+                if page_num not in self.dead_pages[table_name]:
                     continue
+                # Where the kept rows land, from compacting a private copy;
+                # index entries change before the page does, so a lazy index
+                # built meanwhile still matches the heap
+                compacted = self._read_page(page_num)
+                compacted.compact(keep=keep)
+                new_offsets = iter(compacted.offsets)
+                moved = []
+                for offset, _, xmax, raw in versions:
+                    row = dict(zip(schema_names, record.decode(raw)))
+                    if xmax:
+                        self.indexes.delete_entry(table_name, row, (page_num, offset))
+                    else:
+                        moved.append((row, offset, next(new_offsets)))
+                # Rows only move down the page, so in page order a moved
+                # entry never lands on a row ID still to be moved
+                for row, offset, new_offset in moved:
+                    if new_offset != offset:
+                        self.indexes.update_entry(
+                            table_name, row, row, (page_num, offset), (page_num, new_offset)
+                        )
+                RowPage(self._journal(page_num)).compact(keep=keep)
+
+            table.row_count = live
+            self.dead_pages[table_name] = set()
+            self.indexes.rebuild_table(table_name, methods=("bloom",))
+            # Updates and deletes only ever widened the zone map; start from
+            # exact ranges
+            zone_map = self.zone_maps.get(table_name)
+            if zone_map is not None:
+                zone_map.destroy()
+                self.zone_maps[table_name] = None
+            self._zone_map(table_name)
+            self.save_catalog()
+        return [{"vacuumed": table_name, "rows": live, "pages": table.page_count}]
+
+    def _load_index(self, table_name: str, columns) -> PagedBPlusTree:
+        """
+        IndexManager loader: build a lazy index on first use. The build
+        allocates pages, so it holds the statement latch even when a
+        reader's lookup triggers it.
+        """
+        with self._latch:
+            # Another thread may have built it while this one waited
+            tree = self.indexes.indexes.get(table_name, {}).get(columns)
+            return tree if tree is not None else self._build_index(table_name, columns)
 
-                row_bytes = page.read(offset + 2, length)
-                row_values = record.decode(row_bytes)
-
-                row_dict = {
-                    name.lower(): value
-                    for name, value in zip(schema_names, row_values)
-                }
-
-                if where_fn and not where_fn(row_dict):
-                    continue
+    def _build_index(self, table_name: str, columns, unique: bool = False) -> PagedBPlusTree:
+        """
+        Build a row-ID index over the heap (CREATE INDEX, VACUUM of a Bloom
+        filter, and lazy load after reopen). With `unique`, duplicate keys are rejected.
+
+        The (key, row ID) pairs are sorted (externally, past
+        `sort_buffer_rows`) and the tree is bulk-loaded bottom-up with nodes
+        `index_fill_factor` full, instead of descending once per row. A hash
+        index takes the sorted pairs one by one; a Bloom filter index needs
+        no order and reads them straight from the heap.
+        """
+        schema_names = [
+            name.lower()
+            for name in self.catalog.get_table(table_name).schema.column_names()
+        ]
+
+        def entries():
+            # Every version: snapshots older than the build still read them
+            for page_num, _, _, offset, values in self._locate_rows(
+                table_name, visible=self._any_version
+            ):
+                row = dict(zip(schema_names, values))
+                key = self.indexes.index_key(columns, row)
+                if key is not None:
+                    yield key, self.indexes.entry_value(
+                        table_name, columns, row, (page_num, offset)
+                    )
 
-                row_page.delete_row(idx)
-                deleted += 1
+        def check_unique(pairs):
+            # Sorted input puts duplicates next to each other; only live
+            # versions count
+            previous = None
+            for key, rid in pairs:
+                if self._row_live(table_name, rid[:2]):
+                    if key == previous:
+                        shown = key[0] if len(key) == 1 else key
+                        raise ConstraintViolationError(
+                            f"Cannot create UNIQUE index: duplicate value '{shown}' in column "
+                            f"'{', '.join(c.upper() for c in columns)}'"
+                        )
+                    previous = key
+                yield key, rid
+
+        if IndexManager.method(columns) == "bloom":
+            pairs = entries()
+        else:
+            pairs = external_sort(entries(), buffer_size=self.sort_buffer_rows)
+        if unique:
+            pairs = check_unique(pairs)
+        tree = self._new_index_tree(table_name, columns)
+        try:
+            tree.bulk_load(pairs, fill_factor=self.index_fill_factor)
+        except Exception:
+            tree.destroy()
+            raise
+        return tree
 
-            self.pager.flush_page(page_num)
+    # ------------------------------------------------------------------
+    # STATISTICS
+    # ------------------------------------------------------------------
 
-        return [{"deleted": deleted}]
+    def row_count(self, table_name: str) -> int:
+        """
+        Live row count from catalog metadata (no page access). Inside a
+        snapshot() block that does not see the table's last change yet,
+        the rows it sees are counted instead.
+        """
+        table = self.catalog.get_table(table_name.upper())
+        snapshot = getattr(self._local, "snapshot", None)
+        if snapshot is None or snapshot.committed(self._last_writer.get(table.name, 0)):
+            return table.row_count
+        return sum(1 for _ in self.scan_table(table.name))
+
+    def table_stats(self, table_name: str) -> Dict[str, Any]:
+        table = self.catalog.get_table(table_name.upper())
+        return {
+            "name": table.name,
+            "row_count": table.row_count,
+            "page_count": table.page_count,
+        }
@@ -14,6 +14,14 @@ class TransactionError(EngineError):
     """Raised for transaction-related failures (BEGIN, COMMIT, ROLLBACK)."""
     pass
 
+class LockTimeoutError(TransactionError):
+    """Raised when a lock request waits longer than the lock timeout."""
+    pass
+
+class DeadlockError(TransactionError):
+    """Raised in the transaction chosen to break a lock wait cycle."""
+    pass
+
 class ConstraintViolationError(EngineError):
     """Raised when a table or column constraint is violated."""
     pass
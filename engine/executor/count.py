@@ -0,0 +1,38 @@
+from .base import Executor
+
+
+class CountRows(Executor):
+    """
+    COUNT(*) without GROUP BY.
+
+    With no source the answer comes straight from the catalog's maintained
+    row count, so an unfiltered count never touches a page. With a source
+    (e.g. a Filter) the surviving rows are counted instead.
+    """
+
+    def __init__(self, engine, table_name, column, source: Executor = None):
+        self.engine = engine
+        self.table_name = table_name
+        self.column = column  # the COUNT(*) Column AST, possibly aliased
+        self.source = source
+
+    def _output_name(self):
+        name = self.column.name
+        if " AS " in name:
+            return name.split(" AS ")[1].strip().lower()
+        return name.lower()
+
+    def execute(self):
+        if self.source is None:
+            count = self.engine.row_count(self.table_name)
+        else:
+            count = len(self.source.execute())
+        return [{self._output_name(): count}]
+
+    @staticmethod
+    def is_count_star(columns) -> bool:
+        """True when the select list is exactly one COUNT(*) (optionally aliased)."""
+        if len(columns) != 1:
+            return False
+        expr = columns[0].name.split(" AS ")[0].strip()
+        return expr.upper() == "COUNT(*)"
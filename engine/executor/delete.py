@@ -1,4 +1,5 @@
 from .base import Executor
+from engine.sql.ast import conjuncts
 
 
 class DeleteExecutor(Executor):
@@ -9,30 +10,25 @@ class DeleteExecutor(Executor):
 
     def execute(self):
         where_fn = None
+        conditions = None
         if self.predicate:
             where_fn = self._build_where_fn()
+            # Same predicate in index-matchable form
+            conditions = [
+                (cond.left.name, cond.operator, cond.right.value)
+                for cond in conjuncts(self.predicate)
+            ]
 
         return self.engine.delete_rows(
             self.table_name,
             where_fn=where_fn,
+            conditions=conditions,
         )
 
     def _build_where_fn(self):
-        left = self.predicate.left.name.lower()
-        op = self.predicate.operator
-        literal = self.predicate.right.value
-        # Coerce literal to column dtype when possible (parser may leave numbers as strings)
-        try:
-            table = self.engine.catalog.get_table(self.table_name.upper())
-            schema = table.schema
-            schema_names = schema.column_names()
-            idx_col = schema_names.index(left.upper())
-            dtype = schema.columns[idx_col].dtype
-            literal = dtype(literal)
-        except Exception:
-            pass
-        def where(row):
-            val = row[left]
+        checks = [self._coerce_condition(cond) for cond in conjuncts(self.predicate)]
+
+        def test(val, op, literal):
             if op == "=":
                 return val == literal
             elif op == "<":
@@ -47,4 +43,23 @@ class DeleteExecutor(Executor):
                 return val != literal
             return False
 
+        def where(row):
+            return all(test(row[left], op, literal) for left, op, literal in checks)
+
         return where
+
+    def _coerce_condition(self, cond):
+        left = cond.left.name.lower()
+        op = cond.operator
+        literal = cond.right.value
+        # Coerce literal to column dtype when possible (parser may leave numbers as strings)
+        try:
+            table = self.engine.catalog.get_table(self.table_name.upper())
+            schema = table.schema
+            schema_names = schema.column_names()
+            idx_col = schema_names.index(left.upper())
+            dtype = schema.columns[idx_col].dtype
+            literal = dtype(literal)
+        except Exception:
+            pass
+        return left, op, literal
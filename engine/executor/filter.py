@@ -1,5 +1,5 @@
 from .base import Executor
-from engine.sql.ast import BinaryExpression
+from engine.sql.ast import BinaryExpression, conjuncts
 
 
 class Filter(Executor):
@@ -9,15 +9,19 @@ class Filter(Executor):
 
     def execute(self):
         rows = self.source.execute()
-        col_name = self.predicate.left.name
-        op = self.predicate.operator
-        literal = self.predicate.right.value
+        conditions = [
+            (cond.left.name, cond.operator, cond.right.value)
+            for cond in conjuncts(self.predicate)
+        ]
         result = []
 
         table = self.source.table  # now works
 
         for row in rows:
-            if self._compare(row, col_name, op, literal, table):
+            if all(
+                self._compare(row, col_name, op, literal, table)
+                for col_name, op, literal in conditions
+            ):
                 result.append(row)
 
         return result
@@ -44,18 +48,27 @@ class Filter(Executor):
         literal_value = column_schema.dtype(literal)
         row_value = row[col_name_lc]
 
-        # Perform comparison
-        if op == "=":
-            return row_value == literal_value
-        elif op == "<":
-            return row_value < literal_value
-        elif op == ">":
-            return row_value > literal_value
-        elif op == "<=":
-            return row_value <= literal_value
-        elif op == ">=":
-            return row_value >= literal_value
-        elif op == "!=":
-            return row_value != literal_value
-        else:
-            raise ValueError(f"Unsupported operator: {op}")
+        return compare(row_value, op, literal_value)
+
+
+def compare(row_value, op, literal_value):
+    """Evaluate `row_value <op> literal_value` for a WHERE comparison."""
+    if op == "=":
+        return row_value == literal_value
+    elif op == "<":
+        return row_value < literal_value
+    elif op == ">":
+        return row_value > literal_value
+    elif op == "<=":
+        return row_value <= literal_value
+    elif op == ">=":
+        return row_value >= literal_value
+    elif op == "!=":
+        return row_value != literal_value
+    else:
+        raise ValueError(f"Unsupported operator: {op}")
+
+
+def matches(row, conditions):
+    """True when `row` satisfies every (column, op, literal) condition."""
+    return all(compare(row[col], op, literal) for col, op, literal in conditions)
@@ -13,6 +13,11 @@ class GroupBy(Executor):
         if not rows:
             return rows
 
+        # A scan with GROUP BY pushdown already emits one row per group with
+        # its count; merge those instead of counting them as single rows
+        if getattr(self.source, "partial_aggregates", False):
+            return self._merge_partials(rows)
+
         # Group by specified columns
         groups = defaultdict(list)
         for row in rows:
@@ -43,3 +48,13 @@ class GroupBy(Executor):
             result.append(agg_row)
 
         return result
+
+    def _merge_partials(self, rows):
+        merged = {}
+        for row in rows:
+            key = tuple(str(row.get(col.name.lower())) for col in self.group_by_columns)
+            if key in merged:
+                merged[key]["count(*)"] += row["count(*)"]
+            else:
+                merged[key] = dict(row)
+        return list(merged.values())
@@ -0,0 +1,125 @@
+from .base import Executor
+from .filter import matches
+from .scan import resolve_predicate
+from engine.index.index_manager import IndexManager
+
+
+class IndexScan(Executor):
+    """
+    Rows of a table in the order of a single-column index (ORDER BY col).
+
+    Conditions on the index column become the bounds of the range walk;
+    every condition is still checked per row, against one MVCC snapshot.
+    With `limit`, the walk stops as soon as that many rows qualify, so
+    ORDER BY ... LIMIT n reads about n rows. Rows whose key is NULL are not
+    in the index, so this is only used for NOT NULL columns.
+    """
+
+    def __init__(self, engine, table_name, column, predicate=None, reverse=False, limit=None):
+        self.engine = engine
+        self.table = engine.catalog.get_table(table_name)
+        self.column = column.split(".")[-1].lower()
+        self.predicate = resolve_predicate(self.table, predicate)
+        self.reverse = reverse
+        self.limit = limit
+
+    @staticmethod
+    def usable(engine, table_name, column) -> bool:
+        """True when `column` has an index covering every row of the table."""
+        table = engine.catalog.get_table(table_name)
+        column = column.split(".")[-1].lower()
+        schema_column = next(
+            (c for c in table.columns if c.name.lower() == column), None
+        )
+        return (
+            schema_column is not None
+            and not schema_column.nullable
+            and (table.name, (column,)) in engine.indexes.names.values()
+        )
+
+    def execute(self):
+        tree = self.engine.indexes.get(self.table.name, (self.column,))
+        _, bounds = IndexManager.prefix_bounds((self.column,), self.predicate or ())
+
+        rows = []
+        with self.engine.snapshot():
+            for _, entry in tree.range(reverse=self.reverse, **(bounds or {})):
+                row = self.engine.fetch_row(self.table.name, entry[:2])
+                if row is None:
+                    continue
+                if self.predicate is not None and not matches(row, self.predicate):
+                    continue
+                rows.append(row)
+                if self.limit is not None and len(rows) >= self.limit:
+                    break
+        return rows
+
+
+class IndexOnlyScan(Executor):
+    """
+    Rows answered from a covering B+ tree index without reading the heap.
+
+    Each entry carries its key columns and the index's INCLUDE columns, so
+    rows are rebuilt from the leaves alone, in index order. Equalities on a
+    leading prefix of the key columns, plus a range on the next one, bound
+    the walk; every condition is still checked per entry. Entries outlive
+    the row versions they point at until VACUUM, so each entry's version
+    header is checked against the snapshot (the row itself is not decoded).
+    """
+
+    def __init__(self, engine, table_name, columns, predicate=None, reverse=False, limit=None):
+        self.engine = engine
+        self.table = engine.catalog.get_table(table_name)
+        self.columns = columns
+        self.include = engine.indexes.include.get((self.table.name, columns), ())
+        self.predicate = resolve_predicate(self.table, predicate)
+        self.reverse = reverse
+        self.limit = limit
+
+    @staticmethod
+    def choose(engine, table_name, needed, predicate=None, order_column=None):
+        """
+        Key columns of a B+ tree index holding every column in `needed`,
+        or None. Indexes whose leading columns the predicate bounds come
+        first (the longest equality prefix, then a range); otherwise the
+        whole index is walked, which is only complete when no key column
+        can be NULL (such rows are not indexed).
+        """
+        table = engine.catalog.get_table(table_name)
+        nullable = {c.name.lower() for c in table.columns if c.nullable}
+        conditions = resolve_predicate(table, predicate) or ()
+        best, best_rank = None, None
+        for columns in engine.indexes.indexes.get(table.name, {}):
+            if IndexManager.method(columns) != "btree":
+                continue
+            include = engine.indexes.include.get((table.name, columns), ())
+            if not needed <= set(columns) | set(include):
+                continue
+            matched, _ = IndexManager.prefix_bounds(columns, conditions)
+            if matched is not None:
+                rank = (3, *matched)
+            elif nullable & set(columns):
+                continue
+            else:
+                rank = (2 if order_column == columns[0] else 1,)
+            if best_rank is None or rank > best_rank:
+                best, best_rank = columns, rank
+        return best
+
+    def execute(self):
+        tree = self.engine.indexes.get(self.table.name, self.columns)
+        _, bounds = IndexManager.prefix_bounds(self.columns, self.predicate or ())
+
+        rows = []
+        with self.engine.snapshot():
+            for key, entry in tree.range(reverse=self.reverse, **(bounds or {})):
+                if not self.engine.row_visible(self.table.name, entry[:2]):
+                    continue
+                row = dict(zip(self.columns, key))
+                row.update(zip(self.include, entry[2:]))
+                if self.predicate is not None and not matches(row, self.predicate):
+                    continue
+                rows.append(row)
+                if self.limit is not None and len(rows) >= self.limit:
+                    break
+        return rows
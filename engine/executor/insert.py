@@ -2,11 +2,18 @@ from .base import Executor
 
 
 class InsertExecutor(Executor):
-    def __init__(self, engine, table_name, values):
+    """
+    INSERT executor. A multi-row VALUES list goes to the engine as one batch,
+    so its constraint checks are done once for all rows before any is stored.
+    """
+    def __init__(self, engine, table_name, values, rows=None):
         self.engine = engine
         self.table_name = table_name
-        self.values = [v.value for v in values]
+        self.rows = [[v.value for v in row] for row in rows or [values]]
 
     def execute(self):
-        self.engine.insert_row(self.table_name, self.values)
+        if len(self.rows) == 1:
+            self.engine.insert_row(self.table_name, self.rows[0])
+        else:
+            self.engine.insert_rows(self.table_name, self.rows)
         return []
@@ -1,8 +1,15 @@
 from .base import Executor
+from engine.index.index_manager import HashColumns
 
 class JoinExecutor(Executor):
     """
-    Nested-loop INNER JOIN executor. Read-only.
+    Hash INNER JOIN executor. Read-only.
+
+    The right table is the build side: its rows are grouped by join key in
+    a hash table, which each left row then probes. When the right join
+    column has a hash index, that index already is the build side, so the
+    right table is not read at all and only the matching rows are fetched.
+    NULL keys never match.
     """
     def __init__(self, engine, left_table, right_table, left_column, right_column):
         self.engine = engine
@@ -13,7 +20,15 @@ class JoinExecutor(Executor):
         self.right_column = self._extract_column_name(right_column).lower()
 
         self.left_rows = list(engine.scan_table(self.left_table))
-        self.right_rows = list(engine.scan_table(self.right_table))
+        self.right_index = engine.indexes.get(
+            self.right_table, HashColumns((self.right_column,))
+        )
+        if self.right_index is not None:
+            # Index keys are stored as the column's type
+            self.right_type = next(
+                c.dtype for c in engine.catalog.get_table(self.right_table).columns
+                if c.name.lower() == self.right_column
+            )
 
     def _extract_column_name(self, col_ref):
         """Extract column name from qualified reference (table.column -> column)"""
@@ -21,12 +36,33 @@ class JoinExecutor(Executor):
             return col_ref.split(".")[1]
         return col_ref
 
+    def _build(self):
+        """Right rows grouped by join key, in scan order."""
+        table = {}
+        for rrow in self.engine.scan_table(self.right_table):
+            key = rrow[self.right_column]
+            if key is not None:
+                table.setdefault(key, []).append(rrow)
+        return table
+
+    def _probe_index(self, key):
+        try:
+            key = self.right_type(key)
+        except (TypeError, ValueError):
+            return []
+        rows = (self.engine.fetch_row(self.right_table, rid) for rid in self.right_index.search(key))
+        return [row for row in rows if row is not None]
+
     def execute(self):
+        build = self._build() if self.right_index is None else None
         result = []
         for lrow in self.left_rows:
-            for rrow in self.right_rows:
-                if lrow[self.left_column] == rrow[self.right_column]:
-                    # Preserve left-table columns when keys collide (left wins)
-                    combined = {**rrow, **lrow}
-                    result.append(combined)
+            key = lrow[self.left_column]
+            if key is None:
+                continue
+            matches = build.get(key, []) if build is not None else self._probe_index(key)
+            for rrow in matches:
+                # Preserve left-table columns when keys collide (left wins)
+                combined = {**rrow, **lrow}
+                result.append(combined)
         return result
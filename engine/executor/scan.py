@@ -1,12 +1,188 @@
+import math
 from .base import Executor
+from .filter import matches
+from engine.sql.ast import conjuncts
+from engine.record.record import Record
+from engine.storage.page import Page, RowPage
+
+# Chunks handed out per worker; more than one evens out skewed pages
+CHUNKS_PER_WORKER = 4
+
+
+def _reduce_rows(rows, predicate, group_by):
+    """
+    Filter and optionally partially aggregate decoded rows.
+
+    `predicate` is a tuple of ANDed (column, op, literal) conditions with
+    the literals already coerced to the column types. Without `group_by` the matching rows are returned; with
+    it, {group_key: [group_values, count]} using the same keying as GroupBy.
+    """
+    if predicate is not None:
+        rows = (row for row in rows if matches(row, predicate))
+
+    if group_by is None:
+        return list(rows)
+
+    groups = {}
+    for row in rows:
+        key = tuple(str(row.get(c)) for c in group_by)
+        entry = groups.get(key)
+        if entry is None:
+            groups[key] = [{c: row.get(c) for c in group_by}, 1]
+        else:
+            entry[1] += 1
+    return groups
+
+
+def _scan_chunk(db_path, page_size, page_nums, schema, snapshot, predicate, group_by):
+    """
+    Worker entry point: decode the row versions `snapshot` sees in a chunk
+    of pages read through a private read-only file handle, then filter /
+    partially aggregate them.
+    """
+    record = Record(schema)
+    names = [name.lower() for name in schema.column_names()]
+
+    def rows():
+        with open(db_path, "rb") as f:
+            for page_num in page_nums:
+                f.seek(page_num * page_size)
+                page = Page(page_size)
+                page.write(0, f.read(page_size).ljust(page_size, b"\x00"))
+                for _, xmin, xmax, raw in RowPage(page).versions():
+                    if snapshot.visible(xmin, xmax):
+                        yield dict(zip(names, record.decode(raw)))
+
+    return _reduce_rows(rows(), predicate, group_by)
+
+
+def resolve_predicate(table, predicate):
+    """WHERE predicate -> picklable tuple of (column, op, coerced literal)."""
+    if predicate is None:
+        return None
+    return tuple(_resolve_condition(table, cond) for cond in conjuncts(predicate))
+
+
+def _resolve_condition(table, condition):
+    col_name = condition.left.name
+    if "." in col_name:
+        col_name = col_name.split(".")[1]
+    column_schema = next(
+        (c for c in table.schema.columns if c.name.upper() == col_name.upper()),
+        None,
+    )
+    if column_schema is None:
+        raise ValueError(
+            f"Column {condition.left.name} does not exist in table {table.name}"
+        )
+    literal = column_schema.dtype(condition.right.value)
+    return (col_name.lower(), condition.operator, literal)
 
 
 class TableScan(Executor):
-    def __init__(self, engine, table_name):
+    """
+    Heap scan with optional predicate and GROUP BY pushdown.
+
+    When the engine's degree of parallelism (`engine.parallel_workers`) is
+    above 1 and the table spans at least `engine.parallel_min_pages` pages,
+    the page list is split into chunks that worker processes decode, filter
+    and partially aggregate. Results are merged in page order, so the output
+    is identical to a serial scan.
+
+    A predicate on an indexed column (=, <, <=, >, >=), or on a leading
+    prefix of a composite index's columns, is answered from the index
+    instead, reading only the pages that hold matching row IDs. Otherwise
+    a Bloom filter index on the column of an equality skips the pages whose
+    filter rules the value out.
+
+    Every path reads one MVCC snapshot: the caller's (Engine.snapshot), or
+    one taken for the scan.
+    """
+
+    def __init__(self, engine, table_name, predicate=None, group_by=None):
         self.engine = engine
         self.table_name = table_name
         self.table = self.engine.catalog.get_table(table_name)
+        self.predicate = resolve_predicate(self.table, predicate)
+        self.group_by = (
+            [col.name.lower() for col in group_by] if group_by else None
+        )
+        # Output rows are already aggregated per group (see GroupBy)
+        self.partial_aggregates = self.group_by is not None
 
     def execute(self):
-        # Materialize all rows (M2 is small enough for this)
-        return list(self.engine.scan_table(self.table_name))
+        with self.engine.snapshot() as snapshot:
+            return self._execute(snapshot)
+
+    def _execute(self, snapshot):
+        # An index on the predicate column narrows the scan to the pages
+        # holding candidate rows; rows still come back in heap order
+        rids = (
+            self.engine._index_candidates(self.table.name, list(self.predicate))
+            if self.predicate
+            else None
+        )
+        if rids is not None:
+            names = [name.lower() for name in self.table.schema.column_names()]
+            rows = (
+                dict(zip(names, values))
+                for *_, values in self.engine._locate_rows(
+                    self.table.name, rids, visible=snapshot.visible
+                )
+            )
+            return self._merge([_reduce_rows(rows, self.predicate, self.group_by)])
+
+        # Bloom filter indexes can rule pages out for equalities
+        page_nums = self.engine._candidate_pages(self.table.name, list(self.predicate or ()))
+        workers = self.engine.parallel_workers
+
+        if workers > 1 and len(page_nums) >= self.engine.parallel_min_pages:
+            parts = self._parallel_scan(page_nums, workers, snapshot)
+        else:
+            parts = [
+                _reduce_rows(
+                    self.engine.scan_table(self.table_name, page_nums),
+                    self.predicate,
+                    self.group_by,
+                )
+            ]
+        return self._merge(parts)
+
+    def _parallel_scan(self, page_nums, workers, snapshot):
+        # Workers read the file directly, so cached pages must be on disk
+        self.engine.flush()
+
+        size = math.ceil(len(page_nums) / (workers * CHUNKS_PER_WORKER))
+        chunks = [page_nums[i : i + size] for i in range(0, len(page_nums), size)]
+
+        pool = self.engine.worker_pool()
+        futures = [
+            pool.submit(
+                _scan_chunk,
+                str(self.engine.file_manager.path),
+                self.engine.pager.page_size,
+                chunk,
+                self.table.schema,
+                snapshot,
+                self.predicate,
+                self.group_by,
+            )
+            for chunk in chunks
+        ]
+        return [future.result() for future in futures]
+
+    def _merge(self, parts):
+        if self.group_by is None:
+            rows = []
+            for part in parts:
+                rows.extend(part)
+            return rows
+
+        merged = {}
+        for part in parts:
+            for key, (values, count) in part.items():
+                if key in merged:
+                    merged[key][1] += count
+                else:
+                    merged[key] = [values, count]
+        return [{**values, "count(*)": count} for values, count in merged.values()]
@@ -1,4 +1,5 @@
 from .base import Executor
+from engine.sql.ast import conjuncts
 
 
 class UpdateExecutor(Executor):
@@ -16,33 +17,26 @@ class UpdateExecutor(Executor):
         }
 
         where_fn = None
+        conditions = None
         if self.predicate:
             where_fn = self._build_where_fn()
+            # Same predicate in index-matchable form
+            conditions = [
+                (cond.left.name, cond.operator, cond.right.value)
+                for cond in conjuncts(self.predicate)
+            ]
 
         return self.engine.update_rows(
             self.table_name,
             set_values=set_values,
             where_fn=where_fn,
+            conditions=conditions,
         )
 
     def _build_where_fn(self):
-        left = self.predicate.left.name.lower()
-        op = self.predicate.operator
-        literal = self.predicate.right.value
-        # Coerce literal to column dtype when possible (parser may leave numbers as strings)
-        try:
-            table = self.engine.catalog.get_table(self.table_name.upper())
-            schema = table.schema
-            schema_names = schema.column_names()
-            idx_col = schema_names.index(left.upper())
-            dtype = schema.columns[idx_col].dtype
-            literal = dtype(literal)
-        except Exception:
-            # If coercion fails, fall back to raw literal
-            pass
+        checks = [self._coerce_condition(cond) for cond in conjuncts(self.predicate)]
 
-        def where(row):
-            val = row[left]
+        def test(val, op, literal):
             if op == "=":
                 return val == literal
             elif op == "<":
@@ -57,4 +51,24 @@ class UpdateExecutor(Executor):
                 return val != literal
             return False
 
+        def where(row):
+            return all(test(row[left], op, literal) for left, op, literal in checks)
+
         return where
+
+    def _coerce_condition(self, cond):
+        left = cond.left.name.lower()
+        op = cond.operator
+        literal = cond.right.value
+        # Coerce literal to column dtype when possible (parser may leave numbers as strings)
+        try:
+            table = self.engine.catalog.get_table(self.table_name.upper())
+            schema = table.schema
+            schema_names = schema.column_names()
+            idx_col = schema_names.index(left.upper())
+            dtype = schema.columns[idx_col].dtype
+            literal = dtype(literal)
+        except Exception:
+            # If coercion fails, fall back to raw literal
+            pass
+        return left, op, literal
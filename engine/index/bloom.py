@@ -0,0 +1,120 @@
+# engine/index/bloom.py
+
+import hashlib
+import struct
+from typing import Callable, Dict, List, Optional
+
+from .key_codec import encode_key
+from engine.storage.page_slots import PageSlots
+from engine.storage.pager import Pager
+
+
+def bit_positions(key, bits, hashes) -> List[int]:
+    """
+    The `hashes` bit positions of `key` in a `bits`-bit filter, by double
+    hashing two 32-bit halves of a BLAKE2 digest of the key's encoding
+    (stable between processes, unlike hash()).
+    """
+    digest = hashlib.blake2b(encode_key(key), digest_size=8).digest()
+    h1, h2 = struct.unpack(">II", digest)
+    h2 |= 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+
+class BloomFilterIndex:
+    """
+    Per-page Bloom filters over a table's heap (CREATE INDEX ... USING
+    BLOOM), for `col = literal` scans on columns without a row-ID index.
+
+    Every heap page holding an indexed row gets a BITS-bit filter of the
+    keys on it. A scan asks might_contain(page, key) before decoding a page
+    and skips the pages that answer no; a yes may be a false positive (a
+    few percent for a page of 130 keys), so rows are still checked. Bits
+    cannot be cleared, so deletes and the old key of an update leave them
+    set: stale bits only cost a wasted page read, and VACUUM rebuilds the
+    filters.
+
+    The filters are the slots (kind 5) of a PageSlots chain, whose root
+    page is recorded in the catalog and never moves.
+
+    The interface mirrors the other index types so IndexManager keeps it in
+    sync, except that there is no search(): the index only prunes pages.
+    """
+
+    FILTER = 5
+
+    BITS = 1024
+    HASHES = 4
+
+    def __init__(
+        self,
+        pager: Pager,
+        allocate_page: Callable[[], int],
+        free_page: Callable[[int], None],
+        root_page: Optional[int] = None,
+        extents: Optional[List[List[int]]] = None,
+    ):
+        self.pager = pager
+        self._slots = PageSlots(
+            pager, allocate_page, free_page, self.FILTER, self.BITS // 8,
+            root_page=root_page, extents=extents,
+        )
+
+    @property
+    def root_page(self) -> int:
+        return self._slots.root_page
+
+    @property
+    def extents(self) -> List[List[int]]:
+        return self._slots.extents
+
+    # ------------------------------------------------------------------
+    # PUBLIC API
+    # ------------------------------------------------------------------
+
+    def might_contain(self, heap_page, key) -> bool:
+        """False only if no row on `heap_page` has `key`."""
+        slot = self._slots.get(heap_page)
+        if slot is None:
+            return False  # no indexed row was ever stored there
+        page_num, offset = slot
+        data = self.pager.get_page(page_num).data
+        return all(
+            data[offset + bit // 8] & (1 << (bit % 8))
+            for bit in bit_positions(key, self.BITS, self.HASHES)
+        )
+
+    def insert(self, key, value) -> None:
+        page_num, offset = self._slots.slot(value[0])
+        data = self.pager.get_page(page_num).data
+        for bit in bit_positions(key, self.BITS, self.HASHES):
+            data[offset + bit // 8] |= 1 << (bit % 8)
+        self.pager.mark_dirty(page_num)
+
+    def delete(self, key, value) -> bool:
+        """Bits may be shared with other keys, so nothing is cleared."""
+        return False
+
+    def bulk_load(self, pairs, fill_factor=1.0) -> None:
+        """Fill an empty index from (key, row ID) pairs in any order."""
+        if self._slots:
+            raise ValueError("bulk_load requires an empty index")
+        filters: Dict[int, bytearray] = {}
+        for key, value in pairs:
+            bits = filters.get(value[0])
+            if bits is None:
+                bits = filters[value[0]] = bytearray(self.BITS // 8)
+            for bit in bit_positions(key, self.BITS, self.HASHES):
+                bits[bit // 8] |= 1 << (bit % 8)
+        for heap_page in sorted(filters):
+            page_num, offset = self._slots.slot(heap_page)
+            self.pager.get_page(page_num).write(offset, bytes(filters[heap_page]))
+            self.pager.mark_dirty(page_num)
+
+    def destroy(self) -> None:
+        """Return every page of the index to the allocator."""
+        self._slots.destroy()
+
+    def descriptor(self) -> dict:
+        """Catalog entry locating the index on disk."""
+        return self._slots.descriptor()
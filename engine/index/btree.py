@@ -1,75 +1,805 @@
 # engine/index/btree.py
 
-from .node import Node
 import bisect
+import threading
+import time
+from array import array
+from .node import Node
 
 
 class BPlusTree:
-    def __init__(self, order=4):
-        self.root = Node(is_leaf=True)
+    """
+    B+ Tree with duplicate keys; leaves are chained for range scans.
+
+    Nodes are reached only through a few storage hooks (_child, _next,
+    _new_node, _ref, _dirty, _release, and the sizing hooks _capacity,
+    _entry_size and _used), so the same algorithms run over
+    in-memory Node objects here and over pages in PagedBPlusTree.
+
+    The root node never moves: a root split copies its contents into a new
+    node and turns the root into their parent, so whatever refers to the
+    root (the catalog, for paged trees) stays valid.
+
+    `order` is the fanout: a node splits when it reaches that many keys.
+    With `int_keys=True` every key is a single integer and nodes keep their
+    keys unboxed in an array('q') instead of a list of 1-tuples; keys are
+    still accepted and returned as tuples.
+
+    A tree may be shared between threads: lookups and scans run without
+    latches beside one writer at a time (optimistic lock coupling, see
+    CONCURRENCY).
+    """
+
+    DEFAULT_ORDER = 256
+
+    def __init__(self, order=DEFAULT_ORDER, int_keys=False):
         self.order = order
+        self.int_keys = int_keys
+        self._init_latches()
+        self.root = self._new_node(is_leaf=True)
+
+    def _init_latches(self):
+        # Writers run one at a time; ref -> node of the nodes the current
+        # write has locked (see CONCURRENCY)
+        self._write_latch = threading.Lock()
+        self._locked = {}
+
+    # ------------------------------------------------------------------
+    # STORAGE HOOKS
+    # ------------------------------------------------------------------
+
+    def _child(self, node, i):
+        """The i-th child of an internal node."""
+        return node.children[i]
+
+    def _next(self, leaf):
+        """The leaf after `leaf`, or None."""
+        return leaf.next
+
+    def _ref(self, node):
+        """What parents and leaf links store to point at `node`."""
+        return node
+
+    def _new_node(self, is_leaf):
+        node = Node(is_leaf=is_leaf)
+        node.keys = self._key_list()
+        return node
+
+    def _dirty(self, node):
+        """Called after `node` was modified."""
+
+    def _is_full(self, node):
+        return node.is_full(self.order)
+
+    def _capacity(self, is_leaf):
+        """Room in a node, in the units of _entry_size."""
+        return self.order - 1
+
+    def _entry_size(self, key, value, is_leaf):
+        """Room one (key, value-or-child) entry takes in a node."""
+        return 1
+
+    def _used(self, node):
+        """Room the entries of `node` take, in the units of _entry_size."""
+        return len(node.keys)
+
+    def _is_underfull(self, node):
+        return self._used(node) * 2 < self._capacity(node.is_leaf)
+
+    def _release(self, node):
+        """Called when `node` was merged away and is no longer referenced."""
+
+    # ------------------------------------------------------------------
+    # LOOKUP
+    # ------------------------------------------------------------------
 
     def _normalize_key(self, key):
         """Ensure all keys are tuples for consistent comparison (single or composite)."""
+        if self.int_keys:
+            return key[0] if isinstance(key, tuple) else key
         if not isinstance(key, tuple):
             key = (key,)
         return key
 
+    def _key_list(self, keys=()):
+        """Key container for a node."""
+        return array("q", keys) if self.int_keys else list(keys)
+
     def search(self, key):
         """
-        Search for key in the B+ Tree.
-        Returns a list of matching rows (for composite keys or duplicates) or None.
+        Iterate over the values stored under `key` (duplicates included).
+
+        One descent to the leftmost leaf that can hold `key`, then each leaf's
+        run of matches is found by bisection; the leaf chain is followed only
+        while the run reaches the end of a leaf.
         """
         key = self._normalize_key(key)
-        node = self.root
-        while not node.is_leaf:
-            # Descend to the correct child
-            i = bisect.bisect_right(node.keys, key)
-            node = node.children[i]
+        returned = 0  # values handed out; a restart skips that many
+        while True:
+            leaf = self._descend(key)
+            if leaf is None:
+                continue
+            ref, version, node = leaf
+            skip = returned
+            while True:
+                try:
+                    keys = node.keys
+                    i = bisect.bisect_left(keys, key)
+                    j = bisect.bisect_right(keys, key, i)
+                    values = node.children[i:j]
+                    more = j == len(keys)
+                    next_ref = node.next
+                except Exception:
+                    if self._unchanged(ref, version):
+                        raise
+                    break
+                if self._version(ref) != version:
+                    break
+                if skip:
+                    taken = min(skip, len(values))
+                    values = values[taken:]
+                    skip -= taken
+                for value in values:
+                    returned += 1
+                    yield value
+                if not more or next_ref is None:
+                    return
+                next_version = self._stable_version(next_ref)
+                if next_version is None or self._version(ref) != version:
+                    break
+                node = self._resolve_optimistic(next_ref, next_version)
+                if node is None:
+                    break
+                ref, version = next_ref, next_version
+
+    def range(self, lo=None, hi=None, lo_inclusive=True, hi_inclusive=True, reverse=False):
+        """
+        Yield (key, value) pairs with lo <= key <= hi in key order.
+
+        Either bound may be None (unbounded); the inclusive flags turn a
+        bound into < / >. The tree is descended once, then entries stream
+        along the leaf chain (or, with reverse=True, leaf by leaf from the
+        right, using the stack of the descent).
+        """
+        lo = None if lo is None else self._normalize_key(lo)
+        hi = None if hi is None else self._normalize_key(hi)
+        if reverse:
+            runs = self._runs_reverse(lo, hi, lo_inclusive, hi_inclusive)
+        else:
+            runs = self._runs(lo, lo_inclusive, hi, hi_inclusive)
+        for keys, values in runs:
+            if self.int_keys:
+                keys = [(key,) for key in keys]
+            yield from zip(keys, values)
+
+    def _runs(self, lo, lo_inclusive, hi, hi_inclusive):
+        """
+        Forward scan as one (keys, values) run per leaf.
+
+        Each run is copied out of its leaf and validated (see CONCURRENCY)
+        before it is handed out. After a conflict the scan descends again
+        to the last key it handed out and skips the entries with that key
+        it already returned.
+        """
+        last, ties = None, 0  # last key handed out, entries returned with it
+        while True:
+            if ties:
+                start, inclusive, skip = last, True, ties
+            else:
+                start, inclusive, skip = lo, lo_inclusive, 0
+            leaf = self._descend(start)
+            if leaf is None:
+                continue
+            ref, version, node = leaf
+            first = True
+            while True:
+                try:
+                    keys = node.keys
+                    if not first or start is None:
+                        i = 0
+                    elif inclusive:
+                        i = bisect.bisect_left(keys, start)
+                    else:
+                        i = bisect.bisect_right(keys, start)
+                    if skip:
+                        j = bisect.bisect_right(keys, start, i)
+                        taken = min(skip, j - i)
+                        i += taken
+                        # Entries equal to `start` may go on in the next leaf
+                        skip = skip - taken if j == len(keys) else 0
+                    if hi is None:
+                        k = len(keys)
+                    elif hi_inclusive:
+                        k = bisect.bisect_right(keys, hi)
+                    else:
+                        k = bisect.bisect_left(keys, hi)
+                    k = max(i, k)
+                    run = (keys[i:k], node.children[i:k])
+                    done = k < len(keys)
+                    next_ref = node.next
+                except Exception:
+                    if self._unchanged(ref, version):
+                        raise
+                    break
+                if not self._unchanged(ref, version):
+                    break
+                first = False
+                if run[0]:
+                    key = run[0][-1]
+                    count = len(run[0]) - bisect.bisect_left(run[0], key)
+                    last, ties = key, (ties + count if ties and key == last else count)
+                    yield run
+                if done or next_ref is None:
+                    return
+                next_version = self._stable_version(next_ref)
+                if next_version is None or not self._unchanged(ref, version):
+                    break
+                node = self._resolve_optimistic(next_ref, next_version)
+                if node is None:
+                    break
+                ref, version = next_ref, next_version
+
+    def _runs_reverse(self, lo, hi, lo_inclusive, hi_inclusive):
+        """_runs from `hi` down to `lo`, each run in descending key order."""
+        last, ties = None, 0
+        while True:
+            if ties:
+                start, inclusive, skip = last, True, ties
+            else:
+                start, inclusive, skip = hi, hi_inclusive, 0
+            stack = []
+            leaf = self._descend(start, rightmost=True, path=stack)
+            if leaf is None:
+                continue
+            ref, version, node = leaf
+            first = True
+            while node is not None:
+                try:
+                    keys = node.keys
+                    if not first or start is None:
+                        k = len(keys)
+                    elif inclusive:
+                        k = bisect.bisect_right(keys, start)
+                    else:
+                        k = bisect.bisect_left(keys, start)
+                    if skip:
+                        j = bisect.bisect_left(keys, start, 0, k)
+                        taken = min(skip, k - j)
+                        k -= taken
+                        skip = skip - taken if j == 0 else 0
+                    if lo is None:
+                        i = 0
+                    elif lo_inclusive:
+                        i = bisect.bisect_left(keys, lo)
+                    else:
+                        i = bisect.bisect_right(keys, lo)
+                    i = min(i, k)
+                    ascending = keys[i:k]
+                    run = (ascending[::-1], node.children[i:k][::-1])
+                    done = i > 0
+                except Exception:
+                    if self._unchanged(ref, version):
+                        raise
+                    break
+                if not self._unchanged(ref, version):
+                    break
+                first = False
+                if run[0]:
+                    key = ascending[0]
+                    count = bisect.bisect_right(ascending, key)
+                    last, ties = key, (ties + count if ties and key == last else count)
+                    yield run
+                if done:
+                    return
+                ref, version, node = self._previous_leaf(stack)
+                if ref is None:
+                    return
+
+    def _previous_leaf(self, stack):
+        """
+        Step left from the leaf below `stack` (the path of internal nodes
+        _descend recorded): back up to the nearest ancestor with a child to the
+        left, then down that child's rightmost path, checking each parent is
+        unchanged since it was read. Returns (ref, version, leaf), with
+        (None, None, None) past the first leaf and the leaf None when a
+        writer got in the way.
+        """
+        while stack and stack[-1][3] == 0:
+            stack.pop()
+        if not stack:
+            return None, None, None
+        ref, version, node, i = stack.pop()
+        i -= 1
+        while True:
+            stack.append((ref, version, node, i))
+            try:
+                child = node.children[i]
+            except Exception:
+                return ref, version, None
+            child_version = self._stable_version(child)
+            if child_version is None or not self._unchanged(ref, version):
+                return ref, version, None
+            node = self._resolve_optimistic(child, child_version)
+            ref, version = child, child_version
+            if node is None:
+                return ref, version, None
+            try:
+                if node.is_leaf:
+                    return ref, version, node
+                i = len(node.children) - 1
+            except Exception:
+                return ref, version, None
+
+    # ------------------------------------------------------------------
+    # CONCURRENCY
+    # ------------------------------------------------------------------
+    #
+    # Optimistic lock coupling. Every node has a version: writers (one at a
+    # time, under _write_latch) make it odd before changing the node and
+    # even again when their operation ends, and a node merged away is
+    # retired (its version becomes None). Readers take no latch at all: they
+    # read a node's version, then its contents, then check the version is
+    # unchanged; when stepping to a child or the next leaf they read its
+    # version before re-checking the node they came from. Any change seen
+    # on the way restarts the reader, so any number of readers run beside
+    # the writer and never block it.
+
+    def _root_ref(self):
+        return self._ref(self.root)
+
+    def _resolve(self, ref):
+        """The node `ref` points at."""
+        return ref
+
+    def _version(self, ref):
+        """Version of the node at `ref`, or None once it is retired."""
+        return ref.version
+
+    def _bump(self, node):
+        node.version += 1
+
+    def _retire(self, node):
+        """`node` was merged away: readers still holding it must restart."""
+        self._locked.pop(self._ref(node), None)
+        node.version = None
+
+    def _lock(self, node):
+        """Called before a writer changes `node`; unlocked when the write ends."""
+        ref = self._ref(node)
+        if ref not in self._locked:
+            self._bump(node)
+            self._locked[ref] = node
+
+    def _unlock_all(self):
+        for node in self._locked.values():
+            self._bump(node)
+        self._locked.clear()
+
+    def _stable_version(self, ref):
+        """Wait out a writer changing the node at `ref`; None if it is retired."""
+        while True:
+            version = self._version(ref)
+            if version is None or not version & 1:
+                return version
+            time.sleep(0)
+
+    def _unchanged(self, ref, version):
+        return self._version(ref) == version
+
+    def _resolve_optimistic(self, ref, version):
+        """_resolve, or None if the node changed while it was being read."""
+        try:
+            return self._resolve(ref)
+        except Exception:
+            if self._unchanged(ref, version):
+                raise
+            return None
+
+    def _descend(self, key, rightmost=False, path=None):
+        """
+        Optimistic descent from the root to the leftmost leaf that can hold
+        `key` (rightmost=True: the rightmost one; key None: the first or
+        last leaf). Returns (ref, version, leaf), the leaf still to be
+        validated, or None when a writer got in the way and the caller must
+        retry. Each internal node was unchanged when its child's version
+        was read; they are appended to `path` as (ref, version, node, child
+        index) if given.
+        """
+        version_of = self._version
+        ref = self._root_ref()
+        version = self._stable_version(ref)
+        node = self._resolve_optimistic(ref, version)
+        while node is not None:
+            try:
+                if node.is_leaf:
+                    return ref, version, node
+                keys = node.keys
+                if key is None:
+                    i = len(keys) if rightmost else 0
+                elif rightmost:
+                    i = bisect.bisect_right(keys, key)
+                else:
+                    i = bisect.bisect_left(keys, key)
+                child = node.children[i]
+            except Exception:
+                if self._unchanged(ref, version):
+                    raise
+                return None
+            child_version = version_of(child)
+            if child_version is None or child_version & 1:
+                child_version = self._stable_version(child)
+            if child_version is None or version_of(ref) != version:
+                return None
+            if path is not None:
+                path.append((ref, version, node, i))
+            node = self._resolve_optimistic(child, child_version)
+            ref, version = child, child_version
+        return None
 
-        # Scan leaf for all matches
-        results = []
-        for i, k in enumerate(node.keys):
-            if k == key:
-                results.append(node.children[i])
-        return results if results else None
+    # ------------------------------------------------------------------
+    # INSERT
+    # ------------------------------------------------------------------
 
     def insert(self, key, value):
         key = self._normalize_key(key)
+        with self._write_latch:
+            try:
+                self._insert(key, value)
+            finally:
+                self._unlock_all()
+
+    def _insert(self, key, value):
         root = self.root
         split_info = self._insert_recursive(root, key, value)
         if split_info:
-            # Root split
-            new_root = Node(is_leaf=False)
-            new_root.keys = [split_info["key"]]
-            new_root.children = [root, split_info["new_node"]]
-            self.root = new_root
+            # Root split: move the root's contents down into a new left node
+            self._lock(root)
+            left = self._new_node(root.is_leaf)
+            left.keys = root.keys
+            left.children = root.children
+            left.next = root.next
+            root.is_leaf = False
+            root.keys = self._key_list([split_info["key"]])
+            root.children = [self._ref(left), self._ref(split_info["new_node"])]
+            root.next = None
+            self._dirty(left)
+            self._dirty(root)
 
     def _insert_recursive(self, node, key, value):
         if node.is_leaf:
             # Insert key in sorted order in leaf
-            i = bisect.bisect_left(node.keys, key)
+            i = bisect.bisect_right(node.keys, key)
+            self._lock(node)
             node.keys.insert(i, key)
             node.children.insert(i, value)
-            if node.is_full(self.order):
+            if self._is_full(node):
                 return self._split_leaf(node)
+            self._dirty(node)
             return None
         else:
             # Internal node
             i = bisect.bisect_right(node.keys, key)  # descend to correct child
-            split_info = self._insert_recursive(node.children[i], key, value)
+            split_info = self._insert_recursive(self._child(node, i), key, value)
             if split_info:
-                # Insert new key and child reference
-                insert_i = bisect.bisect_right(node.keys, split_info["key"])
-                node.keys.insert(insert_i, split_info["key"])
-                node.children.insert(insert_i + 1, split_info["new_node"])
-                if node.is_full(self.order):
+                # The new node goes right after the child that split; with
+                # duplicate separators, bisecting for it could land elsewhere
+                self._lock(node)
+                node.keys.insert(i, split_info["key"])
+                node.children.insert(i + 1, self._ref(split_info["new_node"]))
+                if self._is_full(node):
                     return self._split_internal(node)
+                self._dirty(node)
             return None
 
+    # ------------------------------------------------------------------
+    # BULK LOAD
+    # ------------------------------------------------------------------
+
+    def bulk_load(self, pairs, fill_factor=1.0):
+        """
+        Build an empty tree bottom-up from (key, value) pairs sorted by key.
+
+        Leaves are packed left to right up to `fill_factor` of their
+        capacity and chained as they are written; each internal level is
+        then built from the first keys of the level below, until a level
+        fits in the root. No descent or split happens, and nodes are
+        written once, in order. Leaving room (fill_factor < 1) lets later
+        inserts land without splitting straight away.
+        """
+        with self._write_latch:
+            try:
+                self._bulk_load(pairs, fill_factor)
+            finally:
+                self._unlock_all()
+
+    def _bulk_load(self, pairs, fill_factor):
+        root = self.root
+        if root.keys or not root.is_leaf:
+            raise ValueError("bulk_load requires an empty tree")
+        # Only the root is reachable; every other node is new
+        self._lock(root)
+
+        # Leaf level: (first_key, ref) of every leaf written so far
+        level = []
+        target = self._capacity(True) * fill_factor
+        entries, used, prev = [], 0, None
+        for key, value in pairs:
+            key = self._normalize_key(key)
+            size = self._entry_size(key, value, True)
+            if entries and used + size > target:
+                prev = self._emit_leaf(entries, prev, level)
+                entries, used = [], 0
+            entries.append((key, value))
+            used += size
+
+        if not level:
+            # Everything fits in the root leaf
+            root.keys = self._key_list(key for key, _ in entries)
+            root.children = [value for _, value in entries]
+            self._dirty(root)
+            return
+        last = self._emit_leaf(entries, prev, level)
+        self._dirty(last)
+
+        target = self._capacity(False) * fill_factor
+        while True:
+            sizes = [self._entry_size(key, ref, False) for key, ref in level[1:]]
+            if sum(sizes) <= self._capacity(False):
+                root.is_leaf = False
+                root.keys = self._key_list(key for key, _ in level[1:])
+                root.children = [ref for _, ref in level]
+                root.next = None
+                self._dirty(root)
+                return
+
+            parents = []
+            node = self._new_node(is_leaf=False)
+            node.children = [level[0][1]]
+            first_key, used = level[0][0], 0
+            for (key, ref), size in zip(level[1:], sizes):
+                if used + size > target and len(node.children) >= 2:
+                    self._dirty(node)
+                    parents.append((first_key, self._ref(node)))
+                    node = self._new_node(is_leaf=False)
+                    node.children = [ref]
+                    first_key, used = key, 0
+                    continue
+                node.keys.append(key)
+                node.children.append(ref)
+                used += size
+            self._dirty(node)
+            parents.append((first_key, self._ref(node)))
+            level = parents
+
+    def _emit_leaf(self, entries, prev, level):
+        """Write a packed leaf, link it after `prev`, and return it."""
+        leaf = self._new_node(is_leaf=True)
+        leaf.keys = self._key_list(key for key, _ in entries)
+        leaf.children = [value for _, value in entries]
+        if prev is not None:
+            prev.next = self._ref(leaf)
+            self._dirty(prev)
+        level.append((entries[0][0], self._ref(leaf)))
+        return leaf
+
+    # ------------------------------------------------------------------
+    # DELETE
+    # ------------------------------------------------------------------
+
+    def delete(self, key, value):
+        """
+        Remove one (key, value) entry. Returns True if an entry was removed.
+
+        A node left less than half full is merged with a sibling when the
+        two fit in one node, and otherwise borrows entries from it through
+        their separator in the parent. Merges can cascade up to the root;
+        a root left with a single child absorbs that child, so the tree
+        loses a level (the root itself never moves).
+        """
+        key = self._normalize_key(key)
+        with self._write_latch:
+            try:
+                return self._delete(key, value)
+            finally:
+                self._unlock_all()
+
+    def _delete(self, key, value):
+        root = self.root
+        if self._delete_recursive(root, key, value) is None:
+            return False
+        if not root.is_leaf and not root.keys:
+            child = self._child(root, 0)
+            self._lock(root)
+            root.is_leaf = child.is_leaf
+            root.keys = child.keys
+            root.children = child.children
+            root.next = child.next
+            self._dirty(root)
+            self._retire(child)
+            self._release(child)
+        return True
+
+    def _delete_recursive(self, node, key, value):
+        """
+        Delete (key, value) below `node`. Returns None if it was not found,
+        else whether `node` is now underfull (its parent rebalances it).
+        """
+        if node.is_leaf:
+            i = bisect.bisect_left(node.keys, key)
+            while i < len(node.keys) and node.keys[i] == key:
+                if node.children[i] == value:
+                    self._lock(node)
+                    del node.keys[i]
+                    del node.children[i]
+                    underfull = self._is_underfull(node)
+                    self._dirty(node)
+                    return underfull
+                i += 1
+            return None
+
+        # Duplicates of `key` can sit in any child between its separators
+        lo = bisect.bisect_left(node.keys, key)
+        hi = bisect.bisect_right(node.keys, key, lo)
+        for i in range(lo, hi + 1):
+            underfull = self._delete_recursive(self._child(node, i), key, value)
+            if underfull is None:
+                continue
+            if not underfull or not self._rebalance(node, i):
+                return False
+            underfull = self._is_underfull(node)
+            self._dirty(node)
+            return underfull
+        return None
+
+    def _rebalance(self, parent, i):
+        """
+        Fix the underfull child `i` of `parent` by merging it with or
+        borrowing from a sibling. Returns True if `parent` changed.
+        """
+        if len(parent.children) < 2:
+            return False
+        # Merge with the left sibling if possible, else with the right one
+        for left in (i - 1, i):
+            if 0 <= left < len(parent.keys) and self._can_merge(parent, left):
+                self._merge(parent, left)
+                return True
+        if i > 0:
+            return self._borrow(parent, i, i - 1)
+        return self._borrow(parent, i, i + 1)
+
+    def _can_merge(self, parent, i):
+        left, right = self._child(parent, i), self._child(parent, i + 1)
+        size = self._used(left) + self._used(right)
+        if not left.is_leaf:
+            # The separator comes down between the two halves
+            size += self._entry_size(parent.keys[i], None, False)
+        return size <= self._capacity(left.is_leaf)
+
+    def _merge(self, parent, i):
+        """Fold child i + 1 of `parent` into child i."""
+        left, right = self._child(parent, i), self._child(parent, i + 1)
+        self._lock(parent)
+        self._lock(left)
+        if left.is_leaf:
+            left.next = right.next
+        else:
+            left.keys.append(parent.keys[i])
+        left.keys.extend(right.keys)
+        left.children.extend(right.children)
+        del parent.keys[i]
+        del parent.children[i + 1]
+        self._dirty(left)
+        self._retire(right)
+        self._release(right)
+
+    def _borrow(self, parent, i, j):
+        """
+        Move entries from sibling `j` into the underfull child `i`, one at
+        a time, until the child is no longer underfull or the sibling would
+        become the smaller of the two. Returns True if anything moved.
+        """
+        child, sibling = self._child(parent, i), self._child(parent, j)
+        sep = min(i, j)
+        moved = False
+        while self._is_underfull(child) and self._used(sibling) > self._used(child):
+            if child.is_leaf:
+                if j < i:
+                    new_sep = sibling.keys[-1]
+                else:
+                    new_sep = sibling.keys[1] if len(sibling.keys) > 1 else None
+            else:
+                new_sep = sibling.keys[-1] if j < i else sibling.keys[0]
+            if new_sep is None or not self._separator_fits(parent, sep, new_sep):
+                break
+            for node in (parent, child, sibling):
+                self._lock(node)
+
+            if j < i:
+                if child.is_leaf:
+                    child.keys.insert(0, sibling.keys.pop())
+                    child.children.insert(0, sibling.children.pop())
+                else:
+                    child.keys.insert(0, parent.keys[sep])
+                    child.children.insert(0, sibling.children.pop())
+                    sibling.keys.pop()
+            else:
+                if child.is_leaf:
+                    child.keys.append(sibling.keys.pop(0))
+                    child.children.append(sibling.children.pop(0))
+                else:
+                    child.keys.append(parent.keys[sep])
+                    child.children.append(sibling.children.pop(0))
+                    sibling.keys.pop(0)
+            parent.keys[sep] = new_sep
+            moved = True
+
+        if moved:
+            self._dirty(sibling)
+            self._dirty(child)
+        return moved
+
+    def _separator_fits(self, parent, i, key):
+        """Whether `parent` still fits with its i-th separator set to `key`."""
+        size = (
+            self._used(parent)
+            - self._entry_size(parent.keys[i], None, False)
+            + self._entry_size(key, None, False)
+        )
+        return size <= self._capacity(False)
+
+    # ------------------------------------------------------------------
+    # INVARIANTS
+    # ------------------------------------------------------------------
+
+    def verify(self):
+        """
+        Check the structure of a quiescent tree (no write in progress) and
+        return its number of entries. Raises ValueError on the first broken
+        invariant: keys sorted within each node and within the separators
+        of its parent, entry and child counts matching the keys, every leaf
+        at the same depth, the leaf chain visiting the leaves in key order,
+        and no node left locked or retired.
+        """
+        leaves = []
+
+        def walk(node, lo, hi, depth):
+            version = self._version(self._ref(node))
+            if version is None or version & 1:
+                raise ValueError(f"{node!r} is locked or retired")
+            keys = list(node.keys)
+            if keys != sorted(keys):
+                raise ValueError(f"Keys out of order in {node!r}")
+            if keys and ((lo is not None and keys[0] < lo) or (hi is not None and keys[-1] > hi)):
+                raise ValueError(f"{node!r} lies outside its separators {lo!r}..{hi!r}")
+            if node.is_leaf:
+                if len(node.children) != len(keys):
+                    raise ValueError(f"{node!r} has {len(node.children)} values")
+                leaves.append((depth, node))
+                return
+            if len(node.children) != len(keys) + 1:
+                raise ValueError(f"{node!r} has {len(node.children)} children")
+            bounds = [lo] + keys + [hi]
+            for i in range(len(node.children)):
+                walk(self._child(node, i), bounds[i], bounds[i + 1], depth + 1)
+
+        walk(self.root, None, None, 0)
+        if len({depth for depth, _ in leaves}) > 1:
+            raise ValueError("Leaves at different depths")
+        chain, node = [], leaves[0][1]
+        while node is not None:
+            chain.append(self._ref(node))
+            node = self._next(node)
+        if chain != [self._ref(leaf) for _, leaf in leaves]:
+            raise ValueError("Leaf chain does not follow key order")
+        return sum(len(leaf.keys) for _, leaf in leaves)
+
+    # ------------------------------------------------------------------
+    # SPLITS
+    # ------------------------------------------------------------------
+
     def _split_leaf(self, leaf):
         mid = len(leaf.keys) // 2
-        new_leaf = Node(is_leaf=True)
+        new_leaf = self._new_node(is_leaf=True)
         new_leaf.keys = leaf.keys[mid:]
         new_leaf.children = leaf.children[mid:]
         leaf.keys = leaf.keys[:mid]
@@ -77,14 +807,16 @@ class BPlusTree:
 
         # Link leaf nodes
         new_leaf.next = leaf.next
-        leaf.next = new_leaf
+        leaf.next = self._ref(new_leaf)
+        self._dirty(new_leaf)
+        self._dirty(leaf)
 
         # Return first key of new leaf for parent
         return {"key": new_leaf.keys[0], "new_node": new_leaf}
 
     def _split_internal(self, node):
         mid = len(node.keys) // 2
-        new_node = Node(is_leaf=False)
+        new_node = self._new_node(is_leaf=False)
         new_node.keys = node.keys[mid + 1 :]
         new_node.children = node.children[mid + 1 :]
 
@@ -92,5 +824,7 @@ class BPlusTree:
 
         node.keys = node.keys[:mid]
         node.children = node.children[: mid + 1]
+        self._dirty(new_node)
+        self._dirty(node)
 
         return {"key": mid_key, "new_node": new_node}
@@ -0,0 +1,50 @@
+# engine/index/external_sort.py
+
+import heapq
+import pickle
+import tempfile
+from typing import Any, Iterable, Iterator, List, Optional
+
+
+def _read_run(handle) -> Iterator[Any]:
+    handle.seek(0)
+    while True:
+        try:
+            yield pickle.load(handle)
+        except EOFError:
+            return
+
+
+def external_sort(
+    items: Iterable[Any], buffer_size: int = 100_000, tmp_dir: Optional[str] = None
+) -> Iterator[Any]:
+    """
+    Yield `items` in sorted order, holding at most `buffer_size` of them
+    in memory while reading.
+
+    Input that fits in the buffer is sorted in place. Otherwise each full
+    buffer is sorted and spilled to a temporary file as a run, and the runs
+    are merged with a k-way heap merge; the files are removed once the
+    merge is exhausted (or the generator is closed).
+    """
+    buffer: List[Any] = []
+    runs = []
+    try:
+        for item in items:
+            buffer.append(item)
+            if len(buffer) >= buffer_size:
+                buffer.sort()
+                run = tempfile.TemporaryFile(dir=tmp_dir)
+                for entry in buffer:
+                    pickle.dump(entry, run, pickle.HIGHEST_PROTOCOL)
+                runs.append(run)
+                buffer = []
+
+        buffer.sort()
+        if not runs:
+            yield from buffer
+            return
+        yield from heapq.merge(buffer, *(_read_run(run) for run in runs))
+    finally:
+        for run in runs:
+            run.close()
@@ -0,0 +1,360 @@
+# engine/index/hash_index.py
+
+import struct
+import zlib
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from .key_codec import decode_key, encode_key
+from engine.exceptions import EngineError, PageError
+from engine.storage.pager import Pager
+
+
+def key_hash(key) -> int:
+    return zlib.crc32(encode_key(key))
+
+
+class Bucket:
+    """Decoded entries of a bucket page and its overflow pages."""
+
+    def __init__(self, page_num, depth):
+        self.page_num = page_num
+        self.depth = depth  # local depth: low hash bits shared by its keys
+        self.entries = []  # (key, row ID) in insertion order
+        self.hashes = []  # key_hash of each entry
+        self.overflow = []  # further pages, when one page is not enough
+        self.size = 0  # encoded bytes of the entries
+        # Entries on the last page start at `tail` and use `tail_used` bytes
+        self.tail = 0
+        self.tail_used = 0
+        # A hash all entries agree with beyond `depth` (None = not known)
+        self.uniform = None
+
+    def add(self, key, rid, h, size) -> None:
+        self.entries.append((key, rid))
+        self.hashes.append(h)
+        self.size += size
+        if self.uniform is not None and h >> self.depth != self.uniform >> self.depth:
+            self.uniform = None
+
+
+class HashIndex:
+    """
+    Extendible hash index for row-ID indexes that only answer equality.
+
+    A directory of 2^global_depth slots maps the low bits of a key's hash
+    to a bucket page; a bucket with local depth d is shared by the
+    2^(global_depth - d) slots agreeing on its low d bits. When a bucket
+    outgrows its page it splits on the next hash bit, doubling the
+    directory only if its depth already equals the global depth, so a
+    split rewrites just the two buckets involved (plus the directory). Keys that
+    hash alike (duplicates) cannot be split apart and instead continue on
+    overflow pages chained from the bucket, as does everything once the
+    directory reaches MAX_DEPTH. Deletes leave buckets in place.
+
+    Keys are hashed with CRC-32 of their encoding (engine.index.key_codec),
+    which unlike hash() is stable between processes.
+
+    Page layout (bucket and directory pages alike):
+      kind (B: 3 bucket, 4 directory) | depth (B) | count (H) | next (I)
+    A bucket page holds `count` entries key | row page (I) | row offset (H)
+    and `next` is its overflow page (0 = none). Directory pages hold
+    `count` bucket page numbers (I) and chain through `next`; the first
+    one, whose depth is the global depth, is the index's root page and
+    never moves.
+
+    The interface mirrors PagedBPlusTree except for range(): the planner
+    only uses hash indexes for `=`.
+    """
+
+    HEADER = struct.Struct(">BBHI")
+    BUCKET, DIRECTORY = 3, 4
+    ROW_ID = struct.Struct(">IH")
+    SLOT = struct.Struct(">I")
+
+    # Past this depth the directory stops doubling (64K slots)
+    MAX_DEPTH = 16
+    # Decoded buckets kept in memory (the pages themselves stay in the pager)
+    BUCKET_CACHE = 1024
+
+    def __init__(
+        self,
+        pager: Pager,
+        allocate_page: Callable[[], int],
+        free_page: Callable[[int], None],
+        root_page: Optional[int] = None,
+        extents: Optional[List[List[int]]] = None,
+    ):
+        self.pager = pager
+        self.allocate_page = allocate_page
+        self.free_page = free_page
+        # Pages owned by this index, as [first_page, page_count] runs
+        self.extents: List[List[int]] = [list(e) for e in extents or []]
+        self.capacity = pager.page_size - self.HEADER.size
+        self.max_key_size = self.capacity // 4 - self.ROW_ID.size
+        self._buckets: "OrderedDict[int, Bucket]" = OrderedDict()
+
+        if root_page is None:
+            self.root_page = self._allocate()
+            self._directory_pages = [self.root_page]
+            self.global_depth = 0
+            bucket = Bucket(self._allocate(), 0)
+            self.directory = [bucket.page_num]
+            self._cache(bucket)
+            self._write_bucket(bucket)
+            self._write_directory()
+        else:
+            self.root_page = root_page
+            self._read_directory()
+
+    # ------------------------------------------------------------------
+    # PAGES
+    # ------------------------------------------------------------------
+
+    def _allocate(self) -> int:
+        page_num = self.allocate_page()
+        if self.extents and sum(self.extents[-1]) == page_num:
+            self.extents[-1][1] += 1
+        else:
+            self.extents.append([page_num, 1])
+        return page_num
+
+    def _release(self, page_num) -> None:
+        for i, (start, length) in enumerate(self.extents):
+            if start <= page_num < start + length:
+                runs = [[start, page_num - start], [page_num + 1, start + length - page_num - 1]]
+                self.extents[i : i + 1] = [run for run in runs if run[1] > 0]
+                break
+        self.free_page(page_num)
+
+    def _write_page(self, page_num, header, body) -> None:
+        page = self.pager.get_page(page_num)
+        page.write(0, (header + body).ljust(self.pager.page_size, b"\x00"))
+        self.pager.mark_dirty(page_num)
+
+    # ------------------------------------------------------------------
+    # DIRECTORY
+    # ------------------------------------------------------------------
+
+    def _read_directory(self) -> None:
+        self.directory = []
+        self._directory_pages = []
+        page_num = self.root_page
+        while page_num:
+            data = self.pager.get_page(page_num).data
+            kind, depth, count, next_page = self.HEADER.unpack_from(data, 0)
+            if kind != self.DIRECTORY:
+                raise PageError(f"Page {page_num} is not a hash directory page")
+            if page_num == self.root_page:
+                self.global_depth = depth
+            self._directory_pages.append(page_num)
+            for i in range(count):
+                self.directory.append(
+                    self.SLOT.unpack_from(data, self.HEADER.size + i * self.SLOT.size)[0]
+                )
+            page_num = next_page
+
+    def _write_directory(self) -> None:
+        per_page = self.capacity // self.SLOT.size
+        needed = max(1, -(-len(self.directory) // per_page))
+        while len(self._directory_pages) < needed:
+            self._directory_pages.append(self._allocate())
+        for i, page_num in enumerate(self._directory_pages):
+            slots = self.directory[i * per_page : (i + 1) * per_page]
+            next_page = self._directory_pages[i + 1] if i + 1 < len(self._directory_pages) else 0
+            header = self.HEADER.pack(self.DIRECTORY, self.global_depth, len(slots), next_page)
+            self._write_page(page_num, header, b"".join(self.SLOT.pack(s) for s in slots))
+
+    def _slot(self, h) -> int:
+        return h & ((1 << self.global_depth) - 1)
+
+    # ------------------------------------------------------------------
+    # BUCKETS
+    # ------------------------------------------------------------------
+
+    def _cache(self, bucket) -> None:
+        self._buckets[bucket.page_num] = bucket
+        self._buckets.move_to_end(bucket.page_num)
+        if len(self._buckets) > self.BUCKET_CACHE:
+            self._buckets.popitem(last=False)
+
+    def _bucket(self, h) -> Bucket:
+        page_num = self.directory[self._slot(h)]
+        bucket = self._buckets.get(page_num)
+        if bucket is not None:
+            self._buckets.move_to_end(page_num)
+            return bucket
+
+        data = self.pager.get_page(page_num).data
+        kind, depth, _, _ = self.HEADER.unpack_from(data, 0)
+        if kind != self.BUCKET:
+            raise PageError(f"Page {page_num} is not a hash bucket")
+        bucket = Bucket(page_num, depth)
+        next_page = page_num
+        while next_page:
+            data = self.pager.get_page(next_page).data
+            _, _, count, following = self.HEADER.unpack_from(data, 0)
+            if next_page != page_num:
+                bucket.overflow.append(next_page)
+            bucket.tail, bucket.tail_used = len(bucket.entries), 0
+            pos = self.HEADER.size
+            for _ in range(count):
+                start = pos
+                key, pos = decode_key(data, pos)
+                rid = self.ROW_ID.unpack_from(data, pos)
+                pos += self.ROW_ID.size
+                bucket.add(key, rid, key_hash(key), pos - start)
+                bucket.tail_used += pos - start
+            next_page = following
+        self._cache(bucket)
+        return bucket
+
+    def _entry_size(self, key) -> int:
+        return len(encode_key(key)) + self.ROW_ID.size
+
+    def _write_bucket(self, bucket) -> None:
+        """Pack the entries into the bucket's page and as many overflow pages as needed."""
+        chunks, chunk, used = [], [], 0
+        bucket.tail = 0
+        for i, (key, (page_num, offset)) in enumerate(bucket.entries):
+            encoded = encode_key(key) + self.ROW_ID.pack(page_num, offset)
+            if chunk and used + len(encoded) > self.capacity:
+                chunks.append(chunk)
+                chunk, used = [], 0
+                bucket.tail = i
+            chunk.append(encoded)
+            used += len(encoded)
+        chunks.append(chunk)
+        bucket.tail_used = used
+
+        while len(bucket.overflow) < len(chunks) - 1:
+            bucket.overflow.append(self._allocate())
+        while len(bucket.overflow) > len(chunks) - 1:
+            self._release(bucket.overflow.pop())
+
+        pages = [bucket.page_num] + bucket.overflow
+        for i, (page_num, chunk) in enumerate(zip(pages, chunks)):
+            next_page = pages[i + 1] if i + 1 < len(pages) else 0
+            header = self.HEADER.pack(self.BUCKET, bucket.depth, len(chunk), next_page)
+            self._write_page(page_num, header, b"".join(chunk))
+
+    def _append(self, bucket, size) -> None:
+        """Write a bucket after an entry was appended to it."""
+        if bucket.tail_used + size > self.capacity:
+            self._write_bucket(bucket)  # needs another overflow page
+            return
+        bucket.tail_used += size
+        page_num = bucket.overflow[-1] if bucket.overflow else bucket.page_num
+        chunk = bucket.entries[bucket.tail :]
+        header = self.HEADER.pack(self.BUCKET, bucket.depth, len(chunk), 0)
+        self._write_page(
+            page_num,
+            header,
+            b"".join(encode_key(key) + self.ROW_ID.pack(*rid) for key, rid in chunk),
+        )
+
+    def _splittable(self, bucket) -> bool:
+        if bucket.size <= self.capacity or bucket.depth >= self.MAX_DEPTH:
+            return False
+        if bucket.uniform is not None:
+            return False
+        # Only keys differing in a hash bit beyond the local depth can part
+        first = bucket.hashes[0] >> bucket.depth
+        if any(h >> bucket.depth != first for h in bucket.hashes):
+            return True
+        bucket.uniform = bucket.hashes[0]
+        return False
+
+    def _split(self, bucket) -> Bucket:
+        """Split `bucket` on its next hash bit; returns the new sibling."""
+        if bucket.depth == self.global_depth:
+            self.directory = self.directory + self.directory
+            self.global_depth += 1
+        bit = 1 << bucket.depth
+        entries, hashes = bucket.entries, bucket.hashes
+        bucket.depth += 1
+        bucket.entries, bucket.hashes, bucket.size, bucket.uniform = [], [], 0, None
+        sibling = Bucket(self._allocate(), bucket.depth)
+        for (key, rid), h in zip(entries, hashes):
+            target = sibling if h & bit else bucket
+            target.add(key, rid, h, self._entry_size(key))
+
+        for i, page_num in enumerate(self.directory):
+            if page_num == bucket.page_num and i & bit:
+                self.directory[i] = sibling.page_num
+        self._cache(sibling)
+        self._write_bucket(bucket)
+        self._write_bucket(sibling)
+        self._write_directory()
+        return sibling
+
+    # ------------------------------------------------------------------
+    # PUBLIC API
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _normalize_key(key):
+        return key if isinstance(key, tuple) else (key,)
+
+    def search(self, key):
+        """Iterate over the row IDs stored under `key`."""
+        key = self._normalize_key(key)
+        for entry_key, rid in self._bucket(key_hash(key)).entries:
+            if entry_key == key:
+                yield rid
+
+    def insert(self, key, value):
+        key = self._normalize_key(key)
+        size = self._entry_size(key)
+        if size - self.ROW_ID.size > self.max_key_size:
+            raise EngineError(
+                f"Index key too large ({size - self.ROW_ID.size} bytes, "
+                f"limit {self.max_key_size})"
+            )
+        h = key_hash(key)
+        bucket = self._bucket(h)
+        bucket.add(key, tuple(value), h, size)
+        if not self._splittable(bucket):
+            self._append(bucket, size)
+            return
+        # Split until no bucket that took part still overflows for lack of depth
+        pending = [bucket]
+        while pending:
+            bucket = pending.pop()
+            if self._splittable(bucket):
+                pending += [bucket, self._split(bucket)]
+
+    def delete(self, key, value):
+        """Remove one (key, value) entry. Returns True if an entry was removed."""
+        key = self._normalize_key(key)
+        value = tuple(value)
+        bucket = self._bucket(key_hash(key))
+        for i, entry in enumerate(bucket.entries):
+            if entry == (key, value):
+                del bucket.entries[i]
+                del bucket.hashes[i]
+                bucket.size -= self._entry_size(key)
+                self._write_bucket(bucket)
+                return True
+        return False
+
+    def bulk_load(self, pairs, fill_factor=1.0):
+        """
+        Load (key, value) pairs into an empty index. Hashing scatters keys
+        regardless of their order, so this is a plain insert per pair and
+        `fill_factor` does not apply.
+        """
+        for key, value in pairs:
+            self.insert(key, value)
+
+    def destroy(self) -> None:
+        """Return every page of the index to the allocator."""
+        for start, length in self.extents:
+            for page_num in range(start, start + length):
+                self.free_page(page_num)
+        self.extents = []
+        self._buckets.clear()
+
+    def descriptor(self) -> dict:
+        """Catalog entry locating the index on disk."""
+        return {"root": self.root_page, "extents": [list(e) for e in self.extents]}
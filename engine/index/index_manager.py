@@ -1,32 +1,493 @@
 # engine/index/index_manager.py
 
 from .btree import BPlusTree
+from engine.exceptions import ConstraintViolationError, SchemaError
+
+
+class HashColumns(tuple):
+    """
+    Column tuple of a hash index. It never equals the plain tuple of a B+
+    tree index on the same columns, so both can be registered side by side
+    and everything keyed by columns (the registries, the unique set, the
+    catalog) tells them apart.
+    """
+
+    method = "hash"
+
+    def __eq__(self, other):
+        return type(other) is type(self) and tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.method, tuple(self)))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({tuple.__repr__(self)})"
+
+
+class BloomColumns(HashColumns):
+    """Column tuple of a Bloom filter index (see HashColumns)."""
+
+    method = "bloom"
+
+
+class _KeyMax:
+    """Sorts after every key value; pads partial-key range bounds."""
+
+    def __eq__(self, other):
+        return other is self
+
+    def __lt__(self, other):
+        return False
+
+    def __le__(self, other):
+        return other is self
+
+    def __gt__(self, other):
+        return other is not self
+
+    def __ge__(self, other):
+        return True
+
+    def __hash__(self):
+        return id(self)
+
+    def __repr__(self):
+        return "KEY_MAX"
+
+
+KEY_MAX = _KeyMax()
 
 
 class IndexManager:
-    def __init__(self):
-        # table_name -> {columns_tuple: BPlusTree}
+    """
+    Owns the B+ Tree indexes for a set of tables.
+
+    Two flavours share the same registry:
+      - create_index(table, columns) builds an index over an in-memory
+        storage Table whose leaves hold whole rows (Milestone 3 API).
+      - register(...) creates an engine index whose leaves hold row IDs,
+        i.e. (page_num, offset) tuples into the paged heap. The engine adds
+        each new row version through insert_entry. A heap keeping old row
+        versions (MVCC) leaves their entries in place until VACUUM removes
+        them (delete_entry) and moves those of the rows it compacts
+        (update_entry), and passes `live(table, row ID)`: unique checks
+        skip entries whose row it rejects.
+
+    Rows with a NULL in any indexed column are not indexed: comparisons never
+    match NULL, so such rows can never be returned by an index lookup.
+
+    Engine indexes have a database-wide name (CREATE INDEX name, or
+    <table>_pkey for a PRIMARY KEY) used by DROP INDEX and the catalog.
+
+    Engine indexes registered with lazy=True (e.g. read back from the
+    persisted catalog) hold no tree until first used; `loader(table, columns)`
+    then builds it from the heap.
+
+    Engine trees come from `new_tree(table, columns)` (in-memory BPlusTree by
+    default; the engine supplies page-backed trees and hash indexes). A tree
+    with a `destroy()` method is destroyed when its index is dropped or
+    cleared, releasing its pages.
+
+    An engine index may INCLUDE further columns (a covering index): its
+    entries are then (page_num, offset, *included values) instead of bare
+    row IDs, so queries touching only those columns skip the heap. Lookups
+    still hand out plain row IDs.
+
+    Engine indexes use one of METHODS: "btree" answers equality, ranges and
+    ORDER BY; "hash" answers equality only and is keyed by HashColumns, so a
+    column can have one of each; "bloom" (keyed by BloomColumns) holds no
+    row IDs at all, only per-page filters that let equality scans skip
+    pages (see pruning_filters).
+    """
+
+    METHODS = ("btree", "hash", "bloom")
+    KEY_TYPES = {"hash": HashColumns, "bloom": BloomColumns}
+
+    def __init__(self, loader=None, new_tree=None, live=None):
+        # table_name -> {columns_tuple: BPlusTree or None (not built yet)}
         self.indexes = {}
+        # (table_name, columns_tuple) of indexes that reject duplicate keys
+        self.unique = set()
+        # (table_name, columns_tuple) of PRIMARY KEY indexes
+        self.primary = set()
+        # index name -> (table_name, columns_tuple), engine indexes only
+        self.names = {}
+        # (table_name, columns_tuple) -> INCLUDE column names, covering only
+        self.include = {}
+        self.loader = loader
+        self.new_tree = new_tree or self._memory_tree
+        self.live = live or (lambda table_name, rid: True)
+
+    @classmethod
+    def _memory_tree(cls, table_name, columns):
+        if cls.method(columns) != "btree":
+            raise SchemaError(f"{cls.method(columns)} indexes need page storage")
+        return BPlusTree()
 
-    def create_index(self, table, columns):
+    @staticmethod
+    def _columns_key(columns):
+        if isinstance(columns, tuple):
+            return columns  # HashColumns stay HashColumns
+        return tuple(columns) if isinstance(columns, list) else (columns,)
+
+    def create_index(self, table, columns, order=BPlusTree.DEFAULT_ORDER):
         """Create a B+ Tree index on given columns."""
-        tree = BPlusTree()
+        tree = BPlusTree(order=order)
+        entries = []
         for row in table.rows():  # Milestone 2 table API
             key = (
                 tuple(row[col] for col in columns)
                 if isinstance(columns, (list, tuple))
-                else row[columns]
+                else (row[columns],)
             )
-            tree.insert(key, row)
-        self.indexes.setdefault(table.name, {})[
-            tuple(columns) if isinstance(columns, (list, tuple)) else (columns,)
-        ] = tree
+            entries.append((key, row))
+        # Rows don't compare, so sort on the key alone (stable for duplicates)
+        entries.sort(key=lambda entry: entry[0])
+        tree.bulk_load(entries)
+        self.indexes.setdefault(table.name, {})[self._columns_key(columns)] = tree
 
     def search(self, table, columns, key):
         """Search the index for a given key."""
-        tree = self.indexes.get(table.name, {}).get(
-            tuple(columns) if isinstance(columns, (list, tuple)) else (columns,)
-        )
+        tree = self.indexes.get(table.name, {}).get(self._columns_key(columns))
         if tree:
-            return tree.search(key)
+            return list(tree.search(key)) or None
         return None
+
+    # ------------------------------------------------------------------
+    # ENGINE (ROW-ID) INDEXES
+    # ------------------------------------------------------------------
+
+    # WHERE operators an index can answer, and the bounds they imply
+    RANGE_OPS = ("=", "<", "<=", ">", ">=")
+
+    @staticmethod
+    def prefix_bounds(columns, conditions):
+        """
+        Match ANDed (column, op, value) conditions against the key columns
+        of a B+ tree index: equalities on a leading prefix of `columns`,
+        optionally followed by range conditions on the next column.
+
+        Returns ((equality columns, range used), bounds) where `bounds` are
+        keyword arguments for BPlusTree.range spanning every key that
+        satisfies the match, or (None, None) when the first key column is
+        unconstrained.
+        """
+        equal, ranges = {}, {}
+        for col, op, value in conditions:
+            if op == "=":
+                equal.setdefault(col, value)
+            elif op in IndexManager.RANGE_OPS:
+                ranges.setdefault(col, []).append((op, value))
+
+        prefix = []
+        for col in columns:
+            if col not in equal:
+                break
+            prefix.append(equal[col])
+        prefix = tuple(prefix)
+        rng = ranges.get(columns[len(prefix)], []) if len(prefix) < len(columns) else []
+        if not prefix and not rng:
+            return None, None
+
+        # Tightest bound on each side of the range column
+        lo = hi = None
+        lo_inclusive = hi_inclusive = True
+        for op, value in rng:
+            inclusive = op in ("<=", ">=")
+            if op in (">", ">="):
+                if lo is None or value > lo or (value == lo and not inclusive):
+                    lo, lo_inclusive = value, inclusive
+            elif hi is None or value < hi or (value == hi and not inclusive):
+                hi, hi_inclusive = value, inclusive
+
+        bounds = {}
+        lo_key = prefix if lo is None else prefix + (lo,)
+        if lo_key:
+            # (a,) sorts before every (a, x, ...), so an inclusive bound
+            # shorter than the key already starts at the prefix; to skip
+            # past it, pad with KEY_MAX
+            if len(lo_key) < len(columns) and not lo_inclusive:
+                lo_key, lo_inclusive = lo_key + (KEY_MAX,), True
+            bounds.update(lo=lo_key, lo_inclusive=lo_inclusive)
+        hi_key = prefix if hi is None else prefix + (hi,)
+        if hi_key:
+            if len(hi_key) < len(columns) and hi_inclusive:
+                hi_key = hi_key + (KEY_MAX,)
+            bounds.update(hi=hi_key, hi_inclusive=hi_inclusive)
+        return (len(prefix), bool(rng)), bounds
+
+    def match(self, table_name, conditions):
+        """
+        (columns, bounds) of the index on `table_name` that best answers
+        the ANDed (column, op, value) conditions, or None.
+
+        Indexes constraining more leading key columns by equality win, then
+        those adding a range on the next column; among equals a hash index
+        (usable only when every key column is compared by equality) and
+        then the narrowest index are preferred. For a hash index `bounds`
+        is {"key": key}.
+        """
+        best, best_rank = None, None
+        for columns in self.indexes.get(table_name, {}):
+            if self.method(columns) == "bloom":
+                continue
+            if self.method(columns) == "hash":
+                equal = {col: value for col, op, value in conditions if op == "="}
+                if not all(col in equal for col in columns):
+                    continue
+                rank = (len(columns), False, True, -len(columns))
+                bounds = {"key": tuple(equal[col] for col in columns)}
+            else:
+                matched, bounds = self.prefix_bounds(columns, conditions)
+                if matched is None:
+                    continue
+                rank = (*matched, False, -len(columns))
+            if best_rank is None or rank > best_rank:
+                best, best_rank = (columns, bounds), rank
+        return best
+
+    def pruning_filters(self, table_name, conditions):
+        """
+        (filter, key) for every Bloom filter index on `table_name` whose
+        columns all have an equality among the ANDed (column, op, value)
+        conditions; a page can only hold matching rows if every filter
+        might contain its key.
+        """
+        equal = {col: value for col, op, value in conditions if op == "="}
+        result = []
+        for columns in self.indexes.get(table_name, {}):
+            if self.method(columns) == "bloom" and all(col in equal for col in columns):
+                key = tuple(equal[col] for col in columns)
+                result.append((self.get(table_name, columns), key))
+        return result
+
+    @staticmethod
+    def default_name(table_name, columns, primary=False):
+        if primary:
+            return f"{table_name.lower()}_pkey"
+        return f"{table_name.lower()}_{'_'.join(columns)}_idx"
+
+    @staticmethod
+    def method(columns):
+        """Index method of a registered columns key."""
+        return columns.method if isinstance(columns, HashColumns) else "btree"
+
+    def register(
+        self, table_name, columns, unique=False, lazy=False, name=None, primary=False,
+        tree=None, method="btree", include=(),
+    ):
+        """
+        Create an empty row-ID index on `columns` (lowercase names), or adopt
+        an existing `tree`. With lazy=True the tree is left for the loader to
+        build on first use.
+        """
+        if method not in self.METHODS:
+            raise SchemaError(f"Unknown index method {method}")
+        columns = self._columns_key(columns)
+        if method != "btree":
+            if primary:
+                raise SchemaError(f"A PRIMARY KEY index cannot use {method.upper()}")
+            if include:
+                raise SchemaError("INCLUDE requires a B+ tree index")
+            if unique and method == "bloom":
+                raise SchemaError("A Bloom filter index cannot be UNIQUE")
+            columns = self.KEY_TYPES[method](columns)
+        include = tuple(include)
+        for column in include:
+            if column in columns or include.count(column) > 1:
+                raise SchemaError(f"Column {column} is listed twice in index")
+        name = name or self.default_name(table_name, columns, primary)
+        if name in self.names:
+            raise SchemaError(f"Index {name} already exists")
+        if columns in self.indexes.get(table_name, {}):
+            kind = {"hash": "a hash index", "bloom": "a Bloom filter"}.get(method, "an index")
+            raise SchemaError(
+                f"Table {table_name} already has {kind} on ({', '.join(columns)})"
+            )
+        if tree is None and not lazy:
+            tree = self.new_tree(table_name, columns)
+        self.indexes.setdefault(table_name, {})[columns] = tree
+        self.names[name] = (table_name, columns)
+        if include:
+            self.include[(table_name, columns)] = include
+        if unique or primary:
+            self.unique.add((table_name, columns))
+        if primary:
+            self.primary.add((table_name, columns))
+        return tree
+
+    def unregister(self, name) -> None:
+        """Remove the engine index called `name`."""
+        if name not in self.names:
+            raise SchemaError(f"Index {name} does not exist")
+        table_name, columns = self.names.pop(name)
+        self._destroy(self.indexes[table_name].pop(columns))
+        self.unique.discard((table_name, columns))
+        self.primary.discard((table_name, columns))
+        self.include.pop((table_name, columns), None)
+
+    def clear_table(self, table_name) -> None:
+        """Replace every index of a table with an empty tree."""
+        trees = self.indexes.get(table_name, {})
+        for columns in trees:
+            self._destroy(trees[columns])
+            trees[columns] = self.new_tree(table_name, columns)
+
+    def rebuild_table(self, table_name, methods=METHODS) -> None:
+        """Replace a table's indexes of `methods` with fresh builds by the loader."""
+        trees = self.indexes.get(table_name, {})
+        for columns in trees:
+            if self.method(columns) not in methods:
+                continue
+            self._destroy(trees[columns])
+            trees[columns] = None  # left lazy if the build fails
+            trees[columns] = self.loader(table_name, columns)
+
+    @staticmethod
+    def _destroy(tree) -> None:
+        if tree is not None and hasattr(tree, "destroy"):
+            tree.destroy()
+
+    def definitions(self):
+        """Yield a catalog entry for every engine index."""
+        for name, (table_name, columns) in self.names.items():
+            entry = {
+                "name": name,
+                "table": table_name,
+                "columns": list(columns),
+                "unique": (table_name, columns) in self.unique,
+                "primary": (table_name, columns) in self.primary,
+                "using": self.method(columns),
+            }
+            if (table_name, columns) in self.include:
+                entry["include"] = list(self.include[(table_name, columns)])
+            tree = self.indexes[table_name][columns]
+            if tree is not None and hasattr(tree, "descriptor"):
+                entry.update(tree.descriptor())
+            yield entry
+
+    def _trees(self, table_name):
+        """(columns, tree) pairs for a table, building lazy indexes."""
+        trees = self.indexes.get(table_name, {})
+        for columns in list(trees):
+            if trees[columns] is None:
+                trees[columns] = self.loader(table_name, columns)
+        return trees.items()
+
+    def drop_table(self, table_name) -> None:
+        for columns, tree in self.indexes.pop(table_name, {}).items():
+            self._destroy(tree)
+            self.unique.discard((table_name, columns))
+            self.primary.discard((table_name, columns))
+            self.include.pop((table_name, columns), None)
+        self.names = {
+            name: owner for name, owner in self.names.items() if owner[0] != table_name
+        }
+
+    def get(self, table_name, columns):
+        columns = self._columns_key(columns)
+        trees = self.indexes.get(table_name, {})
+        if columns in trees and trees[columns] is None:
+            trees[columns] = self.loader(table_name, columns)
+        return trees.get(columns)
+
+    @staticmethod
+    def index_key(columns, row):
+        """Key for `row` (a lowercase-named dict), or None if any part is NULL."""
+        key = tuple(row[col] for col in columns)
+        if any(v is None for v in key):
+            return None
+        return key
+
+    def entry_value(self, table_name, columns, row, rid):
+        """What the index on `columns` stores for `row` at `rid`."""
+        include = self.include.get((table_name, columns))
+        if include is None:
+            return rid
+        return tuple(rid) + tuple(row[col] for col in include)
+
+    def check_unique(self, table_name, row, rid=None) -> None:
+        """Raise if inserting/updating `row` would duplicate a unique key."""
+        rid = None if rid is None else tuple(rid)
+        for columns, tree in self._trees(table_name):
+            if (table_name, columns) not in self.unique:
+                continue
+            key = self.index_key(columns, row)
+            if key is None:
+                continue
+            if any(
+                tuple(other[:2]) != rid and self.live(table_name, tuple(other[:2]))
+                for other in tree.search(key)
+            ):
+                self._duplicate(table_name, columns, key)
+
+    def check_unique_batch(self, table_name, rows) -> None:
+        """check_unique for rows inserted together, which must not share a key either."""
+        for row in rows:
+            self.check_unique(table_name, row)
+        for columns in self.indexes.get(table_name, {}):
+            if (table_name, columns) not in self.unique:
+                continue
+            seen = set()
+            for row in rows:
+                key = self.index_key(columns, row)
+                if key in seen:
+                    self._duplicate(table_name, columns, key)
+                if key is not None:
+                    seen.add(key)
+
+    def _duplicate(self, table_name, columns, key):
+        shown = key[0] if len(key) == 1 else key
+        kind = "PRIMARY KEY" if (table_name, columns) in self.primary else "UNIQUE"
+        raise ConstraintViolationError(
+            f"{kind} violation: duplicate value '{shown}' in column "
+            f"'{', '.join(c.upper() for c in columns)}'"
+        )
+
+    def insert_entry(self, table_name, row, rid) -> None:
+        for columns, tree in self._trees(table_name):
+            key = self.index_key(columns, row)
+            if key is not None:
+                tree.insert(key, self.entry_value(table_name, columns, row, rid))
+
+    def delete_entry(self, table_name, row, rid) -> None:
+        for columns, tree in self._trees(table_name):
+            key = self.index_key(columns, row)
+            if key is not None:
+                tree.delete(key, self.entry_value(table_name, columns, row, rid))
+
+    def update_entry(self, table_name, old_row, new_row, rid, new_rid=None) -> None:
+        """
+        Move `rid` to its new key in every index whose entry changed, and
+        to `new_rid` if the row itself moved.
+        """
+        new_rid = rid if new_rid is None else new_rid
+        for columns, tree in self._trees(table_name):
+            old_key = self.index_key(columns, old_row)
+            new_key = self.index_key(columns, new_row)
+            old_value = self.entry_value(table_name, columns, old_row, rid)
+            new_value = self.entry_value(table_name, columns, new_row, new_rid)
+            if old_key == new_key and old_value == new_value:
+                continue
+            if old_key is not None:
+                tree.delete(old_key, old_value)
+            if new_key is not None:
+                tree.insert(new_key, new_value)
+
+    def lookup(self, table_name, column, value):
+        """
+        Row IDs whose `column` equals `value`, or None when no single-column
+        index on `column` exists (the caller must scan). A hash index is
+        preferred over a B+ tree.
+        """
+        tree = self.get(table_name, HashColumns((column,)))
+        if tree is None:
+            tree = self.get(table_name, (column,))
+        if tree is None:
+            return None
+        if value is None:
+            return []
+        return [entry[:2] for entry in tree.search(value)]
@@ -0,0 +1,70 @@
+# engine/index/key_codec.py
+"""
+On-page encoding of index keys, shared by the paged index structures.
+
+A key is a tuple encoded as n (B) then, per part, a type tag (B) and value:
+int ">q", float ">d", str ">H" length + UTF-8 bytes, NULL (tag only; index
+keys never hold NULL, but covered column values may), and bytes ">I" length
++ raw bytes (never in index keys; write-ahead log records carry page bytes).
+The encoding is deterministic across processes, so it can also be hashed.
+"""
+
+import struct
+
+from engine.exceptions import EngineError, PageError
+
+INT = struct.Struct(">q")
+FLOAT = struct.Struct(">d")
+LENGTH = struct.Struct(">H")
+BYTES_LENGTH = struct.Struct(">I")
+TAG_NULL, TAG_INT, TAG_FLOAT, TAG_STR, TAG_BYTES = 0, 1, 2, 3, 4
+
+
+def encode_key(key) -> bytes:
+    parts = [bytes([len(key)])]
+    for value in key:
+        if value is None:
+            parts.append(bytes([TAG_NULL]))
+        elif isinstance(value, int):
+            parts.append(bytes([TAG_INT]) + INT.pack(value))
+        elif isinstance(value, float):
+            parts.append(bytes([TAG_FLOAT]) + FLOAT.pack(value))
+        elif isinstance(value, str):
+            raw = value.encode("utf-8")
+            parts.append(bytes([TAG_STR]) + LENGTH.pack(len(raw)) + raw)
+        elif isinstance(value, (bytes, bytearray)):
+            parts.append(bytes([TAG_BYTES]) + BYTES_LENGTH.pack(len(value)) + bytes(value))
+        else:
+            raise EngineError(f"Cannot index value of type {type(value).__name__}")
+    return b"".join(parts)
+
+
+def decode_key(data, pos):
+    """Decode the key at `pos`; returns (key, position after it)."""
+    count = data[pos]
+    pos += 1
+    key = []
+    for _ in range(count):
+        tag = data[pos]
+        pos += 1
+        if tag == TAG_NULL:
+            key.append(None)
+        elif tag == TAG_INT:
+            key.append(INT.unpack_from(data, pos)[0])
+            pos += INT.size
+        elif tag == TAG_FLOAT:
+            key.append(FLOAT.unpack_from(data, pos)[0])
+            pos += FLOAT.size
+        elif tag == TAG_STR:
+            (length,) = LENGTH.unpack_from(data, pos)
+            pos += LENGTH.size
+            key.append(bytes(data[pos : pos + length]).decode("utf-8"))
+            pos += length
+        elif tag == TAG_BYTES:
+            (length,) = BYTES_LENGTH.unpack_from(data, pos)
+            pos += BYTES_LENGTH.size
+            key.append(bytes(data[pos : pos + length]))
+            pos += length
+        else:
+            raise PageError(f"Corrupt index key (tag {tag})")
+    return tuple(key), pos
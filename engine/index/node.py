@@ -2,11 +2,16 @@
 
 
 class Node:
+    # No per-instance __dict__: a large index has one Node per few hundred keys
+    __slots__ = ("is_leaf", "keys", "children", "next", "page_num", "version")
+
     def __init__(self, is_leaf=False):
         self.is_leaf = is_leaf
         self.keys = []  # List of keys
         self.children = []  # Pointers to child nodes (internal) or records (leaf)
         self.next = None  # Next leaf node for range queries
+        self.page_num = None  # Backing page, for nodes of a PagedBPlusTree
+        self.version = 0  # Odd while a writer changes the node, None once merged away
 
     def is_full(self, order):
         return len(self.keys) >= order
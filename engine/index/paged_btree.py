@@ -0,0 +1,308 @@
+# engine/index/paged_btree.py
+
+import struct
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from .btree import BPlusTree
+from .key_codec import INT, decode_key, encode_key
+from .node import Node
+from engine.exceptions import EngineError, PageError
+from engine.storage.pager import Pager
+
+
+class PagedBPlusTree(BPlusTree):
+    """
+    B+ Tree whose nodes live in pager pages, for row-ID indexes.
+
+    Page layout:
+      kind (B: 1 leaf, 2 internal) | reserved (B) | count (H) | link (I)
+      followed by `count` entries.
+
+    For a leaf, `link` is the next leaf's page (0 = none) and each entry is
+    key | row page (I) | row offset (H). For an internal node, `link` is the
+    leftmost child's page and each entry is key | right child page (I).
+
+    A covering tree (INCLUDE columns) also stores the included values after
+    each row ID, and its values are (row page, row offset, *included).
+
+    Keys and included values are encoded by engine.index.key_codec.
+
+    Fanout follows from the page size: a node splits when its encoding no
+    longer fits one page, so a 4 KiB page holds a few hundred integer keys.
+    The root page never moves (see BPlusTree), which is what the catalog
+    records. Nodes merged away by deletes go back to the page allocator.
+    Nodes are decoded on demand and a bounded number of decoded nodes is
+    kept; every change is written straight back into the node's page and
+    the page marked dirty, so the pager owns the only durable copy.
+
+    A page can be decoded into more than one Node object (after eviction),
+    so node versions for concurrent readers are kept per page, not on the
+    Node; a retired page gets a newer version when it is reused.
+    """
+
+    HEADER = struct.Struct(">BBHI")
+    LEAF, INTERNAL = 1, 2
+    ROW_ID = struct.Struct(">IH")
+    CHILD = struct.Struct(">I")
+
+    # Decoded nodes kept in memory (the pages themselves stay in the pager)
+    NODE_CACHE = 1024
+
+    def __init__(
+        self,
+        pager: Pager,
+        allocate_page: Callable[[], int],
+        free_page: Callable[[int], None],
+        root_page: Optional[int] = None,
+        extents: Optional[List[List[int]]] = None,
+        int_keys: bool = False,
+        covering: bool = False,
+    ):
+        self.pager = pager
+        self.int_keys = int_keys
+        self.covering = covering
+        self.allocate_page = allocate_page
+        self.free_page = free_page
+        # Pages owned by this tree, as [first_page, page_count] runs
+        self.extents: List[List[int]] = [list(e) for e in extents or []]
+        self.capacity = pager.page_size - self.HEADER.size
+        # Any node must be able to hold at least four entries
+        self.max_key_size = self.capacity // 4 - self.ROW_ID.size
+        self._nodes: "OrderedDict[int, Node]" = OrderedDict()
+        self._nodes_latch = threading.Lock()
+        self._image = None
+        self._init_latches()
+        # page -> node version, and pages merged away (see BPlusTree)
+        self._versions = {}
+        self._retired = set()
+
+        if root_page is None:
+            root = self._new_node(is_leaf=True)
+            self._dirty(root)
+            root_page = root.page_num
+        self.root_page = root_page
+
+    @property
+    def root(self):
+        return self._load(self.root_page)
+
+    # ------------------------------------------------------------------
+    # STORAGE HOOKS
+    # ------------------------------------------------------------------
+
+    def _child(self, node, i):
+        return self._load(node.children[i])
+
+    def _next(self, leaf):
+        return self._load(leaf.next) if leaf.next else None
+
+    def _ref(self, node):
+        return node.page_num
+
+    def _new_node(self, is_leaf):
+        page_num = self.allocate_page()
+        if self.extents and sum(self.extents[-1]) == page_num:
+            self.extents[-1][1] += 1
+        else:
+            self.extents.append([page_num, 1])
+        if page_num in self._retired:
+            self._retired.discard(page_num)
+            self._bump(page_num)
+        node = Node(is_leaf=is_leaf)
+        node.keys = self._key_list()
+        node.page_num = page_num
+        self._cache(node)
+        return node
+
+    def _dirty(self, node):
+        data = self._encoded_image(node)
+        if len(data) > self.pager.page_size:
+            raise PageError(f"Index node {node.page_num} overflows its page")
+        page = self.pager.get_page(node.page_num)
+        page.write(0, data.ljust(self.pager.page_size, b"\x00"))
+        self.pager.mark_dirty(node.page_num)
+        # A reader may have cached its own decoding while this node was
+        # being changed: the writer's copy is the current one
+        self._cache(node)
+
+    def _capacity(self, is_leaf):
+        return self.capacity
+
+    def _entry_size(self, key, value, is_leaf):
+        if not is_leaf:
+            return len(self._encode_key(key)) + self.CHILD.size
+        size = self._check_size(key, value)
+        return size + self.ROW_ID.size
+
+    def _check_size(self, key, value) -> int:
+        """Encoded size of a leaf entry's key and included values."""
+        size = len(self._encode_key(key))
+        if self.covering:
+            size += len(encode_key(value[2:]))
+        if size > self.max_key_size:
+            raise EngineError(
+                f"Index key too large ({size} bytes, limit {self.max_key_size})"
+            )
+        return size
+
+    def _is_full(self, node):
+        # Remember the encoding: if the node fits, _dirty writes it next
+        self._image = (node, self._encode(node))
+        return len(self._image[1]) > self.pager.page_size
+
+    def _used(self, node):
+        return len(self._encode(node)) - self.HEADER.size
+
+    def _is_underfull(self, node):
+        self._image = (node, self._encode(node))
+        return (len(self._image[1]) - self.HEADER.size) * 2 < self.capacity
+
+    def _release(self, node):
+        with self._nodes_latch:
+            self._nodes.pop(node.page_num, None)
+        for n, (start, length) in enumerate(self.extents):
+            if start <= node.page_num < start + length:
+                # Split the run around the page
+                head = [start, node.page_num - start]
+                tail = [node.page_num + 1, start + length - node.page_num - 1]
+                self.extents[n : n + 1] = [e for e in (head, tail) if e[1]]
+                break
+        self.free_page(node.page_num)
+
+    def _encoded_image(self, node) -> bytes:
+        image, self._image = self._image, None
+        if image is not None and image[0] is node:
+            return image[1]
+        return self._encode(node)
+
+    # ------------------------------------------------------------------
+    # NODE CACHE
+    # ------------------------------------------------------------------
+
+    def _cache(self, node):
+        with self._nodes_latch:
+            self._nodes[node.page_num] = node
+            self._nodes.move_to_end(node.page_num)
+            if len(self._nodes) > self.NODE_CACHE:
+                self._nodes.popitem(last=False)
+
+    def _load(self, page_num):
+        with self._nodes_latch:
+            node = self._nodes.get(page_num)
+            if node is not None:
+                self._nodes.move_to_end(page_num)
+                return node
+        node = self._decode(page_num, self.pager.get_page(page_num).data)
+        with self._nodes_latch:
+            # Keep a copy another thread cached meanwhile
+            node = self._nodes.setdefault(page_num, node)
+            self._nodes.move_to_end(page_num)
+            if len(self._nodes) > self.NODE_CACHE:
+                self._nodes.popitem(last=False)
+        return node
+
+    # ------------------------------------------------------------------
+    # CONCURRENCY
+    # ------------------------------------------------------------------
+
+    def _root_ref(self):
+        return self.root_page
+
+    def _resolve(self, ref):
+        return self._load(ref)
+
+    def _version(self, ref):
+        return None if ref in self._retired else self._versions.get(ref, 0)
+
+    def _bump(self, node):
+        page_num = node if isinstance(node, int) else node.page_num
+        self._versions[page_num] = self._versions.get(page_num, 0) + 1
+
+    def _retire(self, node):
+        self._lock(node)  # stays odd until the page is reused
+        self._locked.pop(node.page_num, None)
+        self._retired.add(node.page_num)
+
+    # ------------------------------------------------------------------
+    # ENCODING
+    # ------------------------------------------------------------------
+
+    def _encode_key(self, key) -> bytes:
+        return encode_key((key,) if self.int_keys else key)
+
+    def _decode_key(self, data, pos):
+        if self.int_keys:
+            # n, tag, value: skip straight to the integer
+            return INT.unpack_from(data, pos + 2)[0], pos + 2 + INT.size
+        return decode_key(data, pos)
+
+    def _encode(self, node) -> bytes:
+        if node.is_leaf:
+            parts = [self.HEADER.pack(self.LEAF, 0, len(node.keys), node.next or 0)]
+            for key, value in zip(node.keys, node.children):
+                parts.append(self._encode_key(key))
+                parts.append(self.ROW_ID.pack(value[0], value[1]))
+                if self.covering:
+                    parts.append(encode_key(value[2:]))
+        else:
+            parts = [self.HEADER.pack(self.INTERNAL, 0, len(node.keys), node.children[0])]
+            for key, child in zip(node.keys, node.children[1:]):
+                parts.append(self._encode_key(key))
+                parts.append(self.CHILD.pack(child))
+        return b"".join(parts)
+
+    def _decode(self, page_num, data) -> Node:
+        kind, _, count, link = self.HEADER.unpack_from(data, 0)
+        if kind not in (self.LEAF, self.INTERNAL):
+            raise PageError(f"Page {page_num} is not an index node")
+        node = Node(is_leaf=kind == self.LEAF)
+        node.keys = self._key_list()
+        node.page_num = page_num
+        pos = self.HEADER.size
+        if node.is_leaf:
+            node.next = link or None
+            for _ in range(count):
+                key, pos = self._decode_key(data, pos)
+                node.keys.append(key)
+                value = self.ROW_ID.unpack_from(data, pos)
+                pos += self.ROW_ID.size
+                if self.covering:
+                    included, pos = decode_key(data, pos)
+                    value += included
+                node.children.append(value)
+        else:
+            node.children.append(link)
+            for _ in range(count):
+                key, pos = self._decode_key(data, pos)
+                node.keys.append(key)
+                node.children.append(self.CHILD.unpack_from(data, pos)[0])
+                pos += self.CHILD.size
+        return node
+
+    # ------------------------------------------------------------------
+    # PUBLIC API
+    # ------------------------------------------------------------------
+
+    def insert(self, key, value):
+        key = self._normalize_key(key)
+        value = tuple(value)
+        self._check_size(key, value)
+        super().insert(key, value)
+
+    def delete(self, key, value):
+        return super().delete(key, tuple(value))
+
+    def destroy(self) -> None:
+        """Return every page of the tree to the allocator."""
+        for start, length in self.extents:
+            for page_num in range(start, start + length):
+                self.free_page(page_num)
+        self.extents = []
+        with self._nodes_latch:
+            self._nodes.clear()
+
+    def descriptor(self) -> dict:
+        """Catalog entry locating the tree on disk."""
+        return {"root": self.root_page, "extents": [list(e) for e in self.extents]}
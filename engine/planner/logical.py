@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List, Union
+from typing import List, Optional, Union
 from engine.sql.ast import *
 
 
@@ -18,6 +18,7 @@ class LogicalCreate(LogicalPlanNode):
 class LogicalInsert(LogicalPlanNode):
     table: str
     values: List[Literal]
+    rows: Optional[List[List[Literal]]] = None
 
 
 @dataclass
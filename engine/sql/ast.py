@@ -32,6 +32,21 @@ class BinaryExpression(ASTNode):
     right: Literal
 
 
+@dataclass
+class Conjunction(ASTNode):
+    """Comparisons joined by AND (a WHERE clause with more than one)."""
+    conditions: List[BinaryExpression]
+
+
+def conjuncts(predicate) -> List[BinaryExpression]:
+    """The comparisons ANDed together in a WHERE predicate."""
+    if predicate is None:
+        return []
+    if isinstance(predicate, Conjunction):
+        return list(predicate.conditions)
+    return [predicate]
+
+
 # =========================
 # Data Types & Constraints
 # =========================
@@ -62,6 +77,7 @@ class ColumnConstraint(ASTNode):
     kind: str  # PRIMARY_KEY, NOT_NULL, UNIQUE, AUTO_INCREMENT, FOREIGN_KEY
     ref_table: Optional[str] = None
     ref_column: Optional[str] = None
+    on_delete: Optional[str] = None  # FOREIGN_KEY: RESTRICT or CASCADE
 
 
 @dataclass
@@ -96,30 +112,60 @@ class DropTable(ASTNode):
     name: str
 
 
+@dataclass
+class CreateIndex(ASTNode):
+    """CREATE [UNIQUE] INDEX name ON table [USING method] (col, ...) [INCLUDE (col, ...)]."""
+    name: str
+    table: str
+    columns: List[str]
+    unique: bool = False
+    using: str = "btree"
+    include: Optional[List[str]] = None
+
+
+@dataclass
+class DropIndex(ASTNode):
+    name: str
+
+
+@dataclass
+class Vacuum(ASTNode):
+    """VACUUM table: compact pages and refresh table statistics."""
+    name: str
+
+
+@dataclass
+class Truncate(ASTNode):
+    """TRUNCATE TABLE table: remove every row and release the table's pages."""
+    name: str
+
+
 @dataclass
 class Insert(ASTNode):
     table: str
     values: List[Literal]
+    # Every VALUES tuple of a multi-row INSERT; `values` is the first
+    rows: Optional[List[List[Literal]]] = None
 
 
 @dataclass
 class Update(ASTNode):
     table: str
     assignments: dict[str, Literal]
-    where: Optional[BinaryExpression] = None
+    where: Optional[Union[BinaryExpression, Conjunction]] = None
 
 
 @dataclass
 class Delete(ASTNode):
     table: str
-    where: Optional[BinaryExpression] = None
+    where: Optional[Union[BinaryExpression, Conjunction]] = None
 
 
 @dataclass
 class Select(ASTNode):
     columns: List[Column]
     table: str
-    where: Optional[BinaryExpression] = None
+    where: Optional[Union[BinaryExpression, Conjunction]] = None
     order_by: Optional[List[tuple]] = None  # List of (column_name, direction: 'ASC'|'DESC')
     limit: Optional[int] = None
     offset: Optional[int] = None
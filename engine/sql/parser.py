@@ -53,6 +53,10 @@ class Parser:
             return self._parse_select()
         elif tok.value.upper() == "SHOW":
             return self._parse_show_tables()
+        elif tok.value.upper() == "VACUUM":
+            return self._parse_vacuum()
+        elif tok.value.upper() == "TRUNCATE":
+            return self._parse_truncate()
         else:
             raise SyntaxError(f"Unsupported statement: {tok.value}")
 
@@ -60,8 +64,10 @@ class Parser:
     # CREATE TABLE
     # =========================
 
-    def _parse_create(self) -> CreateTable:
+    def _parse_create(self):
         self._expect(TokenType.KEYWORD, "CREATE")
+        if self._peek().value.upper() in ("INDEX", "UNIQUE"):
+            return self._parse_create_index()
         self._expect(TokenType.KEYWORD, "TABLE")
         table_name = self._expect(TokenType.IDENTIFIER).value
         self._expect(TokenType.SYMBOL, "(")
@@ -123,8 +129,16 @@ class Parser:
                 self._expect(TokenType.SYMBOL, "(")
                 ref_col = self._expect(TokenType.IDENTIFIER).value
                 self._expect(TokenType.SYMBOL, ")")
+                on_delete = "RESTRICT"
+                if self._peek().value.upper() == "ON":
+                    self._advance()
+                    self._expect(TokenType.KEYWORD, "DELETE")
+                    action = self._advance().value.upper()
+                    if action not in ("CASCADE", "RESTRICT"):
+                        raise SyntaxError("Expected CASCADE or RESTRICT after ON DELETE")
+                    on_delete = action
                 constraints.append(
-                    ColumnConstraint("FOREIGN_KEY", ref_table, ref_col)
+                    ColumnConstraint("FOREIGN_KEY", ref_table, ref_col, on_delete)
                 )
             else:
                 break
@@ -132,16 +146,93 @@ class Parser:
         return ColumnDef(name, dtype, constraints)
 
     # =========================
-    # DROP TABLE
+    # CREATE INDEX
     # =========================
 
-    def _parse_drop(self) -> DropTable:
+    def _parse_create_index(self) -> CreateIndex:
+        unique = False
+        if self._peek().value.upper() == "UNIQUE":
+            self._advance()
+            unique = True
+        self._expect(TokenType.KEYWORD, "INDEX")
+        index_name = self._expect(TokenType.IDENTIFIER).value
+        self._expect(TokenType.KEYWORD, "ON")
+        table_name = self._expect(TokenType.IDENTIFIER).value
+        # USING goes before the column list (PostgreSQL) or after it (MySQL)
+        using = self._parse_index_method()
+        self._expect(TokenType.SYMBOL, "(")
+
+        columns = self._parse_name_list()
+        using = self._parse_index_method() or using
+
+        include = None
+        if self._peek().value.upper() == "INCLUDE":
+            self._advance()
+            self._expect(TokenType.SYMBOL, "(")
+            include = self._parse_name_list()
+
+        self._consume_optional_semicolon()
+        return CreateIndex(index_name, table_name, columns, unique, using or "btree", include)
+
+    def _parse_name_list(self):
+        """`col, ...)` after an opening parenthesis."""
+        names = []
+        while True:
+            names.append(self._expect(TokenType.IDENTIFIER).value)
+            if self._peek().value == ")":
+                self._advance()
+                return names
+            self._expect(TokenType.SYMBOL, ",")
+
+    def _parse_index_method(self):
+        """Optional `USING BTREE | HASH | BLOOM`; returns the method or None."""
+        if self._peek().value.upper() != "USING":
+            return None
+        self._advance()
+        method = self._expect(TokenType.IDENTIFIER).value.lower()
+        if method not in ("btree", "hash", "bloom"):
+            raise SyntaxError(f"Unknown index method {method.upper()}")
+        return method
+
+    # =========================
+    # DROP TABLE / DROP INDEX
+    # =========================
+
+    def _parse_drop(self):
         self._expect(TokenType.KEYWORD, "DROP")
+        if self._peek().value.upper() == "INDEX":
+            self._advance()
+            name = self._expect(TokenType.IDENTIFIER).value
+            self._consume_optional_semicolon()
+            return DropIndex(name)
         self._expect(TokenType.KEYWORD, "TABLE")
         name = self._expect(TokenType.IDENTIFIER).value
         self._consume_optional_semicolon()
         return DropTable(name)
 
+    # =========================
+    # VACUUM
+    # =========================
+
+    def _parse_vacuum(self) -> Vacuum:
+        self._expect(TokenType.KEYWORD, "VACUUM")
+        name = self._expect(TokenType.IDENTIFIER).value
+        self._consume_optional_semicolon()
+        return Vacuum(name)
+
+    # =========================
+    # TRUNCATE TABLE
+    # =========================
+
+    def _parse_truncate(self) -> Truncate:
+        self._expect(TokenType.KEYWORD, "TRUNCATE")
+        # TABLE is optional, as in MySQL / PostgreSQL
+        if self._peek().value.upper() == "TABLE":
+            self._advance()
+        name = self._expect(TokenType.IDENTIFIER).value
+        self._consume_optional_semicolon()
+        return Truncate(name)
+
     # =========================
     # INSERT
     # =========================
@@ -151,8 +242,18 @@ class Parser:
         self._expect(TokenType.KEYWORD, "INTO")
         table_name = self._expect(TokenType.IDENTIFIER).value
         self._expect(TokenType.KEYWORD, "VALUES")
-        self._expect(TokenType.SYMBOL, "(")
 
+        # VALUES (...), (...), ...: one tuple per row
+        rows = [self._parse_values_tuple()]
+        while self._peek().value == ",":
+            self._advance()
+            rows.append(self._parse_values_tuple())
+
+        self._consume_optional_semicolon()
+        return Insert(table=table_name, values=rows[0], rows=rows)
+
+    def _parse_values_tuple(self) -> List[Literal]:
+        self._expect(TokenType.SYMBOL, "(")
         values = []
         while True:
             tok = self._peek()
@@ -167,12 +268,9 @@ class Parser:
 
             if self._peek().value == ")":
                 self._advance()
-                break
+                return values
             self._expect(TokenType.SYMBOL, ",")
 
-        self._consume_optional_semicolon()
-        return Insert(table=table_name, values=values)
-
     # =========================
     # UPDATE
     # =========================
@@ -196,7 +294,7 @@ class Parser:
         where = None
         if self._peek().value.upper() == "WHERE":
             self._advance()
-            where = self._parse_binary_expression()
+            where = self._parse_where()
 
         self._consume_optional_semicolon()
         return Update(table, assignments, where)
@@ -213,7 +311,7 @@ class Parser:
         where = None
         if self._peek().value.upper() == "WHERE":
             self._advance()
-            where = self._parse_binary_expression()
+            where = self._parse_where()
 
         self._consume_optional_semicolon()
         return Delete(table, where)
@@ -309,7 +407,7 @@ class Parser:
         where = None
         if self._peek().value.upper() == "WHERE":
             self._advance()
-            where = self._parse_binary_expression()
+            where = self._parse_where()
 
         group_by = None
         if self._peek().value.upper() == "GROUP":
@@ -378,6 +476,13 @@ class Parser:
     # WHERE helper
     # =========================
 
+    def _parse_where(self):
+        conditions = [self._parse_binary_expression()]
+        while self._peek().value.upper() == "AND":
+            self._advance()
+            conditions.append(self._parse_binary_expression())
+        return conditions[0] if len(conditions) == 1 else Conjunction(conditions)
+
     def _parse_binary_expression(self) -> BinaryExpression:
         left_col = self._expect(TokenType.IDENTIFIER).value
         # Handle qualified column names in WHERE clause
@@ -18,7 +18,7 @@ class Token(NamedTuple):
 KEYWORDS = {
     "CREATE", "TABLE", "DROP",
     "INSERT", "INTO", "VALUES",
-    "SELECT", "FROM", "WHERE",
+    "SELECT", "FROM", "WHERE", "AND",
     "UPDATE", "SET", "DELETE",
     "JOIN", "ON",
     "GROUP", "BY", "HAVING",
@@ -26,14 +26,18 @@ KEYWORDS = {
     "LIMIT", "OFFSET",
     "PRIMARY", "KEY", "NOT", "NULL",
     "UNIQUE", "AUTO_INCREMENT",
-    "REFERENCES",
+    "REFERENCES", "CASCADE", "RESTRICT",
     "INTEGER", "INT", "FLOAT",
     "VARCHAR", "BOOLEAN", "TEXT",
     "DATE", "TIMESTAMP",
     "SHOW", "TABLES",
     "INNER", "AS",
+    "VACUUM", "TRUNCATE",
+    "INDEX", "USING", "INCLUDE",
 }
 SYMBOLS = {"(", ")", ",", ";", "=", "<", ">", "*", "."}
+# Two-character comparison operators; "<>" is read as "!="
+OPERATORS = {"<=": "<=", ">=": ">=", "!=": "!=", "<>": "!="}
 
 
 class Tokenizer:
@@ -90,6 +94,9 @@ class Tokenizer:
                         while self._peek().isdigit():
                             self._advance()
                     tokens.append(Token(TokenType.LITERAL, self.sql[start : self.pos]))
+            elif self.sql[self.pos : self.pos + 2] in OPERATORS:
+                tokens.append(Token(TokenType.SYMBOL, OPERATORS[self.sql[self.pos : self.pos + 2]]))
+                self.pos += 2
             elif current in SYMBOLS:
                 tokens.append(Token(TokenType.SYMBOL, current))
                 self._advance()
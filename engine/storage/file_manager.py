@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from typing import Union
 from engine.exceptions import EngineError
@@ -43,3 +44,11 @@ class FileManager:
     def flush(self) -> None:
         """For explicit syncing; in simple implementation, no-op."""
         pass
+
+    def sync(self) -> None:
+        """Force written pages to stable storage (fsync)."""
+        try:
+            with self.path.open("r+b") as f:
+                os.fsync(f.fileno())
+        except Exception as e:
+            raise EngineError(f"Failed to sync {self.path}") from e
@@ -0,0 +1,58 @@
+from typing import Iterable, List, Optional
+
+
+class FreePageList:
+    """
+    Pages released by DROP TABLE / TRUNCATE TABLE, kept as sorted
+    [first_page, page_count] runs so releasing a table costs O(extents).
+
+    The list is persisted as part of the system catalog; allocation hands
+    out the lowest free page first to keep the file dense.
+    """
+
+    def __init__(self, extents: Optional[Iterable[List[int]]] = None):
+        self.extents: List[List[int]] = []
+        for start, length in extents or []:
+            self.release(start, length)
+
+    def __len__(self) -> int:
+        return sum(length for _, length in self.extents)
+
+    def release(self, start: int, length: int = 1) -> None:
+        """Return `length` pages starting at `start`, merging adjacent runs."""
+        if length <= 0:
+            return
+        self.extents.append([start, length])
+        self.extents.sort()
+        merged: List[List[int]] = []
+        for run_start, run_length in self.extents:
+            if merged and sum(merged[-1]) >= run_start:
+                last = merged[-1]
+                last[1] = max(sum(last), run_start + run_length) - last[0]
+            else:
+                merged.append([run_start, run_length])
+        self.extents = merged
+
+    def allocate(self) -> Optional[int]:
+        """Take the lowest free page, or None when the list is empty."""
+        if not self.extents:
+            return None
+        first = self.extents[0]
+        page_num = first[0]
+        first[0] += 1
+        first[1] -= 1
+        if first[1] == 0:
+            self.extents.pop(0)
+        return page_num
+
+    def take(self, page_num: int) -> None:
+        """Remove `page_num` from the list, if it is free."""
+        for i, (start, length) in enumerate(self.extents):
+            if start <= page_num < start + length:
+                before = [start, page_num - start]
+                after = [page_num + 1, start + length - page_num - 1]
+                self.extents[i : i + 1] = [run for run in (before, after) if run[1]]
+                return
+
+    def to_list(self) -> List[List[int]]:
+        return [list(e) for e in self.extents]
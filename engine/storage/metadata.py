@@ -0,0 +1,175 @@
+import json
+import struct
+import zlib
+from typing import Callable, List, Optional
+from engine.exceptions import EngineError, PageError
+from engine.storage.pager import Pager
+
+
+class MetadataStore:
+    """
+    Stores the system catalog in reserved metadata pages.
+
+    Page 0 is the superblock:
+      magic (4s) | version (H) | page_size (I) | generation (Q) |
+      active_slot (B) | clean (B) | slot_root[0] (I) | slot_root[1] (I) |
+      catalog_length (I) | catalog_crc32 (I)
+
+    The catalog document (JSON) lives in one of two page chains ("slots").
+    Each chain page starts with next_page (I) | used_bytes (H). A save writes
+    the new document into the inactive slot, syncs it, then rewrites the
+    superblock to point at it. The superblock write is the commit point: a
+    crash before it leaves the previous catalog intact, so DDL is atomic.
+
+    `clean` is cleared by the first write after a save and set again by the
+    next save; an unclean superblock tells the engine that counters kept
+    only in memory (row counts) may be stale.
+    """
+
+    MAGIC = b"PJDB"
+    VERSION = 3
+    SUPERBLOCK = struct.Struct(">4sHIQBBIIII")
+    CHAIN_HEADER = struct.Struct(">IH")
+
+    def __init__(self, pager: Pager, allocate_page: Callable[[], int]):
+        self.pager = pager
+        self.allocate_page = allocate_page
+        self.generation = 0
+        self.active_slot = 0
+        self.clean = True
+        self.slot_roots = [0, 0]
+        self._slot_pages: List[Optional[List[int]]] = [None, None]
+        self._length = 0
+        self._crc = 0
+
+    # ------------------------------------------------------------------
+    # SUPERBLOCK
+    # ------------------------------------------------------------------
+
+    def _read_superblock(self):
+        page = self.pager.get_page(0)
+        raw = page.read(0, self.SUPERBLOCK.size)
+        if raw == b"\x00" * self.SUPERBLOCK.size:
+            return None
+        fields = self.SUPERBLOCK.unpack(raw)
+        if fields[0] != self.MAGIC:
+            raise EngineError(
+                f"{self.pager.file_manager.path} is not a database file (bad superblock)"
+            )
+        if fields[1] != self.VERSION:
+            raise EngineError(f"Unsupported database file version {fields[1]}")
+        if fields[2] != self.pager.page_size:
+            raise EngineError(
+                f"Database file uses {fields[2]}-byte pages, engine configured for "
+                f"{self.pager.page_size}"
+            )
+        return fields
+
+    def _write_superblock(self, length: int, crc: int) -> None:
+        page = self.pager.get_page(0)
+        page.write(
+            0,
+            self.SUPERBLOCK.pack(
+                self.MAGIC,
+                self.VERSION,
+                self.pager.page_size,
+                self.generation,
+                self.active_slot,
+                1 if self.clean else 0,
+                self.slot_roots[0],
+                self.slot_roots[1],
+                length,
+                crc,
+            ),
+        )
+        self.pager.flush_page(0)
+        self.pager.file_manager.sync()
+
+    # ------------------------------------------------------------------
+    # CATALOG DOCUMENT
+    # ------------------------------------------------------------------
+
+    def load(self) -> Optional[dict]:
+        """Return the committed catalog document, or None for a new file."""
+        fields = self._read_superblock()
+        if fields is None:
+            return None
+        (_, _, _, self.generation, self.active_slot, clean,
+         root0, root1, length, crc) = fields
+        self.clean = bool(clean)
+        self.slot_roots = [root0, root1]
+        self._length, self._crc = length, crc
+
+        data = self._read_chain(self.slot_roots[self.active_slot], length)
+        if zlib.crc32(data) != crc:
+            raise PageError("Catalog checksum mismatch")
+        return json.loads(data.decode("utf-8"))
+
+    def save(self, build_document: Callable[[], dict]) -> None:
+        """
+        Atomically replace the catalog with `build_document()`.
+
+        The document is rebuilt after any page allocation, since allocating
+        chain pages moves the file's high-water mark recorded in it.
+        """
+        slot = 1 - self.active_slot
+        pages = self._chain_pages(slot)
+        payload = self.pager.page_size - self.CHAIN_HEADER.size
+
+        while True:
+            data = json.dumps(build_document(), separators=(",", ":")).encode("utf-8")
+            needed = max(1, -(-len(data) // payload))
+            if needed <= len(pages):
+                break
+            while len(pages) < needed:
+                pages.append(self.allocate_page())
+
+        for i, page_num in enumerate(pages):
+            chunk = data[i * payload : (i + 1) * payload]
+            next_page = pages[i + 1] if i + 1 < len(pages) else 0
+            page = self.pager.get_page(page_num)
+            page.clear()
+            page.write(0, self.CHAIN_HEADER.pack(next_page, len(chunk)))
+            page.write(self.CHAIN_HEADER.size, chunk)
+            self.pager.flush_page(page_num)
+        self.pager.file_manager.sync()
+
+        # Commit point
+        self.slot_roots[slot] = pages[0]
+        self.active_slot = slot
+        self.generation += 1
+        self.clean = True
+        self._length, self._crc = len(data), zlib.crc32(data)
+        self._write_superblock(self._length, self._crc)
+
+    def mark_unclean(self) -> None:
+        """Record that data changed since the last save (once per save)."""
+        if self.clean:
+            self.clean = False
+            self._write_superblock(self._length, self._crc)
+
+    # ------------------------------------------------------------------
+    # PAGE CHAINS
+    # ------------------------------------------------------------------
+
+    def _chain_pages(self, slot: int) -> List[int]:
+        if self._slot_pages[slot] is None:
+            pages = []
+            page_num = self.slot_roots[slot]
+            while page_num:
+                pages.append(page_num)
+                header = self.pager.get_page(page_num).read(0, self.CHAIN_HEADER.size)
+                page_num, _ = self.CHAIN_HEADER.unpack(header)
+            self._slot_pages[slot] = pages
+        return self._slot_pages[slot]
+
+    def _read_chain(self, page_num: int, length: int) -> bytes:
+        data = bytearray()
+        while page_num and len(data) < length:
+            page = self.pager.get_page(page_num)
+            next_page, used = self.CHAIN_HEADER.unpack(page.read(0, self.CHAIN_HEADER.size))
+            data += page.read(self.CHAIN_HEADER.size, used)
+            page_num = next_page
+        if len(data) != length:
+            raise PageError("Catalog chain is truncated")
+        return bytes(data)
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import struct
 from typing import Any
 
 
@@ -6,6 +7,10 @@ class Page:
     """
     Represents a fixed-size page of bytes in memory.
     Provides safe read/write access with bounds checking.
+
+    While `journal` is a list, every write() and clear() appends
+    (offset, old bytes, new bytes) to it, so the engine can log heap page
+    changes to the write-ahead log.
     """
 
     def __init__(self, size: int):
@@ -13,6 +18,7 @@ class Page:
             raise ValueError("Page size must be positive")
         self.size = size
         self.data = bytearray(size)
+        self.journal = None
 
     def read(self, offset: int, length: int) -> bytes:
         """
@@ -31,10 +37,14 @@ class Page:
         end = offset + len(content)
         if offset < 0 or end > self.size:
             raise IndexError("Write exceeds page boundaries")
+        if self.journal is not None:
+            self.journal.append((offset, bytes(self.data[offset:end]), bytes(content)))
         self.data[offset:end] = content
 
     def clear(self) -> None:
         """Reset all page bytes to zero."""
+        if self.journal is not None:
+            self.journal.append((0, bytes(self.data), bytes(self.size)))
         self.data[:] = b"\x00" * self.size
 
 
@@ -42,9 +52,16 @@ class RowPage:
     """
     Wraps a Page to store multiple variable-length rows safely.
 
-    Header layout (4 bytes total):
+    Header layout (12 bytes total):
       bytes 0-1: next_free offset (2 bytes)
       bytes 2-3: row_count (2 bytes)
+      bytes 4-11: page LSN (8 bytes), the write-ahead log record that last
+                  changed the page; recovery redoes only newer records
+
+    Each row is a 2-byte length followed by the row bytes. Engine heap rows
+    start with a version header (VERSION): xmin, the transaction that
+    created this version of the row, and xmax, the one that deleted it
+    (0 while it is live); see engine.transaction.snapshot.
 
     Notes:
       - Offsets are reconstructed strictly using row_count.
@@ -52,7 +69,8 @@ class RowPage:
       - Supports future extensions: UPDATE/DELETE can use offsets for in-place updates.
     """
 
-    HEADER_SIZE = 4  # 2 bytes for next_free + 2 bytes for row_count
+    HEADER_SIZE = 12  # next_free (2) + row_count (2) + page LSN (8)
+    VERSION = struct.Struct(">QQ")  # xmin, xmax
 
     def __init__(self, page: Page):
         self.page = page
@@ -94,6 +112,15 @@ class RowPage:
         self.page.write(2, self.row_count.to_bytes(2, "big"))
 
 
+    @staticmethod
+    def page_lsn(page: Page) -> int:
+        return int.from_bytes(page.data[4:12], "big")
+
+    @staticmethod
+    def set_page_lsn(page: Page, lsn: int) -> None:
+        """Stamp the page LSN (not journaled: it is not part of any change)."""
+        page.data[4:12] = lsn.to_bytes(8, "big")
+
     def can_fit(self, data: bytes) -> bool:
         """Check if a row can fit in the remaining page space."""
         return self.next_free + 2 + len(data) <= self.page.size
@@ -150,6 +177,50 @@ class RowPage:
 
         return rows
 
+    def row_at(self, offset: int):
+        """
+        Return the row stored at `offset`, or None if it is deleted or invalid.
+
+        Offsets never move (except through compact()), so (page, offset)
+        pairs serve as stable row IDs.
+        """
+        if offset < self.HEADER_SIZE or offset + 2 > self.next_free:
+            return None
+        length = int.from_bytes(self.page.read(offset, 2), "big", signed=True)
+        if length <= 0 or offset + 2 + length > self.next_free:
+            return None
+        return self.page.read(offset + 2, length)
+
+    def versions(self):
+        """(offset, xmin, xmax, record bytes) of every row version on the page."""
+        size = self.VERSION.size
+        for offset in self.offsets:
+            raw = self.row_at(offset)
+            if raw is not None:
+                xmin, xmax = self.VERSION.unpack_from(raw)
+                yield offset, xmin, xmax, raw[size:]
+
+    @staticmethod
+    def read_version(page: Page, offset: int):
+        """
+        (xmin, xmax, record bytes) of the row version at `offset`, or None.
+        Reads the slot alone: unlike RowPage(page), nothing is parsed or
+        written back, so it is safe beside a writer changing the page.
+        """
+        data = page.data
+        if offset < RowPage.HEADER_SIZE or offset + 2 > int.from_bytes(data[0:2], "big"):
+            return None
+        length = int.from_bytes(data[offset : offset + 2], "big", signed=True)
+        if length < RowPage.VERSION.size:
+            return None
+        raw = bytes(data[offset + 2 : offset + 2 + length])
+        xmin, xmax = RowPage.VERSION.unpack_from(raw)
+        return xmin, xmax, raw[RowPage.VERSION.size :]
+
+    def set_xmax(self, offset: int, xid: int) -> None:
+        """Mark the row version at `offset` deleted by transaction `xid`."""
+        self.page.write(offset + 2 + 8, xid.to_bytes(8, "big"))
+
     # --- Future-proof methods for in-place updates/deletes ---
     def update_row(self, index: int, new_data: bytes) -> bool:
         """Replace a row by index if new_data length matches existing row length."""
@@ -171,4 +242,23 @@ class RowPage:
         old_length = int.from_bytes(self.page.read(offset, 2), "big")
         # Store old length negated so we can skip the right number of bytes
         self.page.write(offset, (-old_length).to_bytes(2, "big", signed=True))
+        self.row_count = max(self.row_count - 1, 0)
+        self.page.write(2, self.row_count.to_bytes(2, "big"))
         return True
+
+    def compact(self, keep=None) -> int:
+        """
+        Rewrite the page keeping only live rows, reclaiming the space held by
+        deleted rows (and by the rows `keep`, if given, rejects). Returns the
+        number of rows kept.
+        """
+        rows = self.get_rows()
+        if keep is not None:
+            rows = [row for row in rows if keep(row)]
+        self.page.clear()
+        self.next_free = self.HEADER_SIZE
+        self.row_count = 0
+        self.offsets = []
+        for row in rows:
+            self.add_row(row)
+        return len(rows)
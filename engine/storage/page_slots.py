@@ -0,0 +1,126 @@
+import struct
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from engine.exceptions import PageError
+from engine.storage.pager import Pager
+
+
+class PageSlots:
+    """
+    Fixed-size records keyed by heap page, stored in a chain of pages.
+
+    Per-page summaries of a table (Bloom filters, zone maps) each take one
+    slot of `slot_size` bytes, allocated the first time a heap page gets a
+    row. The caller reads and writes the slot bytes in place through the
+    pager and marks the page dirty.
+
+    Page layout:
+      kind (B) | reserved (B) | count (H) | next (I)
+    followed by `count` entries heap page (I) | slot (`slot_size` bytes).
+    The first page is the root recorded in the catalog and never moves;
+    `kind` tells the structures apart when the chain is read back.
+    """
+
+    HEADER = struct.Struct(">BBHI")
+    HEAP_PAGE = struct.Struct(">I")
+
+    def __init__(
+        self,
+        pager: Pager,
+        allocate_page: Callable[[], int],
+        free_page: Callable[[int], None],
+        kind: int,
+        slot_size: int,
+        root_page: Optional[int] = None,
+        extents: Optional[List[List[int]]] = None,
+    ):
+        self.pager = pager
+        self.allocate_page = allocate_page
+        self.free_page = free_page
+        self.kind = kind
+        self.entry_size = self.HEAP_PAGE.size + slot_size
+        self.per_page = (pager.page_size - self.HEADER.size) // self.entry_size
+        if self.per_page < 1:
+            raise PageError(f"A {slot_size}-byte slot does not fit in a page")
+        # Pages owned by the chain, as [first_page, page_count] runs
+        self.extents: List[List[int]] = [list(e) for e in extents or []]
+        # heap page -> (chain page, offset of its slot in that page)
+        self._slots: Dict[int, Tuple[int, int]] = {}
+
+        if root_page is None:
+            self.root_page = self._allocate()
+            self._chain = [self.root_page]
+            self._write_header(self.root_page, 0, 0)
+        else:
+            self.root_page = root_page
+            self._read_chain()
+
+    def _allocate(self) -> int:
+        page_num = self.allocate_page()
+        if self.extents and sum(self.extents[-1]) == page_num:
+            self.extents[-1][1] += 1
+        else:
+            self.extents.append([page_num, 1])
+        return page_num
+
+    def _write_header(self, page_num, count, next_page) -> None:
+        page = self.pager.get_page(page_num)
+        page.write(0, self.HEADER.pack(self.kind, 0, count, next_page))
+        self.pager.mark_dirty(page_num)
+
+    def _read_chain(self) -> None:
+        self._chain = []
+        page_num = self.root_page
+        while page_num:
+            data = self.pager.get_page(page_num).data
+            kind, _, count, next_page = self.HEADER.unpack_from(data, 0)
+            if kind != self.kind:
+                raise PageError(f"Page {page_num} is not a kind {self.kind} slot page")
+            self._chain.append(page_num)
+            for i in range(count):
+                pos = self.HEADER.size + i * self.entry_size
+                heap_page = self.HEAP_PAGE.unpack_from(data, pos)[0]
+                self._slots[heap_page] = (page_num, pos + self.HEAP_PAGE.size)
+            page_num = next_page
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def items(self) -> Iterator[Tuple[int, Tuple[int, int]]]:
+        """(heap page, (chain page, offset)) of every slot."""
+        return iter(self._slots.items())
+
+    def get(self, heap_page) -> Optional[Tuple[int, int]]:
+        """Where the slot of `heap_page` lives, or None if it has none."""
+        return self._slots.get(heap_page)
+
+    def slot(self, heap_page) -> Tuple[int, int]:
+        """Where the slot of `heap_page` lives, adding a zeroed one."""
+        slot = self._slots.get(heap_page)
+        if slot is not None:
+            return slot
+        last = self._chain[-1]
+        count = self.HEADER.unpack_from(self.pager.get_page(last).data, 0)[2]
+        if count == self.per_page:
+            new_page = self._allocate()
+            self._write_header(new_page, 0, 0)
+            self._write_header(last, count, new_page)
+            self._chain.append(new_page)
+            last, count = new_page, 0
+        pos = self.HEADER.size + count * self.entry_size
+        page = self.pager.get_page(last)
+        page.write(pos, self.HEAP_PAGE.pack(heap_page))
+        self._write_header(last, count + 1, 0)
+        slot = self._slots[heap_page] = (last, pos + self.HEAP_PAGE.size)
+        return slot
+
+    def destroy(self) -> None:
+        """Return every page of the chain to the allocator."""
+        for start, length in self.extents:
+            for page_num in range(start, start + length):
+                self.free_page(page_num)
+        self.extents = []
+        self._slots.clear()
+
+    def descriptor(self) -> dict:
+        """Catalog entry locating the chain on disk."""
+        return {"root": self.root_page, "extents": [list(e) for e in self.extents]}
@@ -1,6 +1,7 @@
+import threading
 from engine.storage.page import Page
 from engine.storage.file_manager import FileManager
-from typing import Dict, Iterator
+from typing import Callable, Dict, Iterator, Optional, Set
 
 
 class Pager:
@@ -12,15 +13,31 @@ class Pager:
         self.file_manager = file_manager
         self.page_size = page_size
         self.cache: Dict[int, Page] = {}
+        # Pages modified in cache but not yet written back
+        self.dirty: Set[int] = set()
+        # Serializes cache misses, so concurrent readers of one page (index
+        # lookups from several threads) never install two copies of it
+        self._load_latch = threading.Lock()
+        # Called with (page_num, page) before a page is written back; the
+        # engine uses it to force the write-ahead log first
+        self.before_write: Optional[Callable[[int, Page], None]] = None
 
     def get_page(self, page_num: int) -> Page:
         """
         Return a page from cache or load from disk if not present.
         Newly allocated pages are always zeroed to prevent phantom rows.
         """
-        if page_num in self.cache:
-            return self.cache[page_num]
+        page = self.cache.get(page_num)
+        if page is not None:
+            return page
+        with self._load_latch:
+            # Another thread may have loaded it while this one waited
+            page = self.cache.get(page_num)
+            if page is None:
+                page = self._load(page_num)
+            return page
 
+    def _load(self, page_num: int) -> Page:
         # Attempt to read page from disk
         try:
             data = self.file_manager.read_page(page_num, self.page_size)
@@ -47,7 +64,23 @@ class Pager:
         if page_num not in self.cache:
             return
         page = self.cache[page_num]
+        if self.before_write is not None:
+            self.before_write(page_num, page)
         self.file_manager.write_page(page_num, page.data)
+        self.dirty.discard(page_num)
+
+    def mark_dirty(self, page_num: int) -> None:
+        """
+        Record that a cached page was modified and still needs writing.
+        """
+        self.dirty.add(page_num)
+
+    def flush_all(self) -> None:
+        """
+        Write every dirty cached page back to disk.
+        """
+        for page_num in sorted(self.dirty):
+            self.flush_page(page_num)
 
     def iter_pages(self, file_id: int) -> Iterator[Page]:
         """
@@ -0,0 +1,215 @@
+import struct
+from typing import Callable, Dict, List, Optional
+from engine.storage.page_slots import PageSlots
+from engine.storage.pager import Pager
+
+
+class ZoneMap:
+    """
+    Per-page min / max / NULL count of every column of one table.
+
+    A scan consults might_match() before decoding a heap page and skips the
+    page when some ANDed `col <op> literal` condition cannot hold for any
+    value in the page's [min, max] range (or the column is NULL in every
+    row there). Tables filled in id or time order get narrow, mostly
+    disjoint ranges, so `WHERE id > n` only reads the pages past n.
+
+    Every new row version (an INSERT, or the new version an UPDATE writes)
+    widens its page's ranges; deleted versions stay on the page until
+    VACUUM, so nothing is taken back. Ranges therefore stay correct bounds
+    but may be loose until VACUUM rebuilds the map.
+
+    Each heap page's statistics are one slot (kind 6) of a PageSlots chain.
+    Per column the slot holds
+      flags (B) | nulls (H) | min | max
+    where min / max are INT (q), FLOAT (d) or, for TEXT, a length (B) and
+    the first TEXT_PREFIX bytes of UTF-8. A truncated min is still a lower
+    bound; a truncated max is flagged and read back as its prefix followed
+    by the highest code point, an upper bound for every string sharing it.
+    """
+
+    ZONE = 6
+    TEXT_PREFIX = 15
+    # Column flags: any non-NULL value seen, max truncated, no usable range
+    HAS_VALUES, TRUNCATED, UNBOUNDED = 1, 2, 4
+    TOP_CHAR = "\U0010ffff"
+
+    COLUMN = struct.Struct(">BH")
+    VALUE_FORMATS = {int: struct.Struct(">q"), float: struct.Struct(">d")}
+
+    def __init__(
+        self,
+        pager: Pager,
+        allocate_page: Callable[[], int],
+        free_page: Callable[[int], None],
+        columns,
+        root_page: Optional[int] = None,
+        extents: Optional[List[List[int]]] = None,
+    ):
+        self.pager = pager
+        self.names = [c.name.lower() for c in columns]
+        self.dtypes = [c.dtype for c in columns]
+        self.value_sizes = [
+            self.VALUE_FORMATS[t].size if t in self.VALUE_FORMATS else 1 + self.TEXT_PREFIX
+            for t in self.dtypes
+        ]
+        slot_size = sum(self.COLUMN.size + 2 * size for size in self.value_sizes)
+        self._slots = PageSlots(
+            pager, allocate_page, free_page, self.ZONE, slot_size,
+            root_page=root_page, extents=extents,
+        )
+        # heap page -> per column [min, max, nulls, flags]
+        self._zones: Dict[int, List[list]] = {}
+        for heap_page, (page_num, offset) in self._slots.items():
+            self._zones[heap_page] = self._decode(self.pager.get_page(page_num).data, offset)
+
+    @property
+    def extents(self) -> List[List[int]]:
+        return self._slots.extents
+
+    # ------------------------------------------------------------------
+    # MAINTENANCE
+    # ------------------------------------------------------------------
+
+    def add(self, heap_page, values) -> None:
+        """Account for a row with `values` (in column order) on `heap_page`."""
+        self._widen(heap_page, values)
+        self._write(heap_page)
+
+    def bulk_load(self, rows) -> None:
+        """Fill an empty map from (heap page, values) pairs in any order."""
+        for heap_page, values in rows:
+            self._widen(heap_page, values)
+        for heap_page in sorted(self._zones):
+            self._write(heap_page)
+
+    def _widen(self, heap_page, values) -> None:
+        zone = self._zones.get(heap_page)
+        if zone is None:
+            zone = self._zones[heap_page] = [[None, None, 0, 0] for _ in self.dtypes]
+        for stats, value in zip(zone, values):
+            if value is None:
+                stats[2] += 1
+                continue
+            if stats[3] & self.UNBOUNDED:
+                continue
+            if isinstance(value, str):
+                low = high = value
+                if len(value.encode("utf-8")) > self.TEXT_PREFIX:
+                    low = self._prefix(value)
+                    high = low + self.TOP_CHAR
+            else:
+                low = high = value
+                if isinstance(value, int) and not -(2 ** 63) <= value < 2 ** 63:
+                    stats[3] |= self.UNBOUNDED
+                    continue
+            if not stats[3] & self.HAS_VALUES:
+                stats[0], stats[1] = low, high
+                stats[3] |= self.HAS_VALUES
+                continue
+            if low < stats[0]:
+                stats[0] = low
+            if high > stats[1]:
+                stats[1] = high
+
+    def _prefix(self, value: str) -> str:
+        return value.encode("utf-8")[: self.TEXT_PREFIX].decode("utf-8", errors="ignore")
+
+    # ------------------------------------------------------------------
+    # PRUNING
+    # ------------------------------------------------------------------
+
+    def might_match(self, heap_page, conditions) -> bool:
+        """
+        False only if no row on `heap_page` can satisfy every (column, op,
+        value) condition; values must already have the column's type.
+        """
+        zone = self._zones.get(heap_page)
+        if zone is None:
+            return False  # no row was ever stored there
+        for column, op, value in conditions:
+            try:
+                stats = zone[self.names.index(column)]
+            except ValueError:
+                continue
+            flags = stats[3]
+            if flags & self.UNBOUNDED:
+                continue
+            if not flags & self.HAS_VALUES:
+                return False  # NULL in every row: no comparison holds
+            low, high = stats[0], stats[1]
+            try:
+                if op == "=" and not low <= value <= high:
+                    return False
+                if op == "<" and not low < value:
+                    return False
+                if op == "<=" and not low <= value:
+                    return False
+                if op == ">" and not high > value:
+                    return False
+                if op == ">=" and not high >= value:
+                    return False
+            except TypeError:
+                continue
+        return True
+
+    # ------------------------------------------------------------------
+    # ENCODING
+    # ------------------------------------------------------------------
+
+    def _write(self, heap_page) -> None:
+        page_num, offset = self._slots.slot(heap_page)
+        parts = []
+        for (low, high, nulls, flags), dtype, size in zip(
+            self._zones[heap_page], self.dtypes, self.value_sizes
+        ):
+            if dtype is str and flags & self.HAS_VALUES and high.endswith(self.TOP_CHAR):
+                flags |= self.TRUNCATED
+                high = high[: -len(self.TOP_CHAR)]
+            else:
+                flags &= ~self.TRUNCATED
+            parts.append(self.COLUMN.pack(flags, min(nulls, 0xFFFF)))
+            for value in (low, high):
+                parts.append(self._encode_value(value, dtype, size))
+        self.pager.get_page(page_num).write(offset, b"".join(parts))
+        self.pager.mark_dirty(page_num)
+
+    def _encode_value(self, value, dtype, size) -> bytes:
+        if value is None:
+            return b"\x00" * size
+        if dtype is str:
+            raw = value.encode("utf-8")
+            return bytes([len(raw)]) + raw.ljust(size - 1, b"\x00")
+        return self.VALUE_FORMATS[dtype].pack(value)
+
+    def _decode(self, data, pos) -> List[list]:
+        zone = []
+        for dtype, size in zip(self.dtypes, self.value_sizes):
+            flags, nulls = self.COLUMN.unpack_from(data, pos)
+            pos += self.COLUMN.size
+            low_high = []
+            for _ in range(2):
+                if dtype is str:
+                    length = data[pos]
+                    low_high.append(bytes(data[pos + 1 : pos + 1 + length]).decode("utf-8"))
+                else:
+                    low_high.append(self.VALUE_FORMATS[dtype].unpack_from(data, pos)[0])
+                pos += size
+            low, high = low_high if flags & self.HAS_VALUES else (None, None)
+            if flags & self.TRUNCATED:
+                high += self.TOP_CHAR
+            zone.append([low, high, nulls, flags & ~self.TRUNCATED])
+        return zone
+
+    # ------------------------------------------------------------------
+    # PERSISTENCE
+    # ------------------------------------------------------------------
+
+    def destroy(self) -> None:
+        """Return every page of the map to the allocator."""
+        self._slots.destroy()
+        self._zones.clear()
+
+    def descriptor(self) -> dict:
+        """Catalog entry locating the map on disk."""
+        return self._slots.descriptor()
@@ -1,34 +1,393 @@
 import threading
-from collections import defaultdict
+import time
+from collections import deque
+
+from engine.exceptions import DeadlockError, LockTimeoutError, TransactionError
+
+
+class _Request:
+    """A lock request waiting in a resource's queue, woken by its own event."""
+
+    __slots__ = ("txn_id", "mode", "since", "granted", "error", "event")
+
+    def __init__(self, txn_id, mode):
+        self.txn_id = txn_id
+        self.mode = mode
+        self.since = time.monotonic()
+        self.granted = False
+        self.error = None
+        self.event = threading.Event()
 
 
 class LockManager:
-    def __init__(self):
-        self.locks = defaultdict(lambda: {"readers": 0, "writer": None})
-        self.condition = threading.Condition()
+    """
+    Hierarchical (multiple granularity) locks: tables, pages and rows.
+
+    A resource is a path: (table,), (table, page_num) or a row under either,
+    (table, page_num, row ID) for a heap row ID (page_num, offset) or
+    (table, key) otherwise; see table(), page() and row(). A plain string
+    names a table. Locking a resource in S or X first takes the matching
+    intention lock (IS or IX) on each of its ancestors, top down, so a
+    table lock conflicts with row locks below it without visiting them,
+    and writers of different rows of a table only share compatible IX
+    locks on it.
+
+    Modes (COMPATIBLE says which can be held together by different
+    transactions):
+      IS   intends to read something below
+      IX   intends to write something below
+      S    reads the whole resource
+      SIX  S plus IX: reads all of it, writes parts below
+      X    writes the whole resource
+
+    A transaction asking again for a resource it holds gets the weakest
+    mode covering both requests (S then IX is SIX), waiting like any
+    other request if that conflicts with another holder. Locks are held
+    until release() or, for strict two-phase locking, release_all() at
+    commit or rollback.
+
+    Each resource has a FIFO queue of waiting requests: a request is
+    granted at once only when nothing is queued before it (upgrades by a
+    holder queue ahead of other requests), and a release grants from the
+    head of the queues of the resources it frees, waking only the
+    requests it grants. A request waits at most `lock_timeout` seconds
+    (None: no limit) before raising LockTimeoutError. While requests wait,
+    a background thread checks the wait-for graph every
+    `deadlock_interval` seconds and fails the youngest request of each
+    cycle with DeadlockError; its transaction should roll back. stats()
+    reports how many requests waited and for how long.
+    """
+
+    MODES = ("IS", "IX", "S", "SIX", "X")
+    COMPATIBLE = {
+        "IS": {"IS", "IX", "S", "SIX"},
+        "IX": {"IS", "IX"},
+        "S": {"IS", "S"},
+        "SIX": {"IS"},
+        "X": set(),
+    }
+    # Modes each mode grants at least the rights of
+    COVERS = {
+        "IS": {"IS"},
+        "IX": {"IS", "IX"},
+        "S": {"IS", "S"},
+        "SIX": {"IS", "IX", "S", "SIX"},
+        "X": {"IS", "IX", "S", "SIX", "X"},
+    }
+    INTENTION = {"IS": "IS", "S": "IS", "IX": "IX", "SIX": "IX", "X": "IX"}
+
+    def __init__(self, lock_timeout=None, deadlock_interval=0.1):
+        self.lock_timeout = lock_timeout
+        self.deadlock_interval = deadlock_interval
+        # resource -> {txn_id: mode held}
+        self.locks = {}
+        # resource -> deque of _Request, in arrival order
+        self.queues = {}
+        # txn_id -> resources it holds, in acquisition order
+        self.owned = {}
+        # txn_id -> (resource, _Request) it is waiting for
+        self.waiting = {}
+        self._mutex = threading.Lock()
+        self._detector = None
+        self._stats = {
+            "requests": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "max_wait": 0.0,
+            "timeouts": 0,
+            "deadlocks": 0,
+        }
+
+    # --- Resources ---
+
+    @staticmethod
+    def table(name):
+        return (name,)
+
+    @staticmethod
+    def page(table_name, page_num):
+        return (table_name, page_num)
+
+    @staticmethod
+    def row(table_name, rid):
+        """A row's resource: under its page for a heap row ID (page_num, offset)."""
+        if isinstance(rid, tuple):
+            return (table_name, rid[0], rid)
+        return (table_name, rid)
+
+    @staticmethod
+    def _path(resource):
+        return (resource,) if isinstance(resource, str) else tuple(resource)
+
+    @classmethod
+    def combine(cls, held, requested):
+        """The weakest mode covering both `held` and `requested`."""
+        if held is None:
+            return requested
+        return next(m for m in cls.MODES if {held, requested} <= cls.COVERS[m])
+
+    # --- Locking ---
+
+    def acquire(self, txn_id, resource, mode, timeout=None) -> None:
+        """
+        Lock `resource` in `mode` for `txn_id`, after the intention lock on
+        each ancestor, waiting while another transaction holds a mode that
+        conflicts or an earlier request is queued. `timeout` (default
+        `lock_timeout`) bounds the whole wait; on a timeout or deadlock
+        the locks already granted stay held until released.
+        """
+        if mode not in self.COMPATIBLE:
+            raise ValueError(f"Unknown lock mode {mode}")
+        path = self._path(resource)
+        timeout = self.lock_timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._mutex:
+            for depth in range(1, len(path)):
+                self._lock(txn_id, path[:depth], self.INTENTION[mode], deadline)
+            self._lock(txn_id, path, mode, deadline)
+
+    def _lock(self, txn_id, resource, mode, deadline) -> None:
+        """One resource; called, and returns, with the mutex held."""
+        holders = self.locks.get(resource, {})
+        held = holders.get(txn_id)
+        wanted = self.combine(held, mode)
+        if wanted == held:
+            return
+        self._stats["requests"] += 1
+        queue = self.queues.get(resource)
+        # Waiting requests go first, except that an upgrade only waits
+        # for other upgrades: the rest may be waiting on this holder
+        ahead = queue and (held is None or queue[0].txn_id in holders)
+        if not ahead and self._grantable(resource, txn_id, wanted):
+            self._grant(txn_id, resource, wanted)
+            return
+
+        request = _Request(txn_id, wanted)
+        queue = self.queues.setdefault(resource, deque())
+        if held is None:
+            queue.append(request)
+        else:
+            upgrades = 0
+            while upgrades < len(queue) and queue[upgrades].txn_id in holders:
+                upgrades += 1
+            queue.insert(upgrades, request)
+        self.waiting[txn_id] = (resource, request)
+        self._start_detector()
+
+        self._mutex.release()
+        try:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            request.event.wait(remaining)
+        finally:
+            self._mutex.acquire()
+
+        if not request.granted and request.error is None:
+            del self.waiting[txn_id]
+        waited = time.monotonic() - request.since
+        self._stats["waits"] += 1
+        self._stats["wait_time"] += waited
+        self._stats["max_wait"] = max(self._stats["max_wait"], waited)
+        if request.error is not None:
+            raise request.error
+        if not request.granted:
+            self._dequeue(resource, request)
+            self._stats["timeouts"] += 1
+            raise LockTimeoutError(
+                f"Lock wait timeout: {txn_id} waited {waited:.3f}s for {wanted} on {resource}"
+            )
+
+    def _grantable(self, resource, txn_id, mode) -> bool:
+        return all(
+            held in self.COMPATIBLE[mode]
+            for other, held in self.locks.get(resource, {}).items()
+            if other != txn_id
+        )
+
+    def _grant(self, txn_id, resource, mode) -> None:
+        holders = self.locks.setdefault(resource, {})
+        if txn_id not in holders:
+            self.owned.setdefault(txn_id, []).append(resource)
+        holders[txn_id] = mode
+
+    def _wake(self, resource) -> None:
+        """Grant queued requests from the head while they fit, waking only them."""
+        queue = self.queues.get(resource)
+        while queue and self._grantable(resource, queue[0].txn_id, queue[0].mode):
+            request = queue.popleft()
+            self._grant(request.txn_id, resource, request.mode)
+            request.granted = True
+            # No longer waiting, even before its thread runs again
+            del self.waiting[request.txn_id]
+            request.event.set()
+        if not queue:
+            self.queues.pop(resource, None)
+
+    def _dequeue(self, resource, request) -> None:
+        """Withdraw a waiting request; those behind it may now be grantable."""
+        queue = self.queues.get(resource)
+        if queue is not None and request in queue:
+            queue.remove(request)
+            self._wake(resource)
+
+    def holds(self, txn_id, resource):
+        """The mode `txn_id` holds on `resource`, or None."""
+        with self._mutex:
+            return self.locks.get(self._path(resource), {}).get(txn_id)
+
+    def release(self, txn_id, resource) -> None:
+        """Release one resource (its ancestors' intention locks stay)."""
+        path = self._path(resource)
+        with self._mutex:
+            self._release(txn_id, path)
+
+    def _release(self, txn_id, path) -> None:
+        holders = self.locks.get(path)
+        if holders is None or holders.pop(txn_id, None) is None:
+            return
+        if not holders:
+            del self.locks[path]
+        self.owned[txn_id].remove(path)
+        if not self.owned[txn_id]:
+            del self.owned[txn_id]
+        self._wake(path)
+
+    def release_all(self, txn_id) -> None:
+        """Release every lock of `txn_id`, rows before the tables above them."""
+        with self._mutex:
+            for resource in reversed(self.owned.pop(txn_id, [])):
+                holders = self.locks[resource]
+                del holders[txn_id]
+                if not holders:
+                    del self.locks[resource]
+                self._wake(resource)
+
+    # --- Deadlock detection ---
+
+    def _start_detector(self) -> None:
+        if self.deadlock_interval is None or self._detector is not None:
+            return
+        self._detector = threading.Thread(
+            target=self._detect_periodically, name="deadlock-detector", daemon=True
+        )
+        self._detector.start()
+
+    def _detect_periodically(self) -> None:
+        while True:
+            time.sleep(self.deadlock_interval)
+            self.detect_deadlocks()
+            with self._mutex:
+                if not self.waiting:
+                    # Restarted by the next request that has to wait
+                    self._detector = None
+                    return
+
+    def wait_for_graph(self):
+        """{waiting txn: txns it waits for}: conflicting holders and every request queued ahead."""
+        graph = {}
+        for txn_id, (resource, request) in self.waiting.items():
+            blockers = {
+                other
+                for other, held in self.locks.get(resource, {}).items()
+                if held not in self.COMPATIBLE[request.mode]
+            }
+            for ahead in self.queues.get(resource, ()):
+                if ahead is request:
+                    break
+                blockers.add(ahead.txn_id)
+            blockers.discard(txn_id)
+            graph[txn_id] = blockers
+        return graph
+
+    @staticmethod
+    def _find_cycle(graph):
+        """Transactions forming one cycle of `graph`, or None."""
+        state = {}  # txn -> 1 on the current path, 2 done
+        for start in graph:
+            if start in state:
+                continue
+            path, stack = [], [(start, iter(graph[start]))]
+            state[start] = 1
+            path.append(start)
+            while stack:
+                node, edges = stack[-1]
+                for nxt in edges:
+                    if nxt not in graph:  # not waiting: no edges out
+                        continue
+                    if state.get(nxt) == 1:
+                        return path[path.index(nxt):]
+                    if nxt not in state:
+                        state[nxt] = 1
+                        path.append(nxt)
+                        stack.append((nxt, iter(graph[nxt])))
+                        break
+                else:
+                    state[node] = 2
+                    path.pop()
+                    stack.pop()
+        return None
+
+    def detect_deadlocks(self):
+        """
+        Break every wait cycle: fail the request of the youngest waiter in
+        each (the one that started waiting last) with DeadlockError.
+        Returns the victims' transaction IDs.
+        """
+        victims = []
+        with self._mutex:
+            while True:
+                cycle = self._find_cycle(self.wait_for_graph())
+                if cycle is None:
+                    return victims
+                victim = max(cycle, key=lambda txn: self.waiting[txn][1].since)
+                resource, request = self.waiting.pop(victim)
+                request.error = DeadlockError(
+                    f"Deadlock: {victim} aborted while waiting for {request.mode} on "
+                    f"{resource} (cycle: {' -> '.join(map(str, cycle))})"
+                )
+                request.event.set()
+                self._dequeue(resource, request)
+                self._stats["deadlocks"] += 1
+                victims.append(victim)
+
+    # --- Metrics ---
+
+    def stats(self):
+        """
+        Lock requests made (beyond ones already held), how many waited, the
+        total, mean and longest wait in seconds, timeouts and deadlock
+        victims.
+        """
+        with self._mutex:
+            stats = dict(self._stats)
+        stats["mean_wait"] = stats["wait_time"] / stats["waits"] if stats["waits"] else 0.0
+        return stats
+
+    # --- Single-resource read/write locks ---
+    # S and X locks under the original interface. A release may leave out
+    # the transaction, as it had to before locks were per transaction: it
+    # then releases the resource's only holder, if any.
 
     def acquire_read(self, resource_id, txn_id):
-        with self.condition:
-            while self.locks[resource_id]["writer"] not in (None, txn_id):
-                self.condition.wait()
-            self.locks[resource_id]["readers"] += 1
+        self.acquire(txn_id, resource_id, "S")
 
-    def release_read(self, resource_id):
-        with self.condition:
-            self.locks[resource_id]["readers"] -= 1
-            if self.locks[resource_id]["readers"] == 0:
-                self.condition.notify_all()
+    def release_read(self, resource_id, txn_id=None):
+        self._release_holder(resource_id, txn_id)
 
     def acquire_write(self, resource_id, txn_id):
-        with self.condition:
-            while (
-                self.locks[resource_id]["writer"] not in (None, txn_id)
-                or self.locks[resource_id]["readers"] > 0
-            ):
-                self.condition.wait()
-            self.locks[resource_id]["writer"] = txn_id
-
-    def release_write(self, resource_id):
-        with self.condition:
-            self.locks[resource_id]["writer"] = None
-            self.condition.notify_all()
+        self.acquire(txn_id, resource_id, "X")
+
+    def release_write(self, resource_id, txn_id=None):
+        self._release_holder(resource_id, txn_id)
+
+    def _release_holder(self, resource_id, txn_id) -> None:
+        path = self._path(resource_id)
+        with self._mutex:
+            if txn_id is None:
+                holders = self.locks.get(path, {})
+                if len(holders) > 1:
+                    raise TransactionError(
+                        f"Cannot release {resource_id} without naming a transaction: "
+                        f"{len(holders)} hold it"
+                    )
+                txn_id = next(iter(holders), None)
+            self._release(txn_id, path)
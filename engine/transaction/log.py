@@ -1,41 +1,424 @@
 import os
-import json
-from datetime import datetime
+import struct
+import threading
+import zlib
 from pathlib import Path
+from typing import Iterator, List, Optional
+
+from engine.exceptions import TransactionError
+from engine.index.key_codec import decode_key, encode_key
 
 
 class WALog:
-    def __init__(self, path=None):
+    """
+    Binary write-ahead log with group commit, split into fixed-size segments.
+
+    The log is a sequence of `segment_size`-byte files <path>.000000,
+    <path>.000001, ... Each starts with a header (MAGIC, segment size; a
+    reopened log keeps the size it was created with) and then holds records
+    framed as
+      length (I) | crc32 (I) | lsn (Q) | payload
+    where length and the CRC cover everything after the CRC. A record's LSN
+    is its byte position in the log (segment n holds LSNs from
+    n * segment_size), so LSNs increase monotonically and locate their
+    record. A record that does not fit in what is left of a segment starts
+    the next one. Reading stops at the first short, corrupt or misplaced
+    frame and carries on into the next segment only if that one starts with
+    an intact record; a segment is synced before the next one is written, so
+    this never skips a gap. Reopening zeroes whatever follows the last intact
+    record: the torn tail of a crash.
+
+    The payload is three keys in the index key encoding: (txn_id, action,
+    table), then the column names and the values of `data` (both empty
+    when `data` is None).
+
+    log() only appends to an in-memory buffer. commit() logs a COMMIT and
+    returns once it is on disk; the committer that finds no flush running
+    becomes the leader, writes everything buffered so far and fsyncs once
+    for all the committers queued behind it. With `commit_delay` (seconds)
+    the leader first waits up to that long for `group_size` committers to
+    gather, trading latency for fewer fsyncs.
+
+    checkpoint() logs a CHECKPOINT record and points the control file
+    (<path>.control) at it. truncate() drops the segments holding only
+    records older than a given LSN: up to `spare_segments` of them are
+    recycled (renamed to the next segment numbers, where their stale records
+    never match their new LSNs), the rest are deleted.
+    """
+
+    MAGIC = b"PWAL0001"
+    HEADER = struct.Struct(">8sI")  # MAGIC, segment size
+    FRAME = struct.Struct(">II")
+    LSN = struct.Struct(">Q")
+    CONTROL = struct.Struct(">QI")  # checkpoint LSN, crc32
+    SEGMENT_SIZE = 1 << 20
+    # Buffered records are written out (without fsync) past this many bytes
+    BUFFER_LIMIT = 1 << 20
+
+    def __init__(
+        self,
+        path=None,
+        commit_delay: float = 0.0,
+        group_size: int = 32,
+        segment_size: int = SEGMENT_SIZE,
+        spare_segments: int = 2,
+    ):
         if path is None:
             # Use absolute path to project root logs directory
             # __file__ is in engine/transaction/, so go up 2 levels to project root
             project_root = Path(__file__).parent.parent.parent
             path = str(project_root / "logs" / "transaction.log")
-        
+
         self.path = path
+        self.control_path = path + ".control"
+        self.commit_delay = commit_delay
+        self.group_size = max(1, group_size)
+        self.spare_segments = spare_segments
 
         # Ensure log directory exists
-        dir_name = os.path.dirname(self.path)
-        if dir_name:  # Only create directory if not empty
-            os.makedirs(dir_name, exist_ok=True)
-
-    # def __init__(self, path="transaction.log"):
-    #     self.path = path
-    #     # no os.makedirs needed for current folder
-
-    def log(self, txn_id, action, table, data):
-        entry = {
-            "timestamp": str(datetime.utcnow()),
-            "txn_id": txn_id,
-            "action": action,
-            "table": table,
-            "data": data,
-        }
-        with open(self.path, "a") as f:
-            f.write(json.dumps(entry) + "\n")
-
-    def recover(self):
-        if not os.path.exists(self.path):
-            return []
-        with open(self.path, "r") as f:
-            return [json.loads(line) for line in f.readlines()]
+        self._dir = os.path.dirname(self.path) or "."
+        os.makedirs(self._dir, exist_ok=True)
+
+        segments = self.segments()
+        if segments:
+            segment_size = self._read_header(segments[-1])
+        if segment_size < 2 * self.HEADER.size + self.FRAME.size + self.LSN.size:
+            raise TransactionError(f"WAL segment size {segment_size} is too small")
+        self.segment_size = segment_size
+
+        self._latch = threading.Condition()
+        self._buffer = []  # [segment, offset, framed records] not yet written
+        self._buffered = 0
+        self._flushing = False  # a leader is writing and syncing
+        self._waiting = 0  # committers waiting for their records to be durable
+        self.syncs = 0
+        self._names = {}  # encoded column names, the same for most records
+        self._file = None
+        self._segment = None  # number of the segment self._file holds
+
+        # The tail is in the newest segment that starts with an intact record
+        end = None
+        for segment in reversed(segments):
+            for end, _ in self._frames_in(segment, self.HEADER.size):
+                pass
+            if end is not None:
+                break
+        else:
+            segment = segments[-1] if segments else 0
+            end = segment * segment_size + self.HEADER.size
+        self._open_segment(segment)
+        try:
+            offset = end - segment * segment_size
+            self._file.seek(offset)
+            if self._file.read().strip(b"\0"):
+                self._file.seek(offset)
+                self._file.write(bytes(segment_size - offset))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+        except OSError as e:
+            raise TransactionError(f"Failed to open {self.path}") from e
+        self._next_lsn = end  # where the next record goes
+        self._durable = end  # everything before this is on disk
+
+    # ------------------------------------------------------------------
+    # SEGMENTS
+    # ------------------------------------------------------------------
+
+    def segment_path(self, segment: int) -> str:
+        return f"{self.path}.{segment:06d}"
+
+    def segments(self) -> List[int]:
+        """Numbers of the segment files on disk, ascending."""
+        prefix = os.path.basename(self.path) + "."
+        numbers = []
+        for name in os.listdir(self._dir):
+            suffix = name[len(prefix):]
+            if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+                numbers.append(int(suffix))
+        return sorted(numbers)
+
+    def _open_segment(self, segment: int) -> None:
+        """Make `segment` the one being written, creating it at full size if needed."""
+        path = self.segment_path(segment)
+        try:
+            if self._file is not None:
+                # Nothing may reach the next segment before this one is durable
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+            if not os.path.exists(path):
+                # Built aside and renamed, so a crash never leaves a headerless segment
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(self.HEADER.pack(self.MAGIC, self.segment_size))
+                    f.truncate(self.segment_size)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+                self._sync_dir()
+            self._file = open(path, "r+b")
+        except OSError as e:
+            raise TransactionError(f"Failed to open {path}") from e
+        self._segment = segment
+
+    def _read_header(self, segment: int) -> int:
+        """Check a segment file's header; returns the segment size it records."""
+        path = self.segment_path(segment)
+        try:
+            with open(path, "rb") as f:
+                magic, size = self.HEADER.unpack(f.read(self.HEADER.size))
+        except (OSError, struct.error) as e:
+            raise TransactionError(f"{path} is not a write-ahead log segment") from e
+        if magic != self.MAGIC:
+            raise TransactionError(f"{path} is not a write-ahead log segment")
+        return size
+
+    def _sync_dir(self) -> None:
+        fd = os.open(self._dir, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def truncate(self, lsn: int) -> int:
+        """Drop the segments holding only records before `lsn`; returns how many."""
+        with self._latch:
+            while self._flushing:
+                self._latch.wait()
+            segments = self.segments()
+            old = [n for n in segments if n < lsn // self.segment_size and n < self._segment]
+            spares = sum(1 for n in segments if n > self._segment)
+            top = segments[-1]
+            try:
+                for segment in old:
+                    if spares < self.spare_segments:
+                        top += 1
+                        spares += 1
+                        os.rename(self.segment_path(segment), self.segment_path(top))
+                    else:
+                        os.remove(self.segment_path(segment))
+                if old:
+                    self._sync_dir()
+            except OSError as e:
+                raise TransactionError(f"Failed to truncate {self.path}") from e
+            return len(old)
+
+    # ------------------------------------------------------------------
+    # APPENDING
+    # ------------------------------------------------------------------
+
+    def log(self, txn_id, action, table, data) -> int:
+        """Append a record; returns its LSN. Not durable until a commit or flush."""
+        if data is None:
+            names, values = (), ()
+        else:
+            names, values = tuple(data), tuple(data.values())
+        try:
+            encoded_names = self._names.get(names)
+            if encoded_names is None:
+                encoded_names = self._names[names] = encode_key(names)
+            payload = (
+                encode_key((None if txn_id is None else str(txn_id), action, table))
+                + encoded_names
+                + encode_key(values)
+            )
+        except Exception as e:
+            raise TransactionError(f"Cannot log {action} on {table}: {e}") from e
+        size = self.FRAME.size + self.LSN.size + len(payload)
+        if size > self.segment_size - self.HEADER.size:
+            raise TransactionError(f"Cannot log {action} on {table}: record larger than a segment")
+
+        with self._latch:
+            segment, offset = divmod(self._next_lsn, self.segment_size)
+            if offset + size > self.segment_size:
+                segment, offset = segment + 1, 0
+            offset = max(offset, self.HEADER.size)
+            lsn = segment * self.segment_size + offset
+            body = self.LSN.pack(lsn) + payload
+            frame = self.FRAME.pack(len(body), zlib.crc32(body)) + body
+            last = self._buffer[-1] if self._buffer else None
+            if last is not None and last[0] == segment and last[1] + len(last[2]) == offset:
+                last[2] += frame
+            else:
+                self._buffer.append([segment, offset, bytearray(frame)])
+            self._buffered += size
+            self._next_lsn = lsn + size
+            if self._buffered > self.BUFFER_LIMIT and not self._flushing:
+                self._write(self._take_buffer())
+        return lsn
+
+    def commit(self, txn_id) -> int:
+        """Log a COMMIT for `txn_id` and wait until it is durable."""
+        lsn = self.log(txn_id, "COMMIT", None, None)
+        self.flush(lsn)
+        return lsn
+
+    def flush(self, lsn: Optional[int] = None) -> None:
+        """Make the record at `lsn` (default: every record) durable."""
+        with self._latch:
+            if lsn is None:
+                lsn = self._next_lsn - 1
+            self._waiting += 1
+            if self._flushing:
+                self._latch.notify_all()  # a delaying leader counts us
+            try:
+                while self._durable <= lsn:
+                    if self._flushing:
+                        self._latch.wait()
+                        continue
+                    self._flushing = True
+                    try:
+                        if self.commit_delay > 0 and self._waiting < self.group_size:
+                            self._latch.wait_for(
+                                lambda: self._waiting >= self.group_size, self.commit_delay
+                            )
+                        end, chunks = self._next_lsn, self._take_buffer()
+                        self._latch.release()
+                        try:
+                            self._write(chunks)
+                            self._sync()
+                        except BaseException:
+                            self._latch.acquire()
+                            self._buffer[0:0] = chunks
+                            self._buffered += sum(len(data) for _, _, data in chunks)
+                            raise
+                        self._latch.acquire()
+                        self._durable = end
+                        self.syncs += 1
+                    finally:
+                        self._flushing = False
+                        self._latch.notify_all()
+            finally:
+                self._waiting -= 1
+
+    def _take_buffer(self) -> list:
+        chunks, self._buffer, self._buffered = self._buffer, [], 0
+        return chunks
+
+    def _write(self, chunks: list) -> None:
+        try:
+            for segment, offset, data in chunks:
+                if segment != self._segment:
+                    self._open_segment(segment)
+                self._file.seek(offset)
+                self._file.write(data)
+            self._file.flush()
+        except OSError as e:
+            raise TransactionError(f"Failed to write {self.path}") from e
+
+    def _sync(self) -> None:
+        try:
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            raise TransactionError(f"Failed to sync {self.path}") from e
+
+    def checkpoint(self, data: dict) -> int:
+        """Log a durable CHECKPOINT record and make it the one recovery starts from."""
+        lsn = self.log(None, "CHECKPOINT", None, data)
+        self.flush(lsn)
+        control = self.LSN.pack(lsn)
+        tmp_path = self.control_path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(self.CONTROL.pack(lsn, zlib.crc32(control)))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.control_path)
+            self._sync_dir()
+        except OSError as e:
+            raise TransactionError(f"Failed to write {self.control_path}") from e
+        return lsn
+
+    def last_checkpoint(self) -> Optional[dict]:
+        """The CHECKPOINT record the control file points at, if any."""
+        try:
+            with open(self.control_path, "rb") as f:
+                lsn, crc = self.CONTROL.unpack(f.read(self.CONTROL.size))
+        except (OSError, struct.error):
+            return None
+        if zlib.crc32(self.LSN.pack(lsn)) != crc:
+            return None
+        record = next(self.records(lsn), None)
+        if record is None or record["lsn"] != lsn or record["action"] != "CHECKPOINT":
+            return None
+        return record
+
+    def close(self) -> None:
+        """Flush every record and close the file."""
+        self.flush()
+        self._file.close()
+
+    # ------------------------------------------------------------------
+    # READING
+    # ------------------------------------------------------------------
+
+    @property
+    def start(self) -> int:
+        """LSN of the first record still on disk."""
+        segments = self.segments()
+        return (segments[0] if segments else 0) * self.segment_size + self.HEADER.size
+
+    @property
+    def end(self) -> int:
+        """LSN the next record will get."""
+        return self._next_lsn
+
+    def _frames_in(self, segment: int, offset: int) -> Iterator[tuple]:
+        """(LSN after the record, payload) of the intact records of one segment from `offset`."""
+        path = self.segment_path(segment)
+        if not os.path.exists(path):
+            return
+        if self._read_header(segment) != self.segment_size:
+            raise TransactionError(f"{path} belongs to a log with another segment size")
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        base = segment * self.segment_size + offset  # LSN of data[0]
+        pos = 0
+        header = self.FRAME.size + self.LSN.size
+        while pos + header <= len(data):
+            length, crc = self.FRAME.unpack_from(data, pos)
+            begin = pos + self.FRAME.size
+            body = data[begin : begin + length]
+            if (
+                length < self.LSN.size
+                or len(body) < length
+                or zlib.crc32(body) != crc
+                or self.LSN.unpack_from(body, 0)[0] != base + pos
+            ):
+                break
+            pos = begin + length
+            yield base + pos, body
+
+    def _frames(self, start: Optional[int] = None) -> Iterator[tuple]:
+        """(LSN after the record, payload) of every intact record on disk from `start`."""
+        if start is None:
+            start = self.start
+        segment, offset = divmod(start, self.segment_size)
+        offset = max(offset, self.HEADER.size)
+        while True:
+            found = False
+            for frame in self._frames_in(segment, offset):
+                found = True
+                yield frame
+            if not found and offset == self.HEADER.size:
+                return
+            segment, offset = segment + 1, self.HEADER.size
+
+    def records(self, start: Optional[int] = None) -> Iterator[dict]:
+        """Decode the intact records on disk from LSN `start` (default: all), oldest first."""
+        for _, body in self._frames(start):
+            (txn_id, action, table), pos = decode_key(body, self.LSN.size)
+            names, pos = decode_key(body, pos)
+            values, _ = decode_key(body, pos)
+            yield {
+                "lsn": self.LSN.unpack_from(body, 0)[0],
+                "txn_id": txn_id,
+                "action": action,
+                "table": table,
+                "data": dict(zip(names, values)) if names else None,
+            }
+
+    def recover(self) -> List[dict]:
+        return list(self.records())
@@ -0,0 +1,44 @@
+from typing import Optional
+
+
+class Snapshot:
+    """
+    A consistent view of the heap for readers (multi-version concurrency
+    control).
+
+    Every row version carries xmin, the transaction that created it, and
+    xmax, the one that deleted it (0 while it is live): UPDATE writes a new
+    version and sets xmax on the old one, DELETE only sets xmax. Engine
+    writers run one at a time and a transaction ID is the log position
+    where its statement began, so when a snapshot is taken every
+    transaction below `horizon` (the end of the log then) has committed,
+    except `active`, the statement running at that moment. A version is
+    visible when its creator is one of those and its deleter, if any, is
+    not.
+
+    Snapshots are plain values: they are compared, not registered, and can
+    be shipped to scan worker processes.
+    """
+
+    __slots__ = ("horizon", "active")
+
+    def __init__(self, horizon: int, active: Optional[int] = None):
+        self.horizon = horizon
+        self.active = active
+
+    def committed(self, xid: int) -> bool:
+        """True when transaction `xid` had committed when the snapshot was taken."""
+        return xid < self.horizon and xid != self.active
+
+    def visible(self, xmin: int, xmax: int) -> bool:
+        """True when the row version (xmin, xmax) is part of the snapshot."""
+        return self.committed(xmin) and not (xmax and self.committed(xmax))
+
+    def __getstate__(self):
+        return self.horizon, self.active
+
+    def __setstate__(self, state):
+        self.horizon, self.active = state
+
+    def __repr__(self):
+        return f"Snapshot(horizon={self.horizon}, active={self.active})"
@@ -1,6 +1,7 @@
 # engine/transaction/transaction.py
 
 import uuid
+from engine.exceptions import DeadlockError, LockTimeoutError
 from engine.transaction.lock_manager import LockManager
 from engine.transaction.log import WALog
 
@@ -10,35 +11,69 @@ wal = WALog()
 
 
 class Transaction:
-    def __init__(self):
+    """
+    A unit of work over in-memory tables (objects with a `name` and
+    insert / delete / update methods).
+
+    Rows are locked individually: writing a row takes X on it (and IX on
+    its table), reading one takes S (and IS), so transactions touching
+    different rows of a table run side by side. A row is named by its row
+    ID, by default the row's "id" value. Locks are held until commit or
+    rollback (strict two-phase locking). A transaction whose lock request
+    times out or is chosen as a deadlock victim is rolled back before the
+    error reaches the caller.
+    """
+
+    def __init__(self, locks: LockManager = None):
         self.txn_id = str(uuid.uuid4())
         self.active = True
         self.actions = []
+        self.locks = locks or lock_manager
 
-    def insert(self, table, row):
+    def _check_active(self):
         if not self.active:
             raise Exception("Transaction is no longer active")
 
-        # Acquire write lock for the table (single-writer)
-        lock_manager.acquire_write(table.name, self.txn_id)
-
+    def _lock(self, resource, mode):
+        self._check_active()
         try:
-            # Log the action first (WAL) using table name (JSON serializable)
-            wal.log(self.txn_id, "INSERT", table.name, row)
+            self.locks.acquire(self.txn_id, resource, mode)
+        except (DeadlockError, LockTimeoutError):
+            self.rollback()
+            raise
+
+    def lock_table(self, table, mode="X"):
+        """Lock a whole table, e.g. before reading or rewriting all of it."""
+        self._lock(LockManager.table(table.name), mode)
+
+    def lock_row(self, table, rid, mode="X"):
+        """Lock one row: X to write it, S to read it."""
+        self._lock(LockManager.row(table.name, rid), mode)
+
+    def insert(self, table, row, rid=None):
+        self.lock_row(table, row.get("id") if rid is None else rid)
+
+        # Log the action first (WAL) using table name (JSON serializable)
+        wal.log(self.txn_id, "INSERT", table.name, row)
 
-            # Perform the insert
-            table.insert(row)
+        # Perform the insert
+        table.insert(row)
 
-            # Track action for possible rollback
-            self.actions.append(("INSERT", table, row))
+        # Track action for possible rollback
+        self.actions.append(("INSERT", table, row))
 
-        finally:
-            # Release write lock
-            lock_manager.release_write(table.name)
+    def update(self, table, rid, changes):
+        """Apply `changes` to the row `rid`; `table.update` returns the row as it was."""
+        self.lock_row(table, rid)
+        wal.log(self.txn_id, "UPDATE", table.name, changes)
+        old = table.update(rid, changes)
+        self.actions.append(("UPDATE", table, (rid, old)))
 
     def commit(self):
-        # Transaction committed; WAL already persisted
+        # Durable once the COMMIT record is (group-)synced to the WAL
+        wal.commit(self.txn_id)
         self.active = False
+        self.locks.release_all(self.txn_id)
         print(f"Transaction {self.txn_id} committed.")
 
     def rollback(self):
@@ -46,5 +81,10 @@ class Transaction:
         for action, table, row in reversed(self.actions):
             if action == "INSERT":
                 table.delete(row)
+            elif action == "UPDATE":
+                rid, old = row
+                table.update(rid, old)
+        wal.log(self.txn_id, "ABORT", None, None)
         self.active = False
+        self.locks.release_all(self.txn_id)
         print(f"Transaction {self.txn_id} rolled back.")
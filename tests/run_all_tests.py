@@ -18,7 +18,12 @@ TEST_MODULES = [
     "unit/test_m1_storage_v2.py",  # Storage engine v2
     "unit/test_m2_sql_pipeline.py",  # SQL pipeline tests
     "unit/test_m3_indexing.py",    # Indexing tests
+    "unit/test_m3_index_engine.py",  # Engine-maintained indexes
     "unit/test_m4_transactions.py",  # Transaction tests
+    "unit/test_m4_wal.py",  # Write-ahead log and group commit
+    "unit/test_m4_mvcc.py",  # MVCC snapshot reads and VACUUM
+    "unit/test_m5_catalog.py",  # Catalog metadata & storage management
+    "unit/test_m6_parallel_scan.py",  # Parallel table scans
 ]
 
 def run_test(test_file):
@@ -1,5 +1,6 @@
 import os
 import sys
+import tempfile
 
 PROJECT_ROOT = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "../..")
@@ -15,6 +16,12 @@ from backend.app.db.query import build_plan, execute_plan
 # query.py can be accessed while outside engine since project root was added to sys.path
 
 
+def new_engine():
+    """Engine backed by a fresh temporary data file (the catalog persists)."""
+    tmpdir = tempfile.mkdtemp()
+    return Engine(db_path=os.path.join(tmpdir, "dbfile"))
+
+
 def parse_sql(sql: str):
     tokenizer = Tokenizer(sql)
     tokens = tokenizer.tokenize()
@@ -25,7 +32,7 @@ def parse_sql(sql: str):
 def main():
     print("=== Milestone 2 SQL Pipeline Test (Engine-backed) ===")
 
-    engine = Engine()
+    engine = new_engine()
 
     sql_statements = [
         "CREATE TABLE users (id INT, name TEXT, age INT);",
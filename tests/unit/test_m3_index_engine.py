@@ -0,0 +1,843 @@
+"""
+Milestone 3 Test Harness: Engine-Maintained Indexes
+Demonstrates:
+- PRIMARY KEY row-ID index maintained on INSERT / UPDATE / DELETE
+- Index-driven UPDATE and DELETE touching only the pages they need
+- CREATE [UNIQUE] INDEX / DROP INDEX over the paged heap
+- Page-backed B+ tree indexes that survive restarts without rebuilding
+- Range predicates and ORDER BY answered from an index
+- Duplicate-key lookups that span many leaves
+- Bottom-up bulk loading with a fill factor and an external sort
+- Hash indexes (CREATE INDEX ... USING HASH) for equality and joins
+- Compact nodes: __slots__, wide fanout, unboxed integer keys
+- Covering indexes (INCLUDE) and index-only scans
+- Composite index prefix matching (equalities plus a range, ANDed)
+- B+ tree deletes that merge / borrow underfull nodes and collapse the root
+- Per-page Bloom filters (CREATE INDEX ... USING BLOOM) pruning equality scans
+- FOREIGN KEYs checked by index probes, in batches, with RESTRICT / CASCADE
+- Latch-free readers beside a writer on shared B+ trees (invariants checked)
+"""
+import os
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from engine.sql.parser import Parser
+from engine.sql.tokenizer import Tokenizer
+from backend.app.db.query import build_plan, execute_plan
+from engine.engine import Engine
+from engine.index.btree import BPlusTree
+from engine.index.paged_btree import PagedBPlusTree
+from engine.index.external_sort import external_sort
+from engine.index.index_manager import BloomColumns, HashColumns, IndexManager
+
+
+def run_sql(engine, sql: str):
+    """Tokenize, parse, plan, and execute a SQL statement."""
+    tokens = Tokenizer(sql).tokenize()
+    ast = Parser(tokens).parse()
+    plan = build_plan(ast)
+    return execute_plan(plan, engine)
+
+
+def new_engine(**kwargs):
+    """Engine backed by a fresh temporary data file."""
+    tmpdir = tempfile.mkdtemp()
+    return Engine(db_path=os.path.join(tmpdir, "dbfile"), **kwargs)
+
+
+def track_pages(engine, table_name="USERS"):
+    """Record the table's heap pages the engine reads through its pager."""
+    seen = []
+    original = engine.pager.get_page
+    heap = set(engine.catalog.get_table(table_name).pages())
+
+    def get_page(page_num):
+        if page_num in heap:
+            seen.append(page_num)
+        return original(page_num)
+
+    engine.pager.get_page = get_page
+    return seen
+
+
+def test_index_driven_update_and_delete():
+    print("\n=== Index-driven UPDATE / DELETE ===")
+    engine = new_engine()
+    run_sql(engine, "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, age INTEGER);")
+    for i in range(1, 401):
+        run_sql(engine, f"INSERT INTO users VALUES ({i}, 'user{i:04d}', {20 + i % 50});")
+    assert engine.table_stats("users")["page_count"] > 3
+
+    seen = track_pages(engine)
+    assert run_sql(engine, "DELETE FROM users WHERE id = 250;") == [{"deleted": 1}]
+    assert len(set(seen)) == 1, seen
+    print("[PASS] DELETE by primary key reads a single page")
+
+    seen.clear()
+    assert run_sql(engine, "UPDATE users SET age = 99 WHERE id = 7;") == [{"updated": 1}]
+    # The row's page, and the last page, which takes the new row version
+    assert len(set(seen)) == 2 and engine.catalog.get_table("USERS").pages()[-1] in seen, seen
+    print("[PASS] UPDATE by primary key reads the row's page and the last page")
+
+    # Non-indexed predicates still work through the full scan
+    assert run_sql(engine, "DELETE FROM users WHERE age = 99;") == [{"deleted": 1}]
+    assert engine.row_count("users") == 398
+    print("[PASS] Non-indexed predicates fall back to a scan")
+
+    # The index follows key changes
+    run_sql(engine, "UPDATE users SET id = 1000 WHERE id = 3;")
+    tree = engine.indexes.get("USERS", ("id",))
+    # The old version's entry stays until VACUUM, but no longer matches
+    assert not any(engine._row_live("USERS", rid) for rid in tree.search(3))
+    assert run_sql(engine, "SELECT id FROM users WHERE id = 3;") == []
+    assert len(list(tree.search(1000))) == 1
+    assert run_sql(engine, "DELETE FROM users WHERE id = 1000;") == [{"deleted": 1}]
+    assert run_sql(engine, "DELETE FROM users WHERE id = 250;") == [{"deleted": 0}]
+    print("[PASS] Index kept in sync with UPDATE and DELETE")
+
+    try:
+        run_sql(engine, "UPDATE users SET id = 5 WHERE id = 6;")
+        assert False, "duplicate primary key accepted by UPDATE"
+    except Exception as e:
+        assert "primary key" in str(e).lower()
+    print("[PASS] UPDATE cannot duplicate a primary key")
+
+    # Deleted keys can be reinserted; live keys cannot
+    run_sql(engine, "INSERT INTO users VALUES (250, 'again', 30);")
+    try:
+        run_sql(engine, "INSERT INTO users VALUES (250, 'twice', 30);")
+        assert False, "duplicate primary key accepted by INSERT"
+    except Exception as e:
+        assert "primary key" in str(e).lower()
+    print("[PASS] PRIMARY KEY uniqueness checked through the index")
+
+    run_sql(engine, "VACUUM users;")
+    assert list(engine.indexes.get("USERS", ("id",)).search(3)) == []
+    assert run_sql(engine, "DELETE FROM users WHERE id = 250;") == [{"deleted": 1}]
+    print("[PASS] Indexes rebuilt after VACUUM moves rows")
+
+
+def test_create_and_drop_index():
+    print("\n=== CREATE INDEX / DROP INDEX ===")
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, "dbfile")
+    engine = Engine(db_path=path)
+    run_sql(engine, "CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT, age INTEGER);")
+    for i in range(1, 401):
+        run_sql(engine, f"INSERT INTO users VALUES ({i}, 'u{i:04d}@x.io', {i % 40});")
+
+    run_sql(engine, "CREATE INDEX users_age ON users (age);")
+    tree = engine.indexes.get("USERS", ("age",))
+    assert len(list(tree.search(7))) == 10
+    assert all(isinstance(rid, tuple) and len(rid) == 2 for rid in tree.search(7))
+    print("[PASS] Index built over the heap with (page, offset) row IDs")
+
+    seen = track_pages(engine)
+    rows = run_sql(engine, "SELECT id FROM users WHERE age = 7;")
+    assert [r["id"] for r in rows] == [i for i in range(1, 401) if i % 40 == 7]
+    assert set(seen) == {rid[0] for rid in tree.search(7)}, seen
+    print("[PASS] Equality SELECT reads only pages named by the index")
+
+    run_sql(engine, "INSERT INTO users VALUES (401, 'new@x.io', 7);")
+    run_sql(engine, "UPDATE users SET age = 8 WHERE id = 47;")
+    run_sql(engine, "DELETE FROM users WHERE id = 87;")
+    live = [rid for rid in engine.indexes.get("USERS", ("age",)).search(7) if engine._row_live("USERS", rid)]
+    assert len(live) == 9
+    assert run_sql(engine, "SELECT COUNT(*) FROM users WHERE age = 7;") == [{"count(*)": 9}]
+    print("[PASS] INSERT / UPDATE / DELETE maintain the secondary index")
+
+    run_sql(engine, "CREATE UNIQUE INDEX users_email ON users (email);")
+    try:
+        run_sql(engine, "INSERT INTO users VALUES (500, 'u0001@x.io', 1);")
+        assert False, "duplicate accepted by UNIQUE index"
+    except Exception as e:
+        assert "unique" in str(e).lower()
+    print("[PASS] UNIQUE index enforced on write")
+
+    engine.close()
+    engine = Engine(db_path=path)
+    assert set(engine.indexes.names) == {"users_pkey", "users_age", "users_email"}
+    live = [rid for rid in engine.indexes.get("USERS", ("age",)).search(7) if engine._row_live("USERS", rid)]
+    assert len(live) == 9
+    print("[PASS] Index definitions persisted in the catalog")
+
+    run_sql(engine, "DROP INDEX users_age;")
+    assert engine.indexes.get("USERS", ("age",)) is None
+    assert run_sql(engine, "SELECT COUNT(*) FROM users WHERE age = 7;") == [{"count(*)": 9}]
+    try:
+        run_sql(engine, "DROP INDEX users_pkey;")
+        assert False, "primary key index dropped"
+    except Exception as e:
+        assert "primary key" in str(e).lower()
+    print("[PASS] DROP INDEX removes secondary indexes only")
+
+    try:
+        run_sql(engine, "CREATE UNIQUE INDEX users_age_u ON users (age);")
+        assert False, "unique index built over duplicate keys"
+    except Exception as e:
+        assert "duplicate" in str(e).lower()
+    assert "users_age_u" not in engine.indexes.names
+    assert engine.indexes.get("USERS", ("age",)) is None
+    print("[PASS] UNIQUE index build rejects existing duplicates")
+
+
+def test_paged_index_survives_restart():
+    print("\n=== Paged B+ tree indexes ===")
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, "dbfile")
+    engine = Engine(db_path=path)
+    run_sql(engine, "CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT, age INTEGER);")
+    for i in range(1, 2001):
+        run_sql(engine, f"INSERT INTO users VALUES ({i}, 'user{i:05d}@example.com', {i % 90});")
+    run_sql(engine, "CREATE INDEX users_email ON users (email);")
+
+    tree = engine.indexes.get("USERS", ("id",))
+    leaf = tree.root
+    while not leaf.is_leaf:
+        leaf = tree._child(leaf, 0)
+    assert len(leaf.keys) > 100, len(leaf.keys)
+    assert not tree.root.is_leaf
+    print(f"[PASS] Fanout follows the page size ({len(leaf.keys)} keys in the first leaf)")
+
+    engine.close()
+    engine = Engine(db_path=path)
+    seen = track_pages(engine)
+    rows = run_sql(engine, "SELECT id FROM users WHERE email = 'user01234@example.com';")
+    assert rows == [{"id": 1234}]
+    assert run_sql(engine, "DELETE FROM users WHERE id = 77;") == [{"deleted": 1}]
+    assert len(set(seen)) == 2, seen
+    print("[PASS] Indexes reopened from their pages without scanning the heap")
+
+    index_pages = sum(n for _, n in engine.indexes.get("USERS", ("email",)).extents)
+    free_before = len(engine.free_pages)
+    run_sql(engine, "DROP INDEX users_email;")
+    assert len(engine.free_pages) == free_before + index_pages
+    print("[PASS] DROP INDEX returns the index pages to the free list")
+
+    # Unclean shutdown: index pages are discarded and rebuilt from the heap
+    run_sql(engine, "INSERT INTO users VALUES (5000, 'late@example.com', 1);")
+    engine = Engine(db_path=path)
+    assert engine.indexes.indexes["USERS"][("id",)] is None
+    assert run_sql(engine, "SELECT email FROM users WHERE id = 5000;") == [{"email": "late@example.com"}]
+    assert run_sql(engine, "SELECT COUNT(*) FROM users WHERE id = 77;") == [{"count(*)": 0}]
+    print("[PASS] Indexes rebuilt after an unclean shutdown")
+
+
+def test_range_and_order_by_use_index():
+    print("\n=== Index range scans ===")
+    engine = new_engine()
+    run_sql(engine, "CREATE TABLE events (id INTEGER PRIMARY KEY, score INTEGER, tag TEXT);")
+    # Insert in descending key order so heap order and key order differ
+    for i in range(600, 0, -1):
+        run_sql(engine, f"INSERT INTO events VALUES ({i}, {i % 50}, 't{i % 7}');")
+    ids = list(range(600, 0, -1))
+
+    tree = engine.indexes.get("EVENTS", ("id",))
+    assert [k[0] for k, _ in tree.range(10, 20)] == list(range(10, 21))
+    assert [k[0] for k, _ in tree.range(10, 20, lo_inclusive=False, hi_inclusive=False)] == list(range(11, 20))
+    assert [k[0] for k, _ in tree.range(hi=5, reverse=True)] == [5, 4, 3, 2, 1]
+    assert [k[0] for k, _ in tree.range(lo=598)] == [598, 599, 600]
+    print("[PASS] range() honours bounds, inclusive flags and reverse")
+
+    pages = engine.table_stats("events")["page_count"]
+    for sql, expected in [
+        ("SELECT id, tag FROM events WHERE id < 12;", [i for i in ids if i < 12]),
+        ("SELECT id, tag FROM events WHERE id <= 12;", [i for i in ids if i <= 12]),
+        ("SELECT id, tag FROM events WHERE id > 590;", [i for i in ids if i > 590]),
+        ("SELECT id, tag FROM events WHERE id >= 590;", [i for i in ids if i >= 590]),
+    ]:
+        seen = track_pages(engine, "EVENTS")
+        rows = run_sql(engine, sql)
+        assert [r["id"] for r in rows] == expected, sql
+        assert len(set(seen)) < pages, sql
+    print("[PASS] <, <=, >, >= on an indexed column read only matching pages")
+
+    # Only the key column is needed: the index alone answers, in key order
+    seen = track_pages(engine, "EVENTS")
+    rows = run_sql(engine, "SELECT id FROM events WHERE id < 12;")
+    assert [r["id"] for r in rows] == list(range(1, 12))
+    assert seen == []
+    print("[PASS] A query on key columns only never reads the heap")
+
+    seen = track_pages(engine, "EVENTS")
+    rows = run_sql(engine, "SELECT id, tag FROM events ORDER BY id DESC LIMIT 3;")
+    assert [r["id"] for r in rows] == [600, 599, 598]
+    assert len(set(seen)) <= 3
+    rows = run_sql(engine, "SELECT id FROM events WHERE id >= 100 ORDER BY id LIMIT 5 OFFSET 2;")
+    assert [r["id"] for r in rows] == [102, 103, 104, 105, 106]
+    rows = run_sql(engine, "SELECT id FROM events WHERE tag = 't3' ORDER BY id;")
+    assert [r["id"] for r in rows] == [i for i in range(1, 601) if i % 7 == 3]
+    print("[PASS] ORDER BY an indexed column streams from the index without sorting")
+
+
+def test_search_duplicates_across_leaves():
+    print("\n=== Duplicate-key search ===")
+    engine = new_engine()
+    for tree in (BPlusTree(order=4), engine._new_index_tree()):
+        # Few distinct keys, many duplicates: runs span many leaves
+        for i in range(3000):
+            tree.insert(i % 3, (i, i % 1000))
+        matches = tree.search(1)
+        assert not isinstance(matches, list)
+        assert list(matches) == [(i, i % 1000) for i in range(1, 3000, 3)]
+        assert list(tree.search(7)) == []
+    print("[PASS] search() streams every duplicate, following the leaf chain")
+
+
+def test_bulk_load():
+    print("\n=== Bulk-loaded index builds ===")
+    keys = [(i * 7919) % 5000 for i in range(5000)] + list(range(0, 5000, 10))
+    expected = sorted((k, (k, n)) for n, k in enumerate(keys))
+
+    # Runs spill to disk and merge back in order
+    assert list(external_sort(iter(expected[::-1]), buffer_size=64)) == expected
+    print("[PASS] External sort merges spilled runs")
+
+    engine = new_engine()
+    for fill in (1.0, 0.5):
+        for tree in (BPlusTree(order=8), engine._new_index_tree()):
+            tree.bulk_load(expected, fill_factor=fill)
+            assert list(tree.range()) == [((k,), v) for k, v in expected]
+            assert list(tree.search(30)) == [(30, n) for k, (_, n) in expected if k == 30]
+            assert [v for _, v in tree.range(lo=100, hi=103)] == [
+                v for k, v in expected if 100 <= k <= 103
+            ]
+            # The tree stays a normal B+ tree for later inserts
+            for k in range(-50, 0):
+                tree.insert(k, (0, -k))
+            assert next(tree.range())[0] == (-50,)
+    half, full = engine._new_index_tree(), engine._new_index_tree()
+    half.bulk_load(expected, fill_factor=0.5)
+    full.bulk_load(expected, fill_factor=1.0)
+    pages = lambda tree: sum(length for _, length in tree.extents)
+    assert pages(half) > 1.8 * pages(full)
+    print(f"[PASS] Bulk load matches incremental order (pages: {pages(full)} full, {pages(half)} half)")
+
+    # CREATE INDEX sorts externally past the buffer and still checks UNIQUE
+    engine = new_engine(sort_buffer_rows=50)
+    run_sql(engine, "CREATE TABLE items (id INT PRIMARY KEY, code INT, grp INT)")
+    for i in range(400):
+        run_sql(engine, f"INSERT INTO items VALUES ({i}, {399 - i}, {i % 4})")
+    run_sql(engine, "CREATE UNIQUE INDEX items_code ON items (code)")
+    rows = run_sql(engine, "SELECT id FROM items WHERE code = 10")
+    assert rows == [{"id": 389}]
+    try:
+        run_sql(engine, "CREATE UNIQUE INDEX items_grp ON items (grp)")
+        assert False, "duplicate grp values should be rejected"
+    except Exception as e:
+        assert "duplicate" in str(e)
+    assert "items_grp" not in engine.indexes.names
+    print("[PASS] CREATE INDEX bulk-loads from an external sort and enforces UNIQUE")
+
+
+def test_hash_index():
+    print("\n=== Hash indexes ===")
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, "dbfile")
+    engine = Engine(db_path=path)
+    run_sql(engine, "CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT, team INTEGER);")
+    run_sql(engine, "CREATE TABLE teams (tid INTEGER, label TEXT);")
+    for i in range(1, 3001):
+        run_sql(engine, f"INSERT INTO users VALUES ({i}, 'user{i}@example.com', {i % 40});")
+    for t in range(40):
+        run_sql(engine, f"INSERT INTO teams VALUES ({t}, 'team{t}');")
+
+    # Next to the PRIMARY KEY's B+ tree on the same column
+    run_sql(engine, "CREATE INDEX users_id_hash ON users USING HASH (id);")
+    run_sql(engine, "CREATE UNIQUE INDEX users_email_hash ON users (email) USING HASH;")
+    assert engine.indexes.get("USERS", HashColumns(("id",))).global_depth > 0
+    seen = track_pages(engine)
+    assert run_sql(engine, "SELECT id FROM users WHERE email = 'user2345@example.com';") == [{"id": 2345}]
+    assert len(set(seen)) == 1, seen
+    print("[PASS] USING HASH answers = with one heap page read")
+
+    try:
+        run_sql(engine, "INSERT INTO users VALUES (9000, 'user7@example.com', 1);")
+        assert False, "duplicate email should be rejected"
+    except Exception as e:
+        assert "UNIQUE violation" in str(e)
+    rows = run_sql(engine, "SELECT id FROM users WHERE id >= 2999 ORDER BY id;")
+    assert rows == [{"id": 2999}, {"id": 3000}]
+    print("[PASS] UNIQUE hash indexes reject duplicates; ranges still use the B+ tree")
+
+    engine.close()
+    engine = Engine(db_path=path)
+    hashed = engine.indexes.get("USERS", HashColumns(("email",)))
+    assert hashed is not None and type(hashed).__name__ == "HashIndex"
+    run_sql(engine, "UPDATE users SET email = 'userzz@example.com' WHERE id = 10;")
+    assert run_sql(engine, "SELECT id FROM users WHERE email = 'userzz@example.com';") == [{"id": 10}]
+    assert run_sql(engine, "SELECT id FROM users WHERE email = 'user10@example.com';") == []
+    print("[PASS] Hash indexes reopen from their pages and follow UPDATE")
+
+    # Hash join: the hash index on the inner column is the build side
+    sql = "SELECT tid, label, id FROM teams INNER JOIN users ON tid = team;"
+    expected = run_sql(engine, sql)
+    assert len(expected) == 3000
+    run_sql(engine, "CREATE INDEX users_team_hash ON users USING HASH (team);")
+    scanned = []
+    original = engine.scan_table
+    engine.scan_table = lambda name: scanned.append(name) or original(name)
+    rows = run_sql(engine, sql)
+    assert scanned == ["TEAMS"], scanned
+    key = lambda row: (row["tid"], row["id"])
+    assert sorted(rows, key=key) == sorted(expected, key=key)
+    print("[PASS] JOIN probes a hash index instead of building a hash table")
+
+    run_sql(engine, "DROP INDEX users_id_hash;")
+    assert engine.indexes.get("USERS", ("id",)) is not None
+    print("[PASS] DROP INDEX removes only the hash index")
+
+
+def test_compact_int_keys():
+    print("\n=== Compact B+ tree nodes ===")
+    assert not hasattr(BPlusTree().root, "__dict__")
+    keys = [(i * 7919) % 4000 for i in range(4000)]
+    boxed, unboxed = BPlusTree(order=32), BPlusTree(order=32, int_keys=True)
+    for tree in (boxed, unboxed):
+        for n, key in enumerate(keys):
+            tree.insert(key, n)
+        for n in range(0, 4000, 3):
+            tree.delete(keys[n], n)
+    assert type(unboxed.root.keys).__name__ == "array"
+    assert list(unboxed.range()) == list(boxed.range())
+    assert list(unboxed.range(lo=(10,), hi=20, reverse=True)) == list(
+        boxed.range(lo=10, hi=20, reverse=True)
+    )
+    assert list(unboxed.search((keys[1],))) == [1]
+    print("[PASS] Unboxed int keys behave like tuple keys")
+
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, "dbfile")
+    engine = Engine(db_path=path)
+    run_sql(engine, "CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT UNIQUE);")
+    for i in range(1, 1001):
+        run_sql(engine, f"INSERT INTO users VALUES ({i}, 'u{i}');")
+    assert engine.indexes.get("USERS", ("id",)).int_keys
+    assert not engine.indexes.get("USERS", ("email",)).int_keys
+    engine.close()
+    engine = Engine(db_path=path)
+    tree = engine.indexes.get("USERS", ("id",))
+    assert tree.int_keys and type(tree.root.keys).__name__ == "array"
+    assert run_sql(engine, "SELECT email FROM users WHERE id = 777;") == [{"email": "u777"}]
+    rows = run_sql(engine, "SELECT id FROM users ORDER BY id DESC LIMIT 2;")
+    assert rows == [{"id": 1000}, {"id": 999}]
+    print("[PASS] INT primary keys use unboxed keys, also after a restart")
+
+
+def test_covering_index():
+    print("\n=== Covering indexes ===")
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, "dbfile")
+    engine = Engine(db_path=path)
+    run_sql(engine, "CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT NOT NULL, name TEXT, age INTEGER);")
+    for i in range(500, 0, -1):
+        age = "NULL" if i % 10 == 0 else i % 80
+        run_sql(engine, f"INSERT INTO users VALUES ({i}, 'u{i:04d}', 'name{i}', {age});")
+    run_sql(engine, "CREATE INDEX users_email ON users (email) INCLUDE (id, age);")
+
+    seen = track_pages(engine)
+    rows = run_sql(engine, "SELECT id, email FROM users WHERE email > 'u0495';")
+    assert rows == [{"id": i, "email": f"u{i:04d}"} for i in range(496, 501)]
+    rows = run_sql(engine, "SELECT email, age FROM users WHERE age = 7 ORDER BY email DESC LIMIT 2;")
+    assert rows == [{"email": "u0487", "age": 7}, {"email": "u0407", "age": 7}]
+    rows = run_sql(engine, "SELECT age FROM users WHERE email = 'u0010';")
+    assert rows == [{"age": None}]
+    assert seen == []
+    print("[PASS] INCLUDE columns answer queries without reading the heap")
+
+    run_sql(engine, "UPDATE users SET age = 99 WHERE id = 9;")
+    run_sql(engine, "DELETE FROM users WHERE id = 11;")
+    engine.close()
+    engine = Engine(db_path=path)
+    assert engine.indexes.include[("USERS", ("email",))] == ("id", "age")
+    seen = track_pages(engine)
+    rows = run_sql(engine, "SELECT email, age FROM users WHERE email <= 'u0011';")
+    assert [r["age"] for r in rows] == [1, 2, 3, 4, 5, 6, 7, 8, 99, None]
+    # Only pages holding superseded or deleted versions are checked
+    assert seen and set(seen) <= engine.dead_pages["USERS"], seen
+    run_sql(engine, "VACUUM users;")
+    seen.clear()
+    rows = run_sql(engine, "SELECT email, age FROM users WHERE email <= 'u0011';")
+    assert [r["age"] for r in rows] == [1, 2, 3, 4, 5, 6, 7, 8, 99, None]
+    assert seen == []
+    rows = run_sql(engine, "SELECT name FROM users WHERE email = 'u0012';")
+    assert rows == [{"name": "name12"}]
+    print("[PASS] Covered values follow UPDATE / DELETE and survive a restart")
+
+def test_composite_prefix():
+    print("\n=== Composite index prefix matching ===")
+    engine = new_engine()
+    run_sql(engine, "CREATE TABLE events (id INTEGER PRIMARY KEY, region TEXT NOT NULL, day INTEGER NOT NULL, note TEXT);")
+    for i in range(600):
+        run_sql(engine, f"INSERT INTO events VALUES ({i}, 'r{i // 100}', {i % 100}, 'note{i}');")
+    run_sql(engine, "CREATE INDEX events_region_day ON events (region, day);")
+    assert engine.table_stats("events")["page_count"] > 5
+
+    seen = track_pages(engine, "EVENTS")
+    rows = run_sql(engine, "SELECT id, note FROM events WHERE region = 'r2' AND day > 95;")
+    assert [r["id"] for r in rows] == [296, 297, 298, 299]
+    rows = run_sql(engine, "SELECT id, note FROM events WHERE day >= 10 AND region = 'r4' AND day < 12;")
+    assert [r["id"] for r in rows] == [410, 411]
+    rows = run_sql(engine, "SELECT id, note FROM events WHERE region = 'r5' AND day = 7;")
+    assert rows == [{"id": 507, "note": "note507"}]
+    assert len(set(seen)) <= 3, seen
+    print("[PASS] Equality prefix plus a range is a bounded index walk")
+
+    seen.clear()
+    rows = run_sql(engine, "SELECT id, note FROM events WHERE region = 'r3';")
+    assert [r["id"] for r in rows] == list(range(300, 400))
+    assert len(set(seen)) < engine.table_stats("events")["page_count"]
+    rows = run_sql(engine, "SELECT id FROM events WHERE day = 42 AND id > 300;")
+    assert [r["id"] for r in rows] == [342, 442, 542]
+    print("[PASS] A leading-column equality alone uses the prefix")
+
+    seen.clear()
+    rows = run_sql(engine, "SELECT region, day FROM events WHERE region = 'r1' AND day <= 2;")
+    assert rows == [{"region": "r1", "day": d} for d in (0, 1, 2)]
+    assert seen == []
+    assert run_sql(engine, "DELETE FROM events WHERE region = 'r0' AND day >= 50;") == [{"deleted": 50}]
+    assert run_sql(engine, "UPDATE events SET note = 'moved' WHERE region = 'r0' AND day = 3;") == [{"updated": 1}]
+    rows = run_sql(engine, "SELECT id, note FROM events WHERE region = 'r0' AND day > 1;")
+    # The updated row's new version is at the end of the heap
+    assert [r["id"] for r in rows] == [*range(2, 3), *range(4, 50), 3]
+    assert rows[-1]["note"] == "moved"
+    print("[PASS] AND predicates work for index-only scans, DELETE and UPDATE")
+
+    # Partial-key bounds on a three-column tree match a brute-force filter
+    tree = BPlusTree(order=4)
+    keys = [(a, b, c) for a in range(4) for b in range(5) for c in range(3)]
+    for n, key in enumerate(keys):
+        tree.insert(key, n)
+    columns = ("a", "b", "c")
+    for conditions in [
+        [("a", "=", 2)],
+        [("a", ">", 1)],
+        [("a", "<=", 1)],
+        [("a", "=", 1), ("b", ">", 2)],
+        [("a", "=", 1), ("b", "<=", 2)],
+        [("a", "=", 3), ("b", ">=", 1), ("b", "<", 3)],
+        [("a", "=", 0), ("b", "=", 4), ("c", "!=", 1)],
+    ]:
+        _, bounds = IndexManager.prefix_bounds(columns, conditions)
+        got = [key for key, _ in tree.range(**bounds)]
+        want = [
+            key for key in keys
+            if all(
+                {"=": v == x, ">": v > x, ">=": v >= x, "<": v < x, "<=": v <= x}.get(op, True)
+                for col, op, x in conditions
+                for v in [key[columns.index(col)]]
+            )
+        ]
+        assert got == want, (conditions, got, want)
+    print("[PASS] Prefix bounds are exact on partial keys")
+
+def test_delete_rebalances():
+    print("\n=== B+ tree delete with merge / borrow ===")
+    import random
+
+    def leaf_depths(tree, node, depth=0):
+        if node.is_leaf:
+            return {depth}
+        depths = set()
+        for i in range(len(node.children)):
+            depths |= leaf_depths(tree, tree._child(node, i), depth + 1)
+        return depths
+
+    rng = random.Random(3)
+    for int_keys in (False, True):
+        tree = BPlusTree(order=4, int_keys=int_keys)
+        live = []
+        for step in range(3000):
+            if live and rng.random() < 0.45:
+                key, value = live.pop(rng.randrange(len(live)))
+                assert tree.delete(key, value)
+            else:
+                live.append(((rng.randrange(50),), step))
+                tree.insert(*live[-1])
+        assert sorted(tree.range()) == sorted(live)
+        assert len(leaf_depths(tree, tree.root)) == 1
+        assert not tree.delete((7,), -1)
+        for key, value in live:
+            assert tree.delete(key, value)
+        assert tree.root.is_leaf and len(tree.root.keys) == 0
+    print("[PASS] Random churn keeps the tree balanced; emptying it collapses the root")
+
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, "dbfile")
+    engine = Engine(db_path=path)
+    run_sql(engine, "CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT);")
+    for i in range(3000):
+        run_sql(engine, f"INSERT INTO users VALUES ({i}, '{'x' * (i % 90)}u{i}');")
+    run_sql(engine, "CREATE INDEX users_email ON users (email);")
+    trees = [engine.indexes.get("USERS", ("id",)), engine.indexes.get("USERS", ("email",))]
+    before = [sum(n for _, n in tree.extents) for tree in trees]
+    assert run_sql(engine, "DELETE FROM users WHERE id > 99;") == [{"deleted": 2900}]
+    run_sql(engine, "VACUUM users;")
+    trees = [engine.indexes.get("USERS", ("id",)), engine.indexes.get("USERS", ("email",))]
+    after = [sum(n for _, n in tree.extents) for tree in trees]
+    assert all(a * 5 < b for a, b in zip(after, before)), (before, after)
+    print(f"[PASS] Deleting 97% of the rows and vacuuming shrinks the indexes: {before} -> {after} pages")
+
+    engine.close()
+    engine = Engine(db_path=path)
+    rows = run_sql(engine, "SELECT id FROM users WHERE email = 'xxu92';")
+    assert rows == [{"id": 92}]
+    assert run_sql(engine, "SELECT id FROM users WHERE id >= 98;") == [{"id": 98}, {"id": 99}]
+    for i in range(100, 200):
+        run_sql(engine, f"INSERT INTO users VALUES ({i}, 'again{i}');")
+    assert run_sql(engine, "SELECT id FROM users WHERE email = 'again150';") == [{"id": 150}]
+    print("[PASS] Rebalanced paged indexes survive a restart and take new keys")
+
+def test_bloom_filter_pruning():
+    print("\n=== Per-page Bloom filters ===")
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, "dbfile")
+    engine = Engine(db_path=path)
+    run_sql(engine, "CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT, age INTEGER);")
+    for i in range(1500):
+        run_sql(engine, f"INSERT INTO users VALUES ({i}, 'user{(i * 7919) % 1500}@example.com', {i % 40});")
+    run_sql(engine, "CREATE INDEX users_email_bloom ON users USING BLOOM (email);")
+    pages = engine.table_stats("users")["page_count"]
+    assert pages > 10
+
+    seen = track_pages(engine)
+    rows = run_sql(engine, "SELECT id FROM users WHERE email = 'user42@example.com';")
+    assert rows == [{"id": next(i for i in range(1500) if (i * 7919) % 1500 == 42)}]
+    hit = len(set(seen))
+    assert hit <= 3, seen
+    seen.clear()
+    assert run_sql(engine, "SELECT id FROM users WHERE email = 'nobody@example.com';") == []
+    miss = len(set(seen))
+    assert miss <= 2, seen
+    # A Bloom filter never answers lookups or ranges itself
+    assert engine._index_candidates("USERS", [("email", "=", "user1@example.com")]) is None
+    print(f"[PASS] Equalities read {hit} (hit) / {miss} (miss) of {pages} pages")
+
+    run_sql(engine, "INSERT INTO users VALUES (2000, 'late@example.com', 1);")
+    assert run_sql(engine, "SELECT id FROM users WHERE email = 'late@example.com';") == [{"id": 2000}]
+    run_sql(engine, "UPDATE users SET email = 'user4x@example.com' WHERE email = 'user42@example.com';")
+    assert len(run_sql(engine, "SELECT id FROM users WHERE email = 'user4x@example.com';")) == 1
+    seen.clear()
+    assert run_sql(engine, "DELETE FROM users WHERE email = 'late@example.com';") == [{"deleted": 1}]
+    assert len(set(seen)) <= 3, seen
+    print("[PASS] Filters follow INSERT / UPDATE and prune DELETE")
+
+    engine.close()
+    engine = Engine(db_path=path)
+    seen = track_pages(engine)
+    assert run_sql(engine, "SELECT id FROM users WHERE email = 'user1@example.com';") != []
+    assert len(set(seen)) <= 3, seen
+    old_bloom = engine.indexes.get("USERS", BloomColumns(("email",)))
+    run_sql(engine, "DELETE FROM users WHERE age = 5;")
+    run_sql(engine, "VACUUM users;")
+    assert engine.indexes.get("USERS", BloomColumns(("email",))) is not old_bloom
+    expected = [r for r in engine.scan_table("USERS") if r["email"] == "user7@example.com"]
+    rows = run_sql(engine, "SELECT id, email, age FROM users WHERE email = 'user7@example.com';")
+    assert rows == expected
+    print("[PASS] Filters persist across a restart and are rebuilt by VACUUM")
+
+    try:
+        run_sql(engine, "CREATE UNIQUE INDEX users_age_bloom ON users USING BLOOM (age);")
+        raise AssertionError("UNIQUE Bloom filter accepted")
+    except Exception as exc:
+        assert "UNIQUE" in str(exc), exc
+    run_sql(engine, "DROP INDEX users_email_bloom;")
+    assert len(run_sql(engine, "SELECT id FROM users WHERE email = 'user7@example.com';")) == len(expected)
+    print("[PASS] Bloom indexes reject UNIQUE and can be dropped")
+
+
+def expect_violation(engine, sql, fragment="FOREIGN KEY"):
+    try:
+        run_sql(engine, sql)
+    except Exception as exc:
+        assert fragment in str(exc), exc
+        return
+    raise AssertionError(f"accepted: {sql}")
+
+
+def test_foreign_keys():
+    print("\n=== Foreign keys ===")
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, "dbfile")
+    engine = Engine(db_path=path)
+    run_sql(engine, "CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT);")
+    run_sql(engine, "CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER REFERENCES customers(id), note TEXT);")
+    run_sql(engine, "CREATE TABLE lines (id INTEGER PRIMARY KEY, order_id INTEGER REFERENCES orders(id) ON DELETE CASCADE);")
+    for i in range(1, 51):
+        run_sql(engine, f"INSERT INTO customers VALUES ({i}, 'c{i}');")
+    # The referencing column gets its own index for parent-side probes
+    assert engine.indexes.get("ORDERS", ("customer_id",)) is not None
+
+    run_sql(engine, "INSERT INTO orders VALUES (1, 7, 'first');")
+    run_sql(engine, "INSERT INTO orders VALUES (2, NULL, 'no customer');")
+    expect_violation(engine, "INSERT INTO orders VALUES (3, 999, 'orphan');")
+    print("[PASS] INSERT probes the referenced PRIMARY KEY; NULL references nothing")
+
+    probes = []
+    key_index = engine.indexes.get("CUSTOMERS", ("id",))
+    original_search = key_index.search
+    key_index.search = lambda key: probes.append(key) or original_search(key)
+    values = ", ".join(f"({i}, {i % 3 + 1}, 'batch')" for i in range(100, 400))
+    run_sql(engine, f"INSERT INTO orders VALUES {values};")
+    assert sorted(probes) == [(1,), (2,), (3,)], probes
+    batch_probes = len(probes)
+    before = engine.row_count("orders")
+    expect_violation(engine, "INSERT INTO orders VALUES (500, 1, 'ok'), (501, 998, 'bad');")
+    expect_violation(engine, "INSERT INTO orders VALUES (502, 1, 'x'), (502, 2, 'y');", "PRIMARY KEY")
+    assert engine.row_count("orders") == before
+    key_index.search = original_search
+    print(f"[PASS] A 300-row batch made {batch_probes} probes; a failing batch stores nothing")
+
+    for i in range(1, 6):
+        run_sql(engine, f"INSERT INTO lines VALUES ({i}, {100 + i % 2});")
+    expect_violation(engine, "DELETE FROM customers WHERE id = 2;")
+    assert engine.row_count("customers") == 50
+    seen = track_pages(engine, "ORDERS")
+    assert run_sql(engine, "DELETE FROM customers WHERE id = 40;") == [{"deleted": 1}]
+    assert len(set(seen)) <= 1, seen
+    print("[PASS] RESTRICT blocks deleting referenced rows; others delete without scanning the child")
+
+    assert run_sql(engine, "DELETE FROM orders WHERE id = 100;") == [{"deleted": 1}]
+    assert sorted(r["id"] for r in engine.scan_table("LINES")) == [1, 3, 5]
+    assert run_sql(engine, "DELETE FROM orders WHERE customer_id = 3;") == [{"deleted": 100}]
+    assert engine.row_count("lines") == 0
+    print("[PASS] ON DELETE CASCADE removes referencing rows")
+
+    expect_violation(engine, "UPDATE orders SET customer_id = 999 WHERE id = 1;")
+    expect_violation(engine, "UPDATE customers SET id = 70 WHERE id = 7;")
+    run_sql(engine, "UPDATE orders SET customer_id = 8 WHERE id = 1;")
+    run_sql(engine, "UPDATE customers SET id = 70 WHERE id = 7;")
+    expect_violation(engine, "DROP TABLE customers;", "referenced")
+    expect_violation(engine, "TRUNCATE TABLE customers;", "reference")
+    expect_violation(engine, "DROP INDEX orders_customer_id_idx;", "FOREIGN KEY")
+    expect_violation(engine, "CREATE TABLE bad (x TEXT REFERENCES customers(name));", "PRIMARY KEY or UNIQUE")
+    print("[PASS] UPDATE, DROP, TRUNCATE and DROP INDEX keep references intact")
+
+    engine.close()
+    engine = Engine(db_path=path)
+    expect_violation(engine, "INSERT INTO orders VALUES (600, 999, 'orphan');")
+    expect_violation(engine, "DELETE FROM customers WHERE id = 1;")
+    run_sql(engine, "CREATE TABLE staff (id INTEGER PRIMARY KEY, boss INTEGER REFERENCES staff(id) ON DELETE CASCADE);")
+    run_sql(engine, "INSERT INTO staff VALUES (1, NULL), (2, 1), (3, 2);")
+    assert run_sql(engine, "DELETE FROM staff WHERE id = 1;") == [{"deleted": 1}]
+    assert engine.row_count("staff") == 0
+    print("[PASS] Foreign keys persist across a restart; self-references cascade")
+
+    # Parents come before their children in the catalog
+    assert list(engine.catalog.tables)[:2] == ["CUSTOMERS", "ORDERS"]
+    dropped = engine.drop_all_tables()
+    assert sorted(dropped) == ["CUSTOMERS", "LINES", "ORDERS", "STAFF"]
+    assert dropped.index("LINES") < dropped.index("ORDERS") < dropped.index("CUSTOMERS")
+    assert not engine.catalog.tables
+    print("[PASS] Dropping every table drops referencing tables first")
+
+
+def hammer(tree, stable, seconds=1.0, readers=3):
+    """
+    One writer inserts and deletes odd keys while `readers` threads look
+    up and scan the even keys in `stable`, which never change. Returns
+    the problems the readers saw.
+    """
+    import random
+    import threading
+    import time
+
+    problems = []
+    stop = threading.Event()
+
+    def writer():
+        rng = random.Random(1)
+        live = []
+        while not stop.is_set():
+            if live and rng.random() < 0.45:
+                key = live.pop(rng.randrange(len(live)))
+                if not tree.delete((key,), (key, 0)):
+                    problems.append(f"lost {key}")
+            else:
+                key = rng.randrange(len(stable) * 2) | 1
+                tree.insert((key,), (key, 0))
+                live.append(key)
+        for key in live:
+            tree.delete((key,), (key, 0))
+
+    def reader(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            key = rng.choice(stable)
+            if list(tree.search((key,))) != [(key, 0)]:
+                problems.append(f"search {key}")
+            lo = rng.choice(stable)
+            keys = [k[0] for k, _ in tree.range(lo=(lo,), hi=(lo + 200,))]
+            if keys != sorted(keys) or [k for k in keys if k % 2 == 0] != list(range(lo, lo + 201, 2)):
+                problems.append(f"range from {lo}")
+            back = [k[0] for k, _ in tree.range(hi=(lo + 200,), lo=(lo,), reverse=True)]
+            if [k for k in back if k % 2 == 0] != list(range(lo + 200, lo - 1, -2)):
+                problems.append(f"reverse range from {lo}")
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    threads = [threading.Thread(target=writer)] + [
+        threading.Thread(target=reader, args=(n,)) for n in range(readers)
+    ]
+    try:
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    return problems
+
+
+def test_concurrent_readers_and_writer():
+    print("\n=== Concurrent readers and writer ===")
+    stable = list(range(0, 4000, 2))
+    tree = BPlusTree(order=8, int_keys=True)
+    for key in stable:
+        tree.insert((key,), (key, 0))
+    problems = hammer(tree, stable[:-110])
+    assert problems == [], problems[:5]
+    assert tree.verify() == len(stable)
+    print("[PASS] In-memory tree: lookups and scans stay exact beside splits and merges")
+
+    tmpdir = tempfile.mkdtemp()
+    engine = Engine(db_path=os.path.join(tmpdir, "dbfile"), page_size=256)
+    paged = PagedBPlusTree(engine.pager, engine._allocate_page, engine._free_page, int_keys=True)
+    for key in stable:
+        paged.insert((key,), (key, 0))
+    problems = hammer(paged, stable[:-110])
+    assert problems == [], problems[:5]
+    assert paged.verify() == len(stable)
+    assert [k[0] for k, _ in paged.range()] == stable
+    print("[PASS] Paged tree: the same under evictions and page reuse")
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print("MILESTONE 3: ENGINE-MAINTAINED INDEXES")
+    print("=" * 80)
+
+    test_index_driven_update_and_delete()
+    test_create_and_drop_index()
+    test_paged_index_survives_restart()
+    test_range_and_order_by_use_index()
+    test_search_duplicates_across_leaves()
+    test_bulk_load()
+    test_hash_index()
+    test_compact_int_keys()
+    test_covering_index()
+    test_composite_prefix()
+    test_delete_rebalances()
+    test_bloom_filter_pruning()
+    test_foreign_keys()
+    test_concurrent_readers_and_writer()
+
+    print("=" * 80)
+    print("ALL ENGINE INDEX TESTS PASSED")
+    print("=" * 80)
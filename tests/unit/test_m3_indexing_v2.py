@@ -16,37 +16,17 @@ Demonstrates:
 - Composite range search
 """
 
-import bisect
 from engine.storage.table import Table
 from engine.index.index_manager import IndexManager
 from engine.planner import cost
 
 
 def range_search(index_mgr, table, column, start_key, end_key):
-    """Single-column range search using B+ Tree linked leaves."""
+    """Single-column range search using the B+ Tree range iterator."""
     tree = index_mgr.indexes.get(table.name, {}).get((column,))
     if not tree:
         return []
-
-    start_key_tuple = (start_key,)
-    node = tree.root
-    while not node.is_leaf:
-        i = bisect.bisect_left(node.keys, start_key_tuple)
-        node = node.children[i]
-
-    results = []
-    while node:
-        for k, row in zip(node.keys, node.children):
-            key_value = k[0] if isinstance(k, tuple) else k
-            if start_key <= key_value <= end_key:
-                results.append(row)
-            elif key_value > end_key:
-                return results
-        node = node.next
-
-    # Sort results by key for consistent output
-    results.sort(key=lambda r: r[column])
-    return results
+    return [row for _, row in tree.range(start_key, end_key)]
 
 
 def composite_range_search(index_mgr, table, columns, start_key, end_key):
@@ -54,26 +34,7 @@ def composite_range_search(index_mgr, table, columns, start_key, end_key):
     tree = index_mgr.indexes.get(table.name, {}).get(tuple(columns))
     if not tree:
         return []
-
-    start_key = tuple(start_key)
-    end_key = tuple(end_key)
-    node = tree.root
-    while not node.is_leaf:
-        i = bisect.bisect_left(node.keys, start_key)
-        node = node.children[i]
-
-    results = []
-    while node:
-        for k, row in zip(node.keys, node.children):
-            if start_key <= k <= end_key:
-                results.append(row)
-            elif k > end_key:
-                return results
-        node = node.next
-
-    # Sort results by composite keys for consistent output
-    results.sort(key=lambda r: tuple(r[col] for col in columns))
-    return results
+    return [row for _, row in tree.range(tuple(start_key), tuple(end_key))]
 
 
 def main():
@@ -11,6 +11,7 @@ import threading
 import time
 from engine.transaction.transaction import Transaction
 from engine.transaction.lock_manager import LockManager
+from engine.exceptions import DeadlockError, LockTimeoutError, TransactionError
 
 
 # --- Mock table structure from Milestone 3 ---
@@ -88,3 +89,258 @@ for t in writer_threads + reader_threads:
 # --- Final table state ---
 print("\nFinal table state:")
 print(users_table)
+
+
+# --- Hierarchical locks ---
+def blocked(manager, txn_id, resource, mode, timeout=0.2):
+    """True if the request is still waiting after `timeout` (it is then left to finish)."""
+    thread = threading.Thread(target=manager.acquire, args=(txn_id, resource, mode), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return thread.is_alive()
+
+
+def test_intention_locks():
+    print("\n=== Hierarchical intention locks ===")
+    locks = LockManager()
+    row1 = LockManager.row("USERS", (3, 40))
+    row2 = LockManager.row("USERS", (3, 90))
+    locks.acquire("t1", row1, "X")
+    assert locks.holds("t1", ("USERS",)) == "IX"
+    assert locks.holds("t1", ("USERS", 3)) == "IX"
+    assert locks.holds("t1", row1) == "X"
+    assert not blocked(locks, "t2", row2, "X")
+    assert not blocked(locks, "t3", LockManager.row("USERS", (4, 12)), "S")
+    print("[PASS] Writers of different rows share IX on the table and page")
+
+    assert blocked(locks, "t4", row1, "S")
+    assert blocked(locks, "t5", ("USERS",), "S")
+    assert blocked(locks, "t6", ("USERS", 3), "X")
+    locks.release_all("t1")
+    locks.release_all("t2")
+    time.sleep(0.05)
+    assert locks.holds("t4", row1) == "S"
+    # t5 queued for the table first: its S fits beside the readers' IS,
+    # and t6's IX waits behind it
+    assert locks.holds("t5", ("USERS",)) == "S"
+    assert locks.holds("t6", ("USERS", 3)) is None
+    locks.release_all("t5")
+    time.sleep(0.05)
+    assert locks.holds("t6", ("USERS",)) == "IX"
+    assert locks.holds("t6", ("USERS", 3)) is None  # t4 still reads below it
+    locks.release_all("t4")
+    time.sleep(0.05)
+    assert locks.holds("t6", ("USERS", 3)) == "X"
+    locks.release_all("t3")
+    locks.release_all("t6")
+    assert not locks.locks and not locks.queues
+    print("[PASS] Row, page and table locks conflict through the intention locks")
+
+
+def test_lock_upgrades():
+    print("\n=== Lock upgrades ===")
+    locks = LockManager()
+    locks.acquire("t1", "ORDERS", "S")
+    locks.acquire("t1", LockManager.row("ORDERS", 7), "X")
+    assert locks.holds("t1", "ORDERS") == "SIX"
+    assert not blocked(locks, "t2", "ORDERS", "IS")
+    assert blocked(locks, "t3", LockManager.row("ORDERS", 8), "X")
+    locks.release_all("t1")
+    time.sleep(0.05)
+    assert locks.holds("t3", LockManager.row("ORDERS", 8)) == "X"
+    assert [LockManager.combine(a, b) for a, b in [("IS", "IX"), ("IX", "S"), ("S", "S"), ("SIX", "X")]] == [
+        "IX", "SIX", "S", "X"
+    ]
+    print("[PASS] A second request upgrades to the weakest mode covering both")
+
+
+def test_read_write_locks():
+    print("\n=== Read/write lock interface ===")
+    locks = LockManager()
+    locks.acquire_write("ORDERS", "t1")
+    assert blocked(locks, "t2", "ORDERS", "S")
+    locks.release_write("ORDERS")
+    time.sleep(0.05)
+    assert locks.holds("t2", "ORDERS") == "S"
+    locks.acquire_read("ORDERS", "t3")
+    try:
+        locks.release_read("ORDERS")
+        assert False, "release without a transaction did not fail"
+    except TransactionError:
+        pass
+    locks.release_read("ORDERS", "t2")
+    locks.release_read("ORDERS")
+    locks.release_read("ORDERS")  # no holder left: nothing to release
+    assert not locks.locks
+    print("[PASS] A release without a transaction frees the only holder")
+
+
+def test_row_locking_transactions():
+    print("\n=== Row-locking transactions ===")
+
+    class Accounts:
+        name = "accounts"
+
+        def __init__(self):
+            self.rows = {i: {"id": i, "balance": 0} for i in range(8)}
+
+        def update(self, rid, changes):
+            old = {k: self.rows[rid][k] for k in changes}
+            self.rows[rid].update(changes)
+            return old
+
+    table = Accounts()
+    locks = LockManager()
+    holding = threading.Barrier(8, timeout=5)
+
+    def worker(key):
+        txn = Transaction(locks)
+        txn.update(table, key, {"balance": key * 10})
+        holding.wait()  # every writer holds its row lock at once
+        txn.commit()
+
+    threads = [threading.Thread(target=worker, args=(key,)) for key in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [row["balance"] for row in table.rows.values()] == [k * 10 for k in range(8)]
+    assert not locks.locks and not locks.owned
+    print("[PASS] Transactions on disjoint rows hold their locks concurrently")
+
+    txn = Transaction(locks)
+    txn.update(table, 1, {"balance": -1})
+    assert blocked(locks, "other", LockManager.row("accounts", 1), "S")
+    txn.rollback()
+    time.sleep(0.05)
+    assert table.rows[1]["balance"] == 10
+    assert locks.holds("other", LockManager.row("accounts", 1)) == "S"
+    print("[PASS] Row locks are held until rollback, which restores the row")
+
+
+# --- Wait queues, timeouts and deadlocks ---
+def test_fifo_wait_queues():
+    print("\n=== FIFO wait queues ===")
+    locks = LockManager()
+    locks.acquire("r1", "ITEMS", "S")
+    assert blocked(locks, "w1", "ITEMS", "X")
+    # A reader arriving after the queued writer does not barge past it
+    assert blocked(locks, "r2", "ITEMS", "S")
+    assert [request.txn_id for request in locks.queues[("ITEMS",)]] == ["w1", "r2"]
+    waiting = {txn: request for txn, (_, request) in locks.waiting.items()}
+    locks.release_all("r1")
+    time.sleep(0.05)
+    assert locks.holds("w1", "ITEMS") == "X"
+    assert not waiting["r2"].event.is_set()
+    print("[PASS] Requests are granted in arrival order; a release wakes only the granted one")
+
+    locks.release_all("w1")
+    time.sleep(0.05)
+    assert locks.holds("r2", "ITEMS") == "S"
+    locks.release_all("r2")
+    assert not locks.locks and not locks.queues and not locks.waiting
+
+
+def test_lock_timeouts():
+    print("\n=== Lock wait timeouts ===")
+    locks = LockManager(lock_timeout=0.1)
+    locks.acquire("t1", LockManager.row("ITEMS", 1), "X")
+    start = time.monotonic()
+    try:
+        locks.acquire("t2", LockManager.row("ITEMS", 1), "S")
+        assert False, "lock wait did not time out"
+    except LockTimeoutError:
+        pass
+    assert 0.1 <= time.monotonic() - start < 1
+    assert locks.holds("t2", ("ITEMS",)) == "IS"  # kept until released
+    assert not locks.queues
+    locks.release_all("t2")
+    locks.acquire("t3", LockManager.row("ITEMS", 2), "X", timeout=0)
+    print("[PASS] A request waits at most the lock timeout and leaves the queue")
+
+    stats = locks.stats()
+    assert stats["waits"] == 1 and stats["timeouts"] == 1
+    assert stats["max_wait"] >= 0.1 and stats["mean_wait"] == stats["wait_time"]
+    print(f"[PASS] Wait metrics: {stats['waits']} wait, {stats['max_wait'] * 1000:.0f} ms longest")
+
+
+def test_deadlock_detection():
+    print("\n=== Deadlock detection ===")
+
+    class Items:
+        name = "items"
+
+        def __init__(self):
+            self.rows = {1: {"qty": 0}, 2: {"qty": 0}}
+
+        def update(self, rid, changes):
+            old = {k: self.rows[rid][k] for k in changes}
+            self.rows[rid].update(changes)
+            return old
+
+    table = Items()
+    locks = LockManager(deadlock_interval=0.05)
+    first = threading.Barrier(2, timeout=5)
+    outcome = {}
+
+    def worker(name, a, b):
+        txn = Transaction(locks)
+        try:
+            txn.update(table, a, {"qty": name})
+            first.wait()  # both hold their first row
+            time.sleep(0.01 if name == "t1" else 0.1)
+            txn.update(table, b, {"qty": name})
+            txn.commit()
+            outcome[name] = "committed"
+        except DeadlockError:
+            outcome[name] = "aborted"
+
+    threads = [
+        threading.Thread(target=worker, args=("t1", 1, 2)),
+        threading.Thread(target=worker, args=("t2", 2, 1)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert not any(thread.is_alive() for thread in threads), "deadlock not broken"
+    # t2 started waiting last, so it is the victim; its update was undone
+    assert outcome == {"t1": "committed", "t2": "aborted"}, outcome
+    assert table.rows == {1: {"qty": "t1"}, 2: {"qty": "t1"}}
+    assert locks.stats()["deadlocks"] == 1
+    assert not locks.locks and not locks.waiting
+    print("[PASS] The detector aborts the youngest waiter of a cycle; the other commits")
+
+    # Two readers upgrading the same resource wait for each other
+    locks = LockManager(deadlock_interval=None)
+    errors = []
+
+    def upgrade(txn_id):
+        try:
+            locks.acquire(txn_id, "ITEMS", "X")
+        except DeadlockError:
+            errors.append(txn_id)
+            locks.release_all(txn_id)
+
+    locks.acquire("r1", "ITEMS", "S")
+    locks.acquire("r2", "ITEMS", "S")
+    upgrades = [threading.Thread(target=upgrade, args=(txn,)) for txn in ("r1", "r2")]
+    for thread in upgrades:
+        thread.start()
+        time.sleep(0.05)
+    assert locks.wait_for_graph() == {"r1": {"r2"}, "r2": {"r1"}}
+    assert locks.detect_deadlocks() == ["r2"]
+    for thread in upgrades:
+        thread.join(timeout=5)
+    assert errors == ["r2"] and locks.holds("r1", "ITEMS") == "X"
+    print("[PASS] Upgrade deadlocks are found in the wait-for graph")
+
+
+if __name__ == "__main__":
+    test_intention_locks()
+    test_lock_upgrades()
+    test_read_write_locks()
+    test_row_locking_transactions()
+    test_fifo_wait_queues()
+    test_lock_timeouts()
+    test_deadlock_detection()
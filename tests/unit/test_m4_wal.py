@@ -0,0 +1,415 @@
+"""
+Milestone 4 Test Harness: Write-Ahead Log
+Demonstrates:
+- Binary, length-prefixed, CRC-checked records with increasing LSNs
+- Records read back after reopening; a torn or corrupt tail is cut off
+- Fixed-size segment files, recycled or deleted once truncated
+- Group commit: concurrent committers share fsyncs
+- Engine crash recovery: redo of committed changes, torn pages repaired
+  from full page images, undo of an interrupted operation (also when
+  recovery itself is interrupted)
+- Fuzzy checkpoints and the background page writer keep the log on disk
+  bounded under a continuous write load
+- Pages freed by DROP TABLE or TRUNCATE and reused by another table are
+  not rebuilt from their earlier life
+- Pages added to a table are logged, not saved to the catalog one by one,
+  and recovery restores them to the table's extents
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from engine.engine import Engine
+from engine.storage.page import RowPage
+from engine.transaction.log import WALog
+
+
+def new_log(**kwargs):
+    """WAL in a fresh temporary directory."""
+    tmpdir = tempfile.mkdtemp()
+    return WALog(os.path.join(tmpdir, "wal.log"), **kwargs)
+
+
+def test_records_round_trip():
+    print("\n=== Records and LSNs ===")
+    wal = new_log()
+    first = wal.log("t1", "INSERT", "USERS", {"id": 1, "name": "Ann", "score": 1.5})
+    second = wal.log("t1", "INSERT", "USERS", {"id": 2, "name": None, "score": 0.0})
+    commit = wal.commit("t1")
+    assert first < second < commit
+    assert wal.syncs == 1
+    print("[PASS] LSNs increase; COMMIT is synced")
+
+    wal.close()
+    records = WALog(wal.path).recover()
+    assert [r["lsn"] for r in records] == [first, second, commit]
+    assert records[0]["data"] == {"id": 1, "name": "Ann", "score": 1.5}
+    assert records[1]["data"] == {"id": 2, "name": None, "score": 0.0}
+    assert (records[2]["action"], records[2]["table"], records[2]["data"]) == ("COMMIT", None, None)
+    print("[PASS] Records read back after reopening")
+
+    with open(wal.segment_path(0), "rb") as f:
+        assert f.read(len(WALog.MAGIC)) == WALog.MAGIC
+    print("[PASS] Log file is binary (magic header, framed records)")
+
+
+def test_torn_tail_is_cut_off():
+    print("\n=== Torn and corrupt tails ===")
+    wal = new_log()
+    for i in range(5):
+        wal.log("t1", "INSERT", "USERS", {"id": i})
+    wal.commit("t1")
+    wal.close()
+    end = wal.end
+
+    # A crash in the middle of writing the next record
+    with open(wal.segment_path(0), "r+b") as f:
+        f.seek(end)
+        f.write(b"\x00\x00\x00\x40\x12\x34")
+    reopened = WALog(wal.path)
+    assert len(reopened.recover()) == 6
+    with open(wal.segment_path(0), "rb") as f:
+        f.seek(end)
+        assert not f.read().strip(b"\0")
+    lsn = reopened.log("t2", "INSERT", "USERS", {"id": 9})
+    reopened.commit("t2")
+    reopened.close()
+    assert lsn == end
+    assert [r["txn_id"] for r in WALog(wal.path).recover()][-2:] == ["t2", "t2"]
+    print("[PASS] A partial record is zeroed and appends continue after the last good one")
+
+    # Flip a byte inside the last record's payload: the CRC rejects it
+    with open(wal.segment_path(0), "r+b") as f:
+        f.seek(reopened.end - 2)
+        byte = f.read(1)
+        f.seek(reopened.end - 2)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    records = WALog(wal.path).recover()
+    assert len(records) == 7 and records[-1]["action"] == "INSERT"
+    print("[PASS] A record failing its CRC ends the log")
+
+
+def test_segments():
+    print("\n=== Segments ===")
+    wal = new_log(segment_size=4096, spare_segments=2)
+    lsns = [wal.log("t1", "INSERT", "USERS", {"id": i, "note": "x" * 100}) for i in range(200)]
+    wal.commit("t1")
+    segments = wal.segments()
+    assert segments == list(range(len(segments))) and len(segments) > 5
+    assert all(os.path.getsize(wal.segment_path(n)) == 4096 for n in segments)
+    assert all(lsn // 4096 == (lsn + 130) // 4096 for lsn in lsns)
+    assert [r["lsn"] for r in wal.records()][:-1] == lsns
+    print(f"[PASS] {len(segments)} fixed-size segments; records never straddle two")
+
+    keep = lsns[150]
+    assert wal.truncate(keep) == keep // 4096
+    remaining = wal.segments()
+    assert remaining[0] == keep // 4096 and len(remaining) == len(segments) - keep // 4096 + 2
+    assert [r["lsn"] for r in wal.records(keep)][:-1] == lsns[150:]
+    print("[PASS] Truncation keeps the segment holding the LSN; two old ones become spares")
+
+    # The spares still hold their old records, which never pass for new ones
+    wal.close()
+    reopened = WALog(wal.path, segment_size=4096)
+    assert reopened.end == wal.end
+    more = [reopened.log("t2", "INSERT", "USERS", {"id": i, "note": "y" * 100}) for i in range(60)]
+    reopened.commit("t2")
+    reopened.close()
+    records = WALog(wal.path, segment_size=4096).records(keep)
+    assert [r["lsn"] for r in records if r["action"] == "INSERT"] == lsns[150:] + more
+    assert len(WALog(wal.path, segment_size=4096).segments()) == len(remaining)
+    print("[PASS] Appends continue into the recycled segments")
+
+    checkpoint = WALog(wal.path, segment_size=4096).checkpoint({"redo": more[-1]})
+    assert WALog(wal.path, segment_size=4096).last_checkpoint()["lsn"] == checkpoint
+    print("[PASS] The control file points at the last checkpoint")
+
+
+def test_group_commit():
+    print("\n=== Group commit ===")
+    for delay in (0.0, 0.002):
+        wal = new_log(commit_delay=delay, group_size=8)
+        writers, commits = 16, 20
+        barrier = threading.Barrier(writers)
+
+        def committer(n):
+            barrier.wait()
+            for i in range(commits):
+                wal.log(f"w{n}", "INSERT", "T", {"n": n, "i": i})
+                wal.commit(f"w{n}")
+
+        threads = [threading.Thread(target=committer, args=(n,)) for n in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wal.close()
+
+        records = WALog(wal.path).recover()
+        assert sum(r["action"] == "COMMIT" for r in records) == writers * commits
+        assert [r["lsn"] for r in records] == sorted(r["lsn"] for r in records)
+        assert wal.syncs < writers * commits, wal.syncs
+        print(
+            f"[PASS] commit_delay={delay}: {writers * commits} commits, "
+            f"{wal.syncs} fsyncs, every commit durable"
+        )
+
+
+def crash(db_path, body, **options):
+    """Run `body` against an Engine on `db_path` in a child process that exits abruptly."""
+    script = textwrap.dedent(
+        f"""
+        import os, sys
+        sys.path.insert(0, {PROJECT_ROOT!r})
+        from engine.engine import Engine
+        engine = Engine(db_path={db_path!r}, **{options!r})
+        """
+    ) + textwrap.dedent(body) + "\nos._exit(3)\n"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+    assert result.returncode == 3, result.stderr
+
+
+def ids(engine):
+    return sorted(row["id"] for row in engine.scan_table("items"))
+
+
+def test_engine_recovery():
+    print("\n=== Engine crash recovery ===")
+    db_path = os.path.join(tempfile.mkdtemp(), "dbfile")
+    engine = Engine(db_path=db_path)
+    engine.create_table("items", [("ID", "INT"), ("NAME", "TEXT")])
+    engine.close()
+
+    # Committed inserts whose heap pages never reached the data file
+    crash(db_path, """
+        for i in range(300):
+            engine.insert_row("items", [i, "item%03d" % i])
+    """)
+    engine = Engine(db_path=db_path)
+    assert ids(engine) == list(range(300))
+    assert engine.row_count("items") == 300
+    assert all(
+        RowPage.page_lsn(engine.pager.get_page(p)) > 0
+        for p in engine.catalog.get_table("ITEMS").pages()
+    )
+    engine.close()
+    print("[PASS] Committed rows are redone from the log; heap pages carry page LSNs")
+
+    # A crash while heap pages are being written leaves a torn page
+    crash(db_path, """
+        for i in range(300, 320):
+            engine.insert_row("items", [i, "item%03d" % i])
+        page_num = engine.catalog.get_table("ITEMS").pages()[0]
+        engine.delete_rows("items", lambda row: row["id"] < 10)
+        engine.pager.flush_page(page_num)
+        with open(engine.file_manager.path, "r+b") as f:
+            f.seek(page_num * engine.pager.page_size + 100)
+            f.write(bytes([0xFF]) * 1000)
+    """)
+    engine = Engine(db_path=db_path)
+    assert ids(engine) == list(range(10, 320))
+    engine.close()
+    print("[PASS] A torn page is rebuilt from its full page image")
+
+    # An operation cut short by the crash, some of its pages already written
+    crash(db_path, """
+        deleted = []
+        def where(row):
+            deleted.append(row["id"])
+            if len(deleted) == 200:
+                engine.flush()
+                os._exit(3)
+            return True
+        engine.delete_rows("items", where)
+    """)
+    engine = Engine(db_path=db_path)
+    assert ids(engine) == list(range(10, 320))
+    assert engine.row_count("items") == 310
+    engine.close()
+    print("[PASS] An interrupted DELETE is undone")
+
+    # Recovery itself crashes half way through undoing another one
+    crash(db_path, """
+        renamed = []
+        def where(row):
+            renamed.append(row["id"])
+            if len(renamed) == 250:
+                engine.flush()
+                os._exit(3)
+            return True
+        engine.update_rows("items", {"name": "renamed"}, where)
+    """)
+    records = WALog(db_path + "-wal").recover()
+    loser = records[-1]["txn_id"]
+    writes = sum(1 for r in records if r["txn_id"] == loser and r["action"] == "WRITE")
+    crash_in_undo = textwrap.dedent(f"""
+        import os, sys
+        sys.path.insert(0, {PROJECT_ROOT!r})
+        from engine.transaction.log import WALog
+        log = WALog.log
+        undone = []
+        def failing_log(self, txn_id, action, table, data):
+            lsn = log(self, txn_id, action, table, data)
+            if action == "UNDO":
+                undone.append(lsn)
+                if len(undone) == {writes // 2}:
+                    self.flush()
+                    os._exit(3)
+            return lsn
+        WALog.log = failing_log
+        from engine.engine import Engine
+        Engine(db_path={db_path!r})
+    """)
+    result = subprocess.run([sys.executable, "-c", crash_in_undo], capture_output=True, text=True)
+    assert result.returncode == 3, result.stderr
+    engine = Engine(db_path=db_path)
+    assert ids(engine) == list(range(10, 320))
+    assert all(row["name"].startswith("item") for row in engine.scan_table("items"))
+    records = WALog(db_path + "-wal").recover()
+    undos = sum(1 for r in records if r["txn_id"] == loser and r["action"] == "UNDO")
+    assert undos == writes, (undos, writes)
+    engine.close()
+    print("[PASS] Undo resumes where a crashed recovery stopped, each change undone once")
+
+
+def test_fuzzy_checkpoints():
+    print("\n=== Fuzzy checkpoints ===")
+    db_path = os.path.join(tempfile.mkdtemp(), "dbfile")
+    options = {"wal_segment_size": 64 * 1024, "checkpoint_interval": 128 * 1024}
+    engine = Engine(db_path=db_path, **options)
+    engine.create_table("items", [("ID", "INT"), ("NAME", "TEXT")])
+    engine.close()
+
+    # Continuous inserts and updates, far more log than is kept
+    crash(db_path, """
+        import time
+        for i in range(3000):
+            engine.insert_row("items", [i, "item%04d" % i])
+            if i % 500 == 499:
+                engine.update_rows("items", {"name": "renamed_"}, lambda row: row["id"] < 100)
+                time.sleep(0.2)
+        assert engine._page_writer is not None
+        assert engine.wal.end > 12 * engine.wal.segment_size
+    """, **options)
+    wal = WALog(db_path + "-wal")
+    assert len(wal.segments()) <= 6, wal.segments()
+    checkpoint = wal.last_checkpoint()
+    assert wal.end - checkpoint["data"]["redo"] < 4 * wal.segment_size
+    print(f"[PASS] {len(wal.segments())} segments kept; redo starts "
+          f"{(wal.end - checkpoint['data']['redo']) // 1024} KiB before the end")
+
+    engine = Engine(db_path=db_path)
+    assert ids(engine) == list(range(3000))
+    assert sum(row["name"] == "renamed_" for row in engine.scan_table("items")) == 100
+    assert engine.row_count("items") == 3000
+    engine.close()
+    print("[PASS] Recovery from the fuzzy checkpoint restores every committed row")
+
+
+def test_freed_pages_reused():
+    print("\n=== Freed pages reused before a crash ===")
+    db_path = os.path.join(tempfile.mkdtemp(), "dbfile")
+    engine = Engine(db_path=db_path)
+    engine.create_table("items", [("ID", "INT"), ("NAME", "TEXT")])
+    engine.close()
+
+    crash(db_path, """
+        engine.create_table("a", [("ID", "INT"), ("NAME", "TEXT")])
+        for i in range(5):
+            engine.insert_row("a", [i, "a%d" % i])
+        pages = engine.catalog.get_table("A").pages()
+        engine.drop_table("a")
+        engine.create_table("b", [("ID", "INT"), ("NAME", "TEXT")])
+        assert engine.catalog.get_table("B").pages() == pages
+        engine.insert_row("items", [1, "item"])
+    """)
+    engine = Engine(db_path=db_path)
+    assert list(engine.scan_table("b")) == []
+    assert engine.row_count("b") == 0
+    assert ids(engine) == [1]
+    engine.close()
+    print("[PASS] A table created on a dropped table's page reopens empty")
+
+    crash(db_path, """
+        engine.create_table("c", [("ID", "INT"), ("NAME", "TEXT")])
+        for i in range(400):
+            engine.insert_row("c", [i, "c%03d" % i])
+        freed = engine.catalog.get_table("C").pages()[1:]
+        engine.truncate_table("c")
+        engine.create_table("d", [("ID", "INT"), ("NAME", "TEXT")])
+        assert engine.catalog.get_table("D").pages()[0] in freed
+        for i in range(3):
+            engine.insert_row("d", [i, "d%d" % i])
+    """)
+    engine = Engine(db_path=db_path)
+    assert list(engine.scan_table("c")) == []
+    assert [row["name"] for row in engine.scan_table("d")] == ["d0", "d1", "d2"]
+    assert engine.row_count("d") == 3
+    engine.close()
+    print("[PASS] Pages freed by TRUNCATE keep only their new table's rows")
+
+
+def test_extent_growth_is_logged():
+    print("\n=== Extent growth after the last catalog save ===")
+    db_path = os.path.join(tempfile.mkdtemp(), "dbfile")
+    engine = Engine(db_path=db_path)
+    engine.create_table("items", [("ID", "INT"), ("NAME", "TEXT")])
+    engine.create_table("scratch", [("ID", "INT"), ("NAME", "TEXT")])
+    generation = engine.metadata.generation
+    for i in range(600):
+        engine.insert_row("items", [i, "item%03d" % i])
+    assert engine.catalog.get_table("ITEMS").page_count > 1
+    assert engine.metadata.generation == generation
+    engine.close()
+    print("[PASS] Pages are added without saving the catalog")
+
+    # Pages taken from the free list (in the checkpoint), then pages past
+    # the end of the file (logged after it)
+    crash(db_path, """
+        for i in range(600):
+            engine.insert_row("scratch", [i, "s%03d" % i])
+        engine.truncate_table("scratch")
+        free = {p for start, length in engine.free_pages.to_list() for p in range(start, start + length)}
+        for i in range(600, 1200):
+            engine.insert_row("items", [i, "item%04d" % i])
+        assert free <= set(engine.catalog.get_table("ITEMS").pages())
+        engine.checkpoint()
+        for i in range(1200, 1800):
+            engine.insert_row("items", [i, "item%04d" % i])
+    """)
+    engine = Engine(db_path=db_path)
+    pages = engine.catalog.get_table("ITEMS").pages()
+    assert ids(engine) == list(range(1800))
+    assert engine.row_count("items") == 1800
+    assert len(set(pages)) == len(pages) == engine.catalog.get_table("ITEMS").page_count
+    free = {p for start, length in engine.free_pages.to_list() for p in range(start, start + length)}
+    assert not free & set(pages)
+    assert all(p < engine.next_file_id for p in free | set(pages))
+    engine.close()
+    print("[PASS] Recovery adds logged pages to the table and takes them off the free list")
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print("MILESTONE 4: WRITE-AHEAD LOG")
+    print("=" * 80)
+
+    test_records_round_trip()
+    test_torn_tail_is_cut_off()
+    test_segments()
+    test_group_commit()
+    test_engine_recovery()
+    test_fuzzy_checkpoints()
+    test_freed_pages_reused()
+    test_extent_growth_is_logged()
+
+    print("=" * 80)
+    print("ALL WAL TESTS PASSED")
+    print("=" * 80)
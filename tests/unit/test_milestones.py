@@ -4,6 +4,7 @@ Consolidated from: test.py, milestone_test.py, extended_milestone_test.py, final
 """
 import os
 import sys
+import tempfile
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 if PROJECT_ROOT not in sys.path:
@@ -15,6 +16,12 @@ from backend.app.db.query import build_plan, execute_plan
 from engine.engine import Engine
 
 
+def new_engine():
+    """Engine backed by a fresh temporary data file (the catalog persists)."""
+    tmpdir = tempfile.mkdtemp()
+    return Engine(db_path=os.path.join(tmpdir, "dbfile"))
+
+
 def run_sql(engine, sql: str):
     """Tokenize, parse, plan, and execute a SQL statement."""
     tokenizer = Tokenizer(sql)
@@ -28,7 +35,7 @@ def run_sql(engine, sql: str):
 def test_milestone_8b_basic_dml_ddl():
     """Test basic DML & DDL operations (Milestone 8B)."""
     print("\n=== Milestone 8B: Basic DML & DDL ===")
-    engine = Engine()
+    engine = new_engine()
 
     # CREATE TABLE
     run_sql(engine, "CREATE TABLE users (id INTEGER, name TEXT, age INTEGER);")
@@ -80,7 +87,7 @@ def test_milestone_8b_basic_dml_ddl():
 def test_milestone_8c_inner_join():
     """Test INNER JOIN support (Milestone 8C)."""
     print("=== Milestone 8C: INNER JOIN ===")
-    engine = Engine()
+    engine = new_engine()
 
     # CREATE TABLES
     run_sql(engine, "CREATE TABLE users (id INTEGER, name TEXT);")
@@ -112,7 +119,7 @@ def test_milestone_8c_inner_join():
 def test_milestone_a_sql_surface():
     """Test SQL parser and AST (Milestone A)."""
     print("=== Milestone A: SQL Surface Upgrade (Parser + AST) ===")
-    engine = Engine()
+    engine = new_engine()
 
     # Test DROP TABLE parsing
     run_sql(engine, "CREATE TABLE test (id INTEGER);")
@@ -129,7 +136,7 @@ def test_milestone_a_sql_surface():
     print("[PASS] Extended CREATE TABLE (NOT NULL, PRIMARY KEY, AUTO_INCREMENT) parses")
 
     # Test DELETE
-    engine2 = Engine()
+    engine2 = new_engine()
     run_sql(engine2, "CREATE TABLE users (id INTEGER, name TEXT);")
     run_sql(engine2, "INSERT INTO users VALUES (1, 'Alice');")
     run_sql(engine2, "INSERT INTO users VALUES (2, 'Bob');")
@@ -138,7 +145,7 @@ def test_milestone_a_sql_surface():
     print("[PASS] DELETE FROM ... WHERE ... works")
 
     # Test UPDATE
-    engine3 = Engine()
+    engine3 = new_engine()
     run_sql(engine3, "CREATE TABLE users (id INTEGER, age INTEGER);")
     run_sql(engine3, "INSERT INTO users VALUES (1, 30);")
     result = run_sql(engine3, "UPDATE users SET age = 31 WHERE id = 1;")
@@ -151,7 +158,7 @@ def test_milestone_a_sql_surface():
 def test_milestone_b_dml_ddl_execution():
     """Test DML & DDL execution semantics (Milestone B)."""
     print("=== Milestone B: DML & DDL Execution Semantics ===")
-    engine = Engine()
+    engine = new_engine()
 
     run_sql(engine, "CREATE TABLE test (id INTEGER);")
     assert "TEST" in engine.catalog.tables
@@ -167,7 +174,7 @@ def test_milestone_c_constraints():
     print("=== Milestone C: Column Constraints Enforcement ===")
 
     # Test NOT NULL enforcement
-    engine = Engine()
+    engine = new_engine()
     tokenizer = Tokenizer("CREATE TABLE users (id INTEGER, name TEXT NOT NULL);")
     tokens = tokenizer.tokenize()
     parser = Parser(tokens)
@@ -189,7 +196,7 @@ def test_milestone_c_constraints():
             raise
 
     # Test PRIMARY KEY uniqueness
-    engine2 = Engine()
+    engine2 = new_engine()
     tokenizer = Tokenizer("CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT);")
     tokens = tokenizer.tokenize()
     parser = Parser(tokens)
@@ -218,7 +225,7 @@ def test_milestone_e_query_shaping():
     print("=== Milestone E: Query Shaping (ORDER BY, LIMIT, OFFSET, GROUP BY) ===")
 
     # Test ORDER BY ASC/DESC
-    engine = Engine()
+    engine = new_engine()
     run_sql(engine, "CREATE TABLE items (id INTEGER, name TEXT, price FLOAT);")
     run_sql(engine, "INSERT INTO items VALUES (3, 'Item C', 30.0);")
     run_sql(engine, "INSERT INTO items VALUES (1, 'Item A', 10.0);")
@@ -235,7 +242,7 @@ def test_milestone_e_query_shaping():
     print("[PASS] ORDER BY DESC works")
 
     # Test LIMIT
-    engine2 = Engine()
+    engine2 = new_engine()
     run_sql(engine2, "CREATE TABLE numbers (n INTEGER);")
     for i in range(1, 11):
         run_sql(engine2, f"INSERT INTO numbers VALUES ({i});")
@@ -245,7 +252,7 @@ def test_milestone_e_query_shaping():
     print("[PASS] LIMIT works")
 
     # Test OFFSET
-    engine3 = Engine()
+    engine3 = new_engine()
     run_sql(engine3, "CREATE TABLE seq (n INTEGER);")
     for i in range(1, 6):
         run_sql(engine3, f"INSERT INTO seq VALUES ({i});")
@@ -256,7 +263,7 @@ def test_milestone_e_query_shaping():
     print("[PASS] OFFSET works")
 
     # Test LIMIT + OFFSET pagination
-    engine4 = Engine()
+    engine4 = new_engine()
     run_sql(engine4, "CREATE TABLE pages (n INTEGER);")
     for i in range(1, 21):
         run_sql(engine4, f"INSERT INTO pages VALUES ({i});")
@@ -267,7 +274,7 @@ def test_milestone_e_query_shaping():
     print("[PASS] LIMIT + OFFSET pagination works")
 
     # Test GROUP BY + COUNT(*)
-    engine5 = Engine()
+    engine5 = new_engine()
     run_sql(engine5, "CREATE TABLE sales (product TEXT, amount INTEGER);")
     run_sql(engine5, "INSERT INTO sales VALUES ('Apple', 10);")
     run_sql(engine5, "INSERT INTO sales VALUES ('Apple', 20);")
@@ -291,7 +298,7 @@ def test_milestone_d_qualified_names_and_aliases():
     print("=== Milestone D: Qualified Column Names & Table Aliases ===")
 
     # Test 1: COUNT(*) with alias
-    engine = Engine()
+    engine = new_engine()
     run_sql(engine, "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT);")
     run_sql(engine, "INSERT INTO users VALUES (1, 'Alice', 'alice@example.com');")
 
@@ -309,7 +316,7 @@ def test_milestone_d_qualified_names_and_aliases():
     print("[PASS] COUNT(*) with alias works")
 
     # Test 2: Qualified column names in SELECT with JOIN
-    engine2 = Engine()
+    engine2 = new_engine()
     run_sql(engine2, "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT);")
     run_sql(engine2, "CREATE TABLE orders (id INTEGER, user_id INTEGER, product TEXT);")
     run_sql(engine2, "INSERT INTO users VALUES (1, 'Alice');")
@@ -330,7 +337,7 @@ def test_milestone_d_qualified_names_and_aliases():
     print("[PASS] Qualified column names with table aliases in JOIN works")
 
     # Test 3: Multiple qualified columns without WHERE after JOIN
-    engine3 = Engine()
+    engine3 = new_engine()
     run_sql(engine3, "CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT);")
     run_sql(engine3, "CREATE TABLE orders (id INTEGER, customer_id INTEGER, total FLOAT);")
     run_sql(engine3, "INSERT INTO customers VALUES (1, 'Bob');")
@@ -361,7 +368,7 @@ def test_comprehensive_scenario():
     print("COMPREHENSIVE END-TO-END TEST: All Features Combined")
     print("=" * 80)
 
-    engine = Engine()
+    engine = new_engine()
 
     # Create table with constraints
     run_sql(
@@ -418,7 +425,7 @@ def test_comprehensive_scenario():
     print("[PASS] LIMIT works")
 
     # Test GROUP BY
-    engine2 = Engine()
+    engine2 = new_engine()
     run_sql(engine2, "CREATE TABLE sales (product TEXT, amount INTEGER);")
     run_sql(engine2, "INSERT INTO sales VALUES ('Widget', 100);")
     run_sql(engine2, "INSERT INTO sales VALUES ('Widget', 200);")
@@ -428,7 +435,7 @@ def test_comprehensive_scenario():
     print("[PASS] GROUP BY works")
 
     # Test JOIN
-    engine3 = Engine()
+    engine3 = new_engine()
     run_sql(engine3, "CREATE TABLE customers (id INTEGER, name TEXT);")
     run_sql(engine3, "CREATE TABLE orders (id INTEGER, customer_id INTEGER, total FLOAT);")
     run_sql(engine3, "INSERT INTO customers VALUES (1, 'Alice');")